@@ -0,0 +1,111 @@
+import os
+import random
+import sys
+import time
+
+# הוסף את התיקייה הנוכחית לנתיב החיפוש של Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.openai.agent import SIMPLE_RESPONSES, KEYWORD_RESPONSES
+from src.openai.matcher import PhraseMatcher, SubstringIndex
+
+# הודעות לדוגמה - שאלות פשוטות, וריאציות שלהן והודעות רגילות שלא אמורות להתאים
+SAMPLE_MESSAGES = [
+    "היי",
+    "שלום לך",
+    "מה אתה יכול לעשות בשבילי",
+    "איזה פקודות יש",
+    "אני צריך עזרה עם מוצר",
+    "אתה יכול לעשות",
+    "תודה רבה",
+    "כמה הזמנות יש בחנות",
+    "הצג את המוצרים בקטגוריה חולצות",
+    "עדכן את המחיר של מוצר 15 ל-99",
+    "מה היו המכירות בחודש האחרון",
+]
+
+# מספרי הביטויים שאיתם נמדדת ההתאמה
+TABLE_SIZES = [len(KEYWORD_RESPONSES) + len(SIMPLE_RESPONSES), 1000, 5000]
+
+# מספר הסריקות בכל מדידה
+ITERATIONS = 2000
+
+WORDS = ["מוצר", "הזמנה", "קטגוריה", "מחיר", "מלאי", "לקוח", "משלוח", "קופון", "דוח", "מבצע",
+         "איך", "מה", "כמה", "למה", "מתי", "אפשר", "רוצה", "להוסיף", "לעדכן", "למחוק"]
+
+
+def legacy_match(clean_message, keywords, questions):
+    """
+    הבדיקה הקודמת: מעבר על כל מילות המפתח ואז על כל השאלות בשני הכיוונים
+    """
+    for keyword in keywords:
+        if keyword in clean_message:
+            return keyword
+    for question in questions:
+        if (question in clean_message) or (len(clean_message) > 5 and clean_message in question):
+            return question
+    return None
+
+
+def compiled_match(clean_message, matcher, index):
+    """
+    הבדיקה החדשה: מעבר אחד באוטומט, ואם אין התאמה - בדיקה אם ההודעה היא חלק משאלה
+    """
+    found = matcher.best_match(clean_message)
+    if found is not None:
+        return matcher.phrases[found]
+    if len(clean_message) > 5:
+        found = index.find(clean_message)
+        if found is not None:
+            return index.phrases[found]
+    return None
+
+
+def synthetic_questions(count, seed=7):
+    """
+    מייצר שאלות נפוצות מלאכותיות (3-6 מילים) לבדיקת עומס
+    """
+    rng = random.Random(seed)
+    questions = set()
+    while len(questions) < count:
+        questions.add(" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 6))))
+    return sorted(questions)
+
+
+def measure(function, *args):
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for message in SAMPLE_MESSAGES:
+            function(message, *args)
+    return (time.perf_counter() - started) / (ITERATIONS * len(SAMPLE_MESSAGES)) * 1_000_000
+
+
+def main():
+    keywords = list(KEYWORD_RESPONSES)
+    questions = list(SIMPLE_RESPONSES)
+    matcher = PhraseMatcher(keywords + questions)
+    index = SubstringIndex(questions)
+
+    print("התאמות על הטבלאות הקיימות (הקודם -> החדש):")
+    for message in SAMPLE_MESSAGES:
+        before = legacy_match(message, keywords, questions)
+        after = compiled_match(message, matcher, index)
+        marker = "  " if before == after else "* "
+        print(f"{marker}{message!r}: {before!r} -> {after!r}")
+    print("(* - ההתאמה השתנתה בגלל עדיפות לביטוי הארוך ביותר)\n")
+
+    print(f"{'ביטויים':>8} {'קודם (מיקרו-שניות)':>20} {'חדש (מיקרו-שניות)':>20} {'בנייה (מילי-שניות)':>20}")
+    for size in TABLE_SIZES:
+        extra = synthetic_questions(max(0, size - len(keywords) - len(questions)))
+        table_questions = questions + extra
+        started = time.perf_counter()
+        table_matcher = PhraseMatcher(keywords + table_questions)
+        table_index = SubstringIndex(table_questions)
+        build_ms = (time.perf_counter() - started) * 1000
+        legacy_us = measure(legacy_match, keywords, table_questions)
+        compiled_us = measure(compiled_match, table_matcher, table_index)
+        print(f"{len(keywords) + len(table_questions):>8} {legacy_us:>20.2f} {compiled_us:>20.2f} {build_ms:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
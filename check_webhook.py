@@ -0,0 +1,63 @@
+import asyncio
+import json
+import os
+import sys
+
+import aiohttp
+from dotenv import load_dotenv
+
+# טעינת משתני סביבה מקובץ .env
+load_dotenv()
+
+# הוסף את התיקייה הנוכחית לנתיב החיפוש של Python
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.woocommerce.webhooks import sign_payload
+
+# כתובת שרת ה-webhooks של הבוט
+WEBHOOK_URL = "http://{host}:{port}{path}".format(
+    host=os.getenv('WEBHOOK_CHECK_HOST', '127.0.0.1'),
+    port=os.getenv('WEBHOOK_PORT', '8080'),
+    path=os.getenv('WEBHOOK_PATH', '/woocommerce/webhook')
+)
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+
+# webhooks לדוגמה כפי ש-WooCommerce שולח אותם
+SAMPLE_WEBHOOKS = [
+    ("product.created", {"id": 999001, "name": "מוצר בדיקה", "price": "10", "status": "publish"}),
+    ("product.updated", {"id": 999001, "name": "מוצר בדיקה מעודכן", "price": "12", "status": "publish"}),
+    ("product.deleted", {"id": 999001}),
+    ("order.updated", {"id": 999002, "status": "processing", "total": "12.00"}),
+]
+
+
+async def post_webhook(session: aiohttp.ClientSession, topic: str, payload: dict, secret: str) -> int:
+    """
+    שולח webhook חתום לשרת ומחזיר את קוד התשובה
+    """
+    body = json.dumps(payload).encode()
+    headers = {
+        "Content-Type": "application/json",
+        "X-WC-Webhook-Topic": topic,
+        "X-WC-Webhook-Signature": sign_payload(body, secret)
+    }
+    async with session.post(WEBHOOK_URL, data=body, headers=headers) as response:
+        return response.status
+
+
+async def main() -> None:
+    async with aiohttp.ClientSession() as session:
+        for topic, payload in SAMPLE_WEBHOOKS:
+            status = await post_webhook(session, topic, payload, WEBHOOK_SECRET)
+            print(f"{topic}: {status}")
+
+        # webhook עם חתימה שגויה חייב להידחות
+        status = await post_webhook(session, "product.updated", SAMPLE_WEBHOOKS[1][1], "wrong-secret")
+        print(f"חתימה שגויה: {status} (צפוי 401)")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except Exception as e:
+        print(f"שגיאה: {str(e)}")
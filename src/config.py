@@ -9,6 +9,28 @@ from dotenv import load_dotenv
 # טעינת משתני הסביבה מקובץ .env
 load_dotenv()
 
+def _parse_int_map(value: str) -> Dict[str, int]:
+    """
+    ממיר מחרוזת בפורמט "name=value,name=value" למילון
+    """
+    result = {}
+    for pair in value.split(","):
+        if "=" in pair:
+            name, number = pair.split("=", 1)
+            result[name.strip()] = int(number)
+    return result
+
+def _parse_list_map(value: str) -> Dict[str, List[str]]:
+    """
+    ממיר מחרוזת בפורמט "name=a,b,c;name=d,e" למילון של רשימות
+    """
+    result = {}
+    for pair in value.split(";"):
+        if "=" in pair:
+            name, items = pair.split("=", 1)
+            result[name.strip()] = [item.strip() for item in items.split(",") if item.strip()]
+    return result
+
 # הגדרות כלליות
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -16,12 +38,55 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 # הגדרות OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+STREAM_RESPONSES_ENABLED = os.getenv("STREAM_RESPONSES_ENABLED", "True").lower() == "true"  # הצגת התשובה בהדרגה תוך כדי יצירתה
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1"))  # זמן מינימלי בין עדכוני הודעה בצ'אט בשניות (מגבלת טלגרם)
 
 # הגדרות WooCommerce
 WOO_URL = os.getenv("WOO_URL")
 WOO_CONSUMER_KEY = os.getenv("WOO_CONSUMER_KEY")
 WOO_CONSUMER_SECRET = os.getenv("WOO_CONSUMER_SECRET")
 WOO_API_VERSION = os.getenv("WOO_API_VERSION", "wc/v3")
+WOO_TIMEOUT = float(os.getenv("WOO_TIMEOUT", "30"))  # זמן מקסימלי לבקשה בשניות
+WOO_READ_TIMEOUT = float(os.getenv("WOO_READ_TIMEOUT", "10"))  # זמן מקסימלי לכל ניסיון של בקשת קריאה בשניות
+WOO_CONNECT_TIMEOUT = float(os.getenv("WOO_CONNECT_TIMEOUT", "10"))  # זמן מקסימלי להקמת חיבור בשניות
+WOO_POOL_SIZE = int(os.getenv("WOO_POOL_SIZE", "20"))  # מספר חיבורים מקסימלי במאגר
+WOO_POOL_SIZE_PER_HOST = int(os.getenv("WOO_POOL_SIZE_PER_HOST", "10"))  # מספר חיבורים מקסימלי לחנות
+WOO_KEEPALIVE_TIMEOUT = float(os.getenv("WOO_KEEPALIVE_TIMEOUT", "30"))  # זמן שמירת חיבור פנוי בשניות
+WOO_PER_PAGE = int(os.getenv("WOO_PER_PAGE", "100"))  # מספר פריטים בכל דף (מקסימום 100 ב-WooCommerce)
+WOO_PAGE_CONCURRENCY = int(os.getenv("WOO_PAGE_CONCURRENCY", "4"))  # מספר דפים שנשלפים במקביל
+WOO_BATCH_SIZE = min(100, int(os.getenv("WOO_BATCH_SIZE", "100")))  # מספר פעולות מקסימלי בבקשת batch (מקסימום 100 ב-WooCommerce)
+WOO_BATCH_CONCURRENCY = int(os.getenv("WOO_BATCH_CONCURRENCY", "2"))  # מספר בקשות batch שנשלחות במקביל
+LOADER_BATCH_WINDOW = float(os.getenv("LOADER_BATCH_WINDOW", "0.01"))  # זמן איסוף מזהים לבקשה מקובצת בשניות
+LOADER_MAX_BATCH_SIZE = min(100, int(os.getenv("LOADER_MAX_BATCH_SIZE", "100")))  # מספר מזהים מקסימלי בבקשה מקובצת
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()  # auto, orjson או json
+JSON_STREAM_THRESHOLD = int(os.getenv("JSON_STREAM_THRESHOLD", str(1024 * 1024)))  # גודל תשובה בבתים שממנו היא מפוענחת בהדרגה (0 מבטל)
+
+# הגדרות עמידות מול החנות
+WOO_RATE_LIMIT = float(os.getenv("WOO_RATE_LIMIT", "10"))  # מספר בקשות בשנייה (0 מבטל את ההגבלה)
+WOO_RATE_BURST = int(os.getenv("WOO_RATE_BURST", "20"))  # מספר בקשות מקסימלי ברצף
+WOO_MIN_CONCURRENCY = int(os.getenv("WOO_MIN_CONCURRENCY", "1"))  # מגבלת מקביליות מינימלית
+WOO_MAX_CONCURRENCY = int(os.getenv("WOO_MAX_CONCURRENCY", "8"))  # מגבלת מקביליות מקסימלית
+WOO_SLOW_RESPONSE_THRESHOLD = float(os.getenv("WOO_SLOW_RESPONSE_THRESHOLD", "5"))  # זמן תגובה איטי בשניות
+WOO_RETRY_ATTEMPTS = int(os.getenv("WOO_RETRY_ATTEMPTS", "3"))  # מספר ניסיונות לבקשות קריאה
+WOO_RETRY_BASE_DELAY = float(os.getenv("WOO_RETRY_BASE_DELAY", "0.5"))  # השהיה בסיסית בין ניסיונות בשניות
+WOO_RETRY_MAX_DELAY = float(os.getenv("WOO_RETRY_MAX_DELAY", "8"))  # השהיה מקסימלית בין ניסיונות בשניות
+WOO_BREAKER_FAILURE_THRESHOLD = int(os.getenv("WOO_BREAKER_FAILURE_THRESHOLD", "5"))  # כישלונות רצופים שפותחים את המפסק
+WOO_BREAKER_RECOVERY_TIMEOUT = float(os.getenv("WOO_BREAKER_RECOVERY_TIMEOUT", "30"))  # זמן עד בקשת ניסיון בשניות
+
+# הגדרות פלט הכלים למודל
+TOOL_OUTPUT_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_MAX_CHARS", "8000"))  # תקציב גודל ברירת מחדל לפלט של כלי בתווים
+TOOL_OUTPUT_BUDGETS = _parse_int_map(os.getenv("TOOL_OUTPUT_BUDGETS", ""))  # תקציב גודל לפי כלי
+TOOL_PROJECTION_OVERRIDES = _parse_list_map(os.getenv("TOOL_PROJECTION_OVERRIDES", ""))  # השדות שכל כלי מחזיר
+
+# הגדרות ניתוח הזמנות
+ANALYTICS_PAID_STATUSES = [status.strip() for status in os.getenv("ANALYTICS_PAID_STATUSES", "completed,processing,on-hold").split(",") if status.strip()]  # סטטוסים שנחשבים כמכירה
+
+# הגדרות חיפוש מוצרים
+SEARCH_INDEX_REFRESH_INTERVAL = int(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", "600"))  # בנייה מחדש של אינדקס החיפוש מהקטלוג המלא בשניות
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.35"))  # דמיון מינימלי להתאמה עמומה (0-1)
+
+# הגדרות קטלוג קומפקטי (לחנויות גדולות)
+CATALOG_COMPACT_ENABLED = os.getenv("CATALOG_COMPACT_ENABLED", "False").lower() == "true"  # שמירת רשימת המוצרים במטמון בייצוג קומפקטי
 
 # הגדרות Telegram
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -29,11 +94,64 @@ TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 # הגדרות Cache
 CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True").lower() == "true"
 CACHE_EXPIRY = int(os.getenv("CACHE_EXPIRY", "300"))  # ברירת מחדל: 5 דקות
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000"))  # מספר רשומות מקסימלי במטמון
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # תקציב זיכרון משוער למטמון בבתים
+CACHE_TTL_OVERRIDES = _parse_int_map(os.getenv("CACHE_TTL_OVERRIDES", "get_store_info=3600,get_categories=900"))  # זמן תפוגה לפי פונקציה
+CACHE_STALE_WHILE_REVALIDATE = os.getenv("CACHE_STALE_WHILE_REVALIDATE", "True").lower() == "true"  # הגשת ערך ישן בזמן רענון ברקע
+CACHE_MAX_STALENESS = int(os.getenv("CACHE_MAX_STALENESS", "600"))  # כמה שניות אחרי התפוגה מותר להגיש ערך ישן
+CACHE_MAX_STALENESS_OVERRIDES = _parse_int_map(os.getenv("CACHE_MAX_STALENESS_OVERRIDES", ""))  # חלון ערך ישן לפי פונקציה
+CACHE_REFRESH_AHEAD_FUNCTIONS = [name.strip() for name in os.getenv("CACHE_REFRESH_AHEAD_FUNCTIONS", "get_products,get_store_info").split(",") if name.strip()]
+CACHE_OUTAGE_GRACE = int(os.getenv("CACHE_OUTAGE_GRACE", "3600"))  # כמה זמן נוסף נשמר ערך ישן לשימוש כשהחנות לא זמינה
+CACHE_NEGATIVE_EXPIRY = int(os.getenv("CACHE_NEGATIVE_EXPIRY", "15"))  # זמן שמירת כישלון במטמון השלילי בשניות
+CACHE_REFRESH_AHEAD_RATIO = float(os.getenv("CACHE_REFRESH_AHEAD_RATIO", "0.8"))  # חלק מזמן התפוגה שאחריו פונקציה חמה מתרעננת
+CACHE_WARMUP_ENABLED = os.getenv("CACHE_WARMUP_ENABLED", "True").lower() == "true"  # טעינת נתוני הליבה למטמון לפני שהבוט מתחיל לקבל הודעות
+CACHE_WARMUP_TIMEOUT = float(os.getenv("CACHE_WARMUP_TIMEOUT", "30"))  # זמן המתנה מקסימלי לטעינה המוקדמת בשניות
+CACHE_SNAPSHOT_ENABLED = os.getenv("CACHE_SNAPSHOT_ENABLED", "True").lower() == "true"  # שמירת המטמונים לדיסק ושחזורם בעליית הבוט
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "cache_snapshot.bin")
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv("CACHE_SNAPSHOT_INTERVAL", "300"))  # מרווח בין שמירות תקופתיות בשניות (0 מבטל)
+
+# הגדרות מטמון משותף בין כמה תהליכים של הבוט
+SHARED_CACHE_ENABLED = os.getenv("SHARED_CACHE_ENABLED", "False").lower() == "true"
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "sqlite").lower()  # sqlite או postgres (טבלת cached_responses)
+SHARED_CACHE_SQLITE_PATH = os.getenv("SHARED_CACHE_SQLITE_PATH", "shared_cache.db")
+SHARED_CACHE_CHANNEL = os.getenv("SHARED_CACHE_CHANNEL", "woo_cache_invalidation")  # ערוץ LISTEN/NOTIFY להפצת ביטולים
+SHARED_CACHE_FLUSH_INTERVAL = float(os.getenv("SHARED_CACHE_FLUSH_INTERVAL", "0.5"))  # זמן מקסימלי שכתיבה ממתינה בתור בשניות
+SHARED_CACHE_BATCH_SIZE = int(os.getenv("SHARED_CACHE_BATCH_SIZE", "100"))  # מספר כתיבות שממנו התור נשלח מיד
+SHARED_CACHE_POLL_INTERVAL = float(os.getenv("SHARED_CACHE_POLL_INTERVAL", "1"))  # מרווח בין בדיקות ביטולים ב-SQLite בשניות
+
+# הגדרות מטמון תשובות סמנטי (שאלות דומות מקבלות את אותה תשובה)
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "False").lower() == "true"  # מומלץ רק עם מראה מקומית או webhooks, שמעדכנים את גרסאות הנתונים
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))  # דמיון מינימלי (קוסינוס) בין שאלות
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))  # זמן חיים מקסימלי של תשובה בשניות
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2000"))  # מספר תשובות מקסימלי
+SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "1024"))  # מספר הממדים בווקטור של כל שאלה
+
+# הגדרות webhooks של WooCommerce לעדכון המטמון בזמן אמת
+WEBHOOK_ENABLED = os.getenv("WEBHOOK_ENABLED", "False").lower() == "true"
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/woocommerce/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_CACHE_EXPIRY = int(os.getenv("WEBHOOK_CACHE_EXPIRY", "3600"))  # זמן תפוגה של מוצרים והזמנות כשה-webhooks פעילים
+
+# הגדרות מראה מקומית של החנות (מוצרים והזמנות)
+MIRROR_ENABLED = os.getenv("MIRROR_ENABLED", "False").lower() == "true"
+MIRROR_PERSISTENCE = os.getenv("MIRROR_PERSISTENCE", "none").lower()  # none, sqlite או postgres
+MIRROR_SQLITE_PATH = os.getenv("MIRROR_SQLITE_PATH", "store_mirror.db")
+MIRROR_POLL_INTERVAL = float(os.getenv("MIRROR_POLL_INTERVAL", "60"))  # מרווח בין סנכרוני שינויים בשניות
+MIRROR_MAX_STALENESS = float(os.getenv("MIRROR_MAX_STALENESS", "300"))  # גיל מקסימלי של המראה לפני סנכרון בשניות
+MIRROR_FULL_RESYNC_INTERVAL = float(os.getenv("MIRROR_FULL_RESYNC_INTERVAL", "3600"))  # מרווח בין טעינות מלאות בשניות
 
 # הגדרות זיכרון שיחה
 MEMORY_ENABLED = os.getenv("MEMORY_ENABLED", "True").lower() == "true"
 MEMORY_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", "50"))  # מספר מקסימלי של הודעות לשמירה לכל משתמש
-MEMORY_CONTEXT_LIMIT = int(os.getenv("MEMORY_CONTEXT_LIMIT", "10"))  # מספר ההודעות האחרונות שיועברו לסוכן
+MEMORY_CONTEXT_LIMIT = int(os.getenv("MEMORY_CONTEXT_LIMIT", "10"))  # מספר ההודעות האחרונות שיועברו לסוכן כשאין תקציב טוקנים
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "2000"))  # מספר טוקנים מקסימלי להיסטוריה שמועברת לסוכן (0 - לפי מספר הודעות)
+MEMORY_SUMMARY_ENABLED = os.getenv("MEMORY_SUMMARY_ENABLED", "True").lower() == "true"  # סיכום ברקע של החלק הישן בשיחות ארוכות
+MEMORY_SUMMARY_KEEP_RECENT = int(os.getenv("MEMORY_SUMMARY_KEEP_RECENT", "6"))  # מספר ההודעות האחרונות שתמיד נשלחות במלואן
+MEMORY_SUMMARY_TRIGGER_TOKENS = int(os.getenv("MEMORY_SUMMARY_TRIGGER_TOKENS", "1500"))  # מספר טוקנים בהודעות הישנות שלא סוכמו שמפעיל סיכום
+MEMORY_SUMMARY_MAX_CHARS = int(os.getenv("MEMORY_SUMMARY_MAX_CHARS", "2000"))  # אורך מקסימלי של כל הודעה שנשלחת לסיכום
+MEMORY_SUMMARY_MODEL = os.getenv("MEMORY_SUMMARY_MODEL", OPENAI_MODEL)  # המודל שמסכם את השיחה
 
 # הגדרות מסד נתונים
 DB_ENABLED = os.getenv("DB_ENABLED", "False").lower() == "true"
@@ -3,7 +3,7 @@
 """
 
 from src.database.connection import get_engine, init_db, close_db
-from src.database.models import Base, Conversation, CachedResponse, UserPreference
+from src.database.models import Base, Conversation, CachedResponse, UserPreference, MirrorItem, MirrorState
 
 __all__ = [
     'get_engine',
@@ -12,5 +12,7 @@ __all__ = [
     'Base',
     'Conversation',
     'CachedResponse',
-    'UserPreference'
+    'UserPreference',
+    'MirrorItem',
+    'MirrorState'
 ] 
\ No newline at end of file
@@ -88,7 +88,7 @@ def init_db():
     
     try:
         # יבוא מודלים כדי לוודא שהם נטענים
-        from src.database.models import Conversation, CachedResponse, UserPreference
+        from src.database.models import Conversation, ConversationSummary, CachedResponse, UserPreference, MirrorItem, MirrorState
         
         # יצירת כל הטבלאות
         Base.metadata.create_all(engine)
@@ -6,7 +6,7 @@ import json
 import datetime
 from typing import Dict, List, Any, Optional
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, Float, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -78,6 +78,36 @@ class Conversation(Base):
         return result
 
 
+class ConversationSummary(Base):
+    """
+    מודל לשמירת הסיכום המצטבר של החלק הישן בשיחה של משתמש
+    """
+    __tablename__ = 'conversation_summaries'
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(String(50), nullable=False, unique=True, index=True)
+    summary = Column(Text, nullable=False)
+    last_message_id = Column(String(50), nullable=False)  # ההודעה האחרונה שנכללה בסיכום
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    @classmethod
+    def get_by_user_id(cls, session, user_id: str) -> Optional['ConversationSummary']:
+        """
+        שליפת הסיכום של משתמש מסוים
+        """
+        return session.query(cls).filter(cls.user_id == user_id).first()
+    
+    @classmethod
+    def clear_user_summary(cls, session, user_id: str) -> int:
+        """
+        מחיקת הסיכום של משתמש מסוים
+        מחזיר את מספר הרשומות שנמחקו
+        """
+        result = session.query(cls).filter(cls.user_id == user_id).delete()
+        session.commit()
+        return result
+
+
 class CachedResponse(Base):
     """
     מודל לשמירת תשובות במטמון
@@ -174,4 +204,61 @@ class UserPreference(Base):
             pref = UserPreference(user_id=user_id)
             session.add(pref)
             session.commit()
-        return pref 
\ No newline at end of file
+        return pref
+
+
+class MirrorItem(Base):
+    """
+    מודל לשמירת המראה המקומית של החנות (מוצרים והזמנות)
+    """
+    __tablename__ = 'store_mirror'
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(20), nullable=False)  # 'products' או 'orders'
+    object_id = Column(Integer, nullable=False)
+    data = Column(Text, nullable=False)  # האובייקט המלא בפורמט JSON
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    # כל אובייקט נשמר פעם אחת לכל סוג
+    __table_args__ = (
+        Index('idx_mirror_kind_object', kind, object_id, unique=True),
+    )
+    
+    @classmethod
+    def get_by_kind(cls, session, kind: str) -> List['MirrorItem']:
+        """
+        שליפת כל האובייקטים מסוג מסוים
+        """
+        return session.query(cls).filter(cls.kind == kind).all()
+    
+    @classmethod
+    def delete_objects(cls, session, kind: str, object_ids: List[int]) -> int:
+        """
+        מחיקת אובייקטים לפי מזהה
+        מחזיר את מספר הרשומות שנמחקו
+        """
+        if not object_ids:
+            return 0
+        return session.query(cls).filter(
+            cls.kind == kind,
+            cls.object_id.in_(object_ids)
+        ).delete(synchronize_session=False)
+
+
+class MirrorState(Base):
+    """
+    מודל לשמירת מצב הסנכרון של המראה המקומית, לכל סוג אובייקטים
+    """
+    __tablename__ = 'store_mirror_state'
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(20), nullable=False, unique=True)  # 'products' או 'orders'
+    last_sync = Column(Float, nullable=False, default=0.0)  # זמן הסנכרון האחרון (epoch)
+    last_full_load = Column(Float, nullable=False, default=0.0)  # זמן הטעינה המלאה האחרונה (epoch)
+    
+    @classmethod
+    def get_by_kind(cls, session, kind: str) -> Optional['MirrorState']:
+        """
+        שליפת מצב הסנכרון של סוג מסוים
+        """
+        return session.query(cls).filter(cls.kind == kind).first()
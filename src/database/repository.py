@@ -3,13 +3,17 @@
 """
 
 import hashlib
+import json
 import logging
 import datetime
 from typing import List, Dict, Any, Optional, Tuple
 
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
 from src.config import DB_ENABLED, MEMORY_MAX_MESSAGES
 from src.database.connection import get_session
-from src.database.models import Conversation, CachedResponse, UserPreference
+from src.database.models import Conversation, ConversationSummary, CachedResponse, UserPreference, MirrorItem, MirrorState
 
 # יצירת לוגר
 logger = logging.getLogger(__name__)
@@ -129,6 +133,103 @@ def clear_conversation_history(user_id: str) -> bool:
         session.close()
 
 
+def get_conversation_summary(user_id: str) -> Optional[Dict[str, str]]:
+    """
+    שליפת הסיכום המצטבר של שיחת משתמש
+    
+    Args:
+        user_id: מזהה המשתמש
+        
+    Returns:
+        Optional[Dict]: מילון עם הסיכום ומזהה ההודעה האחרונה שנכללה בו, או None אם אין סיכום
+    """
+    if not DB_ENABLED:
+        logger.debug("מסד הנתונים מושבת, אין סיכום שיחה")
+        return None
+    
+    session = get_session()
+    if session is None:
+        return None
+    
+    try:
+        row = ConversationSummary.get_by_user_id(session, user_id)
+        if row is None:
+            return None
+        return {"summary": row.summary, "last_message_id": row.last_message_id}
+    except Exception as e:
+        logger.error(f"שגיאה בשליפת סיכום שיחה: {str(e)}")
+        return None
+    finally:
+        session.close()
+
+
+def save_conversation_summary(user_id: str, summary: str, last_message_id: str) -> bool:
+    """
+    שמירת הסיכום המצטבר של שיחת משתמש (מחליף סיכום קודם)
+    
+    Args:
+        user_id: מזהה המשתמש
+        summary: טקסט הסיכום
+        last_message_id: מזהה ההודעה האחרונה שנכללה בסיכום
+        
+    Returns:
+        bool: האם השמירה הצליחה
+    """
+    if not DB_ENABLED:
+        logger.debug("מסד הנתונים מושבת, דילוג על שמירת סיכום שיחה")
+        return False
+    
+    session = get_session()
+    if session is None:
+        return False
+    
+    try:
+        row = ConversationSummary.get_by_user_id(session, user_id)
+        if row is None:
+            session.add(ConversationSummary(user_id=user_id, summary=summary, last_message_id=last_message_id))
+        else:
+            row.summary = summary
+            row.last_message_id = last_message_id
+        session.commit()
+        logger.debug(f"נשמר סיכום שיחה למשתמש {user_id}")
+        return True
+    except Exception as e:
+        logger.error(f"שגיאה בשמירת סיכום שיחה: {str(e)}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+
+def clear_conversation_summary(user_id: str) -> bool:
+    """
+    מחיקת הסיכום המצטבר של שיחת משתמש
+    
+    Args:
+        user_id: מזהה המשתמש
+        
+    Returns:
+        bool: האם המחיקה הצליחה
+    """
+    if not DB_ENABLED:
+        logger.debug("מסד הנתונים מושבת, דילוג על מחיקת סיכום שיחה")
+        return False
+    
+    session = get_session()
+    if session is None:
+        return False
+    
+    try:
+        ConversationSummary.clear_user_summary(session, user_id)
+        return True
+    except Exception as e:
+        logger.error(f"שגיאה במחיקת סיכום שיחה: {str(e)}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+
 def get_cached_response(query: str) -> Optional[str]:
     """
     שליפת תשובה מהמטמון לפי שאילתה
@@ -221,6 +322,255 @@ def save_to_cache(query: str, response: str) -> bool:
         session.close()
 
 
+def get_shared_cache_entries(query_hashes: List[str]) -> Dict[str, Tuple[str, datetime.datetime]]:
+    """
+    שליפת רשומות של המטמון המשותף בין תהליכי הבוט
+    
+    Args:
+        query_hashes: מזהי הרשומות
+        
+    Returns:
+        Dict: מזהה -> (הערך כ-JSON, זמן השמירה ב-UTC)
+    """
+    if not DB_ENABLED or not query_hashes:
+        return {}
+    
+    session = get_session()
+    if session is None:
+        return {}
+    
+    try:
+        rows = session.query(
+            CachedResponse.query_hash, CachedResponse.response, CachedResponse.created_at
+        ).filter(CachedResponse.query_hash.in_(query_hashes)).all()
+        return {row.query_hash: (row.response, row.created_at) for row in rows}
+    except Exception as e:
+        logger.error(f"שגיאה בשליפה מהמטמון המשותף: {str(e)}")
+        raise
+    finally:
+        session.close()
+
+
+def save_shared_cache_entries(
+    rows: List[Tuple[str, str, str, datetime.datetime]],
+    deleted_hashes: List[str],
+    deleted_patterns: List[str],
+    channel: str,
+    notifications: List[str]
+) -> bool:
+    """
+    שמירת קבוצת שינויים במטמון המשותף בטרנזקציה אחת, והודעה לשאר התהליכים ב-NOTIFY.
+    ההודעות נמסרות רק אחרי שהטרנזקציה הסתיימה, כך שמי שמקבל אותן קורא כבר את הערך החדש.
+    
+    Args:
+        rows: רשומות לשמירה - (מזהה, מפתח קריא, ערך כ-JSON, זמן השמירה ב-UTC)
+        deleted_hashes: מזהי רשומות למחיקה
+        deleted_patterns: תבניות LIKE של מפתחות למחיקה (עם escape ב-\\)
+        channel: ערוץ ה-NOTIFY
+        notifications: ההודעות לשליחה
+        
+    Returns:
+        bool: האם השמירה הצליחה
+    """
+    if not DB_ENABLED:
+        logger.debug("מסד הנתונים מושבת, דילוג על שמירה במטמון המשותף")
+        return False
+    
+    session = get_session()
+    if session is None:
+        return False
+    
+    try:
+        if deleted_hashes:
+            session.query(CachedResponse).filter(
+                CachedResponse.query_hash.in_(deleted_hashes)
+            ).delete(synchronize_session=False)
+        for pattern in deleted_patterns:
+            session.query(CachedResponse).filter(
+                CachedResponse.query.like(pattern, escape="\\")
+            ).delete(synchronize_session=False)
+        
+        if rows:
+            statement = insert(CachedResponse).values([
+                {
+                    "query_hash": query_hash,
+                    "query": query,
+                    "response": response,
+                    "created_at": created_at,
+                    "last_accessed": created_at,
+                    "access_count": 1
+                }
+                for query_hash, query, response, created_at in rows
+            ])
+            session.execute(statement.on_conflict_do_update(
+                index_elements=[CachedResponse.query_hash],
+                set_={
+                    "query": statement.excluded.query,
+                    "response": statement.excluded.response,
+                    "created_at": statement.excluded.created_at,
+                    "last_accessed": statement.excluded.last_accessed
+                }
+            ))
+        
+        for payload in notifications:
+            session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+        
+        session.commit()
+        logger.debug(f"נשמרו {len(rows)} רשומות במטמון המשותף")
+        return True
+    except Exception as e:
+        logger.error(f"שגיאה בשמירה במטמון המשותף: {str(e)}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+
+def get_mirror_items(kind: str) -> List[Dict[str, Any]]:
+    """
+    שליפת כל האובייקטים השמורים במראה המקומית של החנות
+    
+    Args:
+        kind: סוג האובייקטים ('products' או 'orders')
+        
+    Returns:
+        List[Dict]: רשימת האובייקטים
+    """
+    if not DB_ENABLED:
+        logger.debug("מסד הנתונים מושבת, החזרת מראה ריקה")
+        return []
+    
+    session = get_session()
+    if session is None:
+        return []
+    
+    try:
+        items = [json.loads(row.data) for row in MirrorItem.get_by_kind(session, kind)]
+        logger.debug(f"נשלפו {len(items)} רשומות {kind} מהמראה המקומית")
+        return items
+    except Exception as e:
+        logger.error(f"שגיאה בשליפת המראה המקומית: {str(e)}")
+        return []
+    finally:
+        session.close()
+
+
+def save_mirror_items(kind: str, items: List[Dict[str, Any]], removed_ids: Optional[List[int]] = None) -> bool:
+    """
+    שמירת שינויים במראה המקומית של החנות
+    
+    Args:
+        kind: סוג האובייקטים ('products' או 'orders')
+        items: אובייקטים חדשים או מעודכנים
+        removed_ids: מזהי אובייקטים שנמחקו (אופציונלי)
+        
+    Returns:
+        bool: האם השמירה הצליחה
+    """
+    if not DB_ENABLED:
+        logger.debug("מסד הנתונים מושבת, דילוג על שמירת המראה המקומית")
+        return False
+    
+    session = get_session()
+    if session is None:
+        return False
+    
+    try:
+        MirrorItem.delete_objects(session, kind, list(removed_ids or []))
+        
+        # עדכון רשומות קיימות ויצירת רשומות חדשות
+        by_id = {item["id"]: item for item in items}
+        existing = {
+            row.object_id: row
+            for row in session.query(MirrorItem).filter(
+                MirrorItem.kind == kind,
+                MirrorItem.object_id.in_(list(by_id))
+            )
+        } if by_id else {}
+        
+        for object_id, item in by_id.items():
+            data = json.dumps(item, ensure_ascii=False)
+            if object_id in existing:
+                existing[object_id].data = data
+            else:
+                session.add(MirrorItem(kind=kind, object_id=object_id, data=data))
+        
+        session.commit()
+        logger.debug(f"נשמרו {len(by_id)} רשומות {kind} במראה המקומית")
+        return True
+    except Exception as e:
+        logger.error(f"שגיאה בשמירת המראה המקומית: {str(e)}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+
+def get_mirror_state(kind: str) -> Dict[str, float]:
+    """
+    שליפת מצב הסנכרון השמור של המראה המקומית
+
+    Args:
+        kind: סוג האובייקטים ('products' או 'orders')
+
+    Returns:
+        Dict: זמני הסנכרון והטעינה המלאה האחרונים (epoch), או מילון ריק אם לא נשמר מצב
+    """
+    if not DB_ENABLED:
+        return {}
+
+    session = get_session()
+    if session is None:
+        return {}
+
+    try:
+        state = MirrorState.get_by_kind(session, kind)
+        if state is None:
+            return {}
+        return {"last_sync": state.last_sync, "last_full_load": state.last_full_load}
+    except Exception as e:
+        logger.error(f"שגיאה בשליפת מצב המראה המקומית: {str(e)}")
+        return {}
+    finally:
+        session.close()
+
+
+def save_mirror_state(kind: str, last_sync: float, last_full_load: float) -> bool:
+    """
+    שמירת מצב הסנכרון של המראה המקומית
+
+    Args:
+        kind: סוג האובייקטים ('products' או 'orders')
+        last_sync: זמן הסנכרון האחרון (epoch)
+        last_full_load: זמן הטעינה המלאה האחרונה (epoch)
+
+    Returns:
+        bool: האם השמירה הצליחה
+    """
+    if not DB_ENABLED:
+        return False
+
+    session = get_session()
+    if session is None:
+        return False
+
+    try:
+        state = MirrorState.get_by_kind(session, kind)
+        if state is None:
+            state = MirrorState(kind=kind)
+            session.add(state)
+        state.last_sync = last_sync
+        state.last_full_load = last_full_load
+        session.commit()
+        return True
+    except Exception as e:
+        logger.error(f"שגיאה בשמירת מצב המראה המקומית: {str(e)}")
+        session.rollback()
+        return False
+    finally:
+        session.close()
+
+
 def get_user_preferences(user_id: str) -> Dict[str, Any]:
     """
     שליפת העדפות משתמש
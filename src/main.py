@@ -7,12 +7,14 @@ import sys
 import os
 import io
 
-from src.config import LOG_LEVEL, DB_ENABLED
-from src.openai.agent import register_tools
+from src.config import LOG_LEVEL, DB_ENABLED, CACHE_ENABLED, CACHE_SNAPSHOT_ENABLED
+from src.openai.agent import register_tools, summarize_conversation
+from src.memory import conversation_memory
 from src.woocommerce.tools import TOOL_HANDLERS
 from src.telegram.bot import run_bot
 from src.database.connection import init_db, close_db
 from src.database.scheduler import start_scheduler, stop_scheduler
+from src.snapshot import restore_snapshot, save_snapshot
 
 # הגדרת לוגר עם תמיכה בעברית
 # שימוש ב-UTF-8 לקובץ הלוג
@@ -72,6 +74,13 @@ def main() -> None:
         register_tools(TOOL_HANDLERS)
         logger.info("WooCommerce tools registered")
         
+        # רשום את מסכם השיחות, שמקפל ברקע את החלק הישן בשיחות ארוכות
+        conversation_memory.set_summarizer(summarize_conversation)
+        
+        # שחזור המטמונים מתמונת המצב האחרונה, כדי שהמשתמשים הראשונים לא ימתינו לחנות
+        if CACHE_ENABLED and CACHE_SNAPSHOT_ENABLED:
+            restore_snapshot()
+        
         # הפעל את בוט הטלגרם
         run_bot()
     except KeyboardInterrupt:
@@ -79,6 +88,10 @@ def main() -> None:
     except Exception as e:
         logger.error(f"Error starting the bot: {e}")
     finally:
+        # שמירת המטמונים לקראת ההפעלה הבאה
+        if CACHE_ENABLED and CACHE_SNAPSHOT_ENABLED:
+            save_snapshot()
+        
         # סגירת מסד הנתונים ועצירת המתזמן
         if DB_ENABLED:
             logger.info("Stopping database scheduler")
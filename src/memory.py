@@ -3,19 +3,30 @@
 מאפשר שמירת היסטוריית שיחות לפי מזהה משתמש והעברתה לסוכן ה-AI.
 """
 
+import asyncio
 import logging
 import time
 import uuid
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Callable, Awaitable, Set
 from dataclasses import dataclass
 import datetime
 
-from src.config import MEMORY_MAX_MESSAGES, MEMORY_CONTEXT_LIMIT, DB_ENABLED
+from src.config import (
+    MEMORY_MAX_MESSAGES, MEMORY_CONTEXT_LIMIT, DB_ENABLED,
+    MEMORY_SUMMARY_ENABLED, MEMORY_SUMMARY_KEEP_RECENT, MEMORY_SUMMARY_TRIGGER_TOKENS
+)
 from src.database.repository import (
     save_conversation_message,
     get_conversation_history,
-    clear_conversation_history
+    clear_conversation_history,
+    get_conversation_summary,
+    save_conversation_summary,
+    clear_conversation_summary
 )
+from src.openai.context import count_tokens
+
+# פונקציה שמקבלת סיכום קודם (או None) והודעות חדשות, ומחזירה סיכום מעודכן
+Summarizer = Callable[[Optional[str], List[Dict[str, str]]], Awaitable[str]]
 
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
@@ -75,6 +86,14 @@ class ConversationMemory:
         """
         self.conversations: Dict[int, List[Message]] = {}  # מילון של שיחות לפי מזהה משתמש (זיכרון מקומי)
         self.max_messages = max_messages
+        # סיכום החלק הישן בשיחה לפי מזהה משתמש: טקסט הסיכום ומזהה ההודעה האחרונה שנכללה בו
+        self.summaries: Dict[int, Optional[Dict[str, str]]] = {}
+        self._summarizer: Optional[Summarizer] = None
+        self._compacting: Set[int] = set()
+        self._compaction_tasks: Set[asyncio.Task] = set()
+        # גרסת השיחה לכל משתמש - מתקדמת בניקוי, כדי שסיכום שהסתיים אחרי ניקוי לא יישמר
+        self._generations: Dict[int, int] = {}
+        self._compaction_stats = {"compactions": 0, "summarized_messages": 0, "summarized_tokens": 0, "failures": 0}
         logger.info(f"ConversationMemory initialized with max_messages={max_messages}")
     
     def add_message(self, user_id: int, role: str, content: str) -> None:
@@ -109,6 +128,10 @@ class ConversationMemory:
             )
         
         logger.debug(f"Added message for user {user_id}, role: {role}, content length: {len(content)}")
+        
+        # בדיקת הצורך בסיכום נעשית ברקע אחרי כל תשובה, כך שהבקשה עצמה לא ממתינה לה
+        if role == "assistant":
+            self._schedule_compaction(user_id)
     
     def get_conversation(self, user_id: int, limit: Optional[int] = None) -> List[Message]:
         """
@@ -154,7 +177,106 @@ class ConversationMemory:
             רשימת מילונים המייצגים את ההודעות בפורמט המתאים לסוכן.
         """
         conversation = self.get_conversation(user_id, limit or MEMORY_CONTEXT_LIMIT)
-        return [message.to_dict() for message in conversation]
+        if not MEMORY_SUMMARY_ENABLED:
+            return [message.to_dict() for message in conversation]
+        
+        # ההודעות שכבר סוכמו מוחלפות בסיכום, שמופיע בראש הרשימה
+        state = self._get_summary_state(user_id)
+        items = [message.to_dict() for message in self._unsummarized(conversation, state)]
+        if state:
+            items.insert(0, {"role": "system", "content": f"סיכום החלק הקודם בשיחה:\n{state['summary']}"})
+        return items
+    
+    def set_summarizer(self, summarizer: Summarizer) -> None:
+        """
+        רישום הפונקציה שמסכמת את החלק הישן בשיחה.
+        
+        Args:
+            summarizer: פונקציה אסינכרונית שמקבלת סיכום קודם והודעות חדשות ומחזירה סיכום מעודכן.
+        """
+        self._summarizer = summarizer
+    
+    def get_summary(self, user_id: int) -> Optional[str]:
+        """
+        קבלת הסיכום של החלק הישן בשיחת המשתמש.
+        
+        Args:
+            user_id: מזהה המשתמש.
+            
+        Returns:
+            טקסט הסיכום, או None אם השיחה עוד לא סוכמה.
+        """
+        state = self._get_summary_state(user_id)
+        return state["summary"] if state else None
+    
+    def _get_summary_state(self, user_id: int) -> Optional[Dict[str, str]]:
+        """טעינת הסיכום מהזיכרון המקומי, או פעם אחת ממסד הנתונים."""
+        if user_id not in self.summaries:
+            self.summaries[user_id] = get_conversation_summary(str(user_id)) if DB_ENABLED else None
+        return self.summaries[user_id]
+    
+    @staticmethod
+    def _unsummarized(conversation: List[Message], state: Optional[Dict[str, str]]) -> List[Message]:
+        """
+        ההודעות שאחרי ההודעה האחרונה שנכללה בסיכום.
+        אם ההודעה הזו כבר לא בחלון ההיסטוריה, כל ההודעות בחלון חדשות ממנה.
+        """
+        if not state:
+            return conversation
+        for index, message in enumerate(conversation):
+            if message.message_id == state["last_message_id"]:
+                return conversation[index + 1:]
+        return conversation
+    
+    def _schedule_compaction(self, user_id: int) -> None:
+        """מתזמן סיכום ברקע למשתמש, אם אין כבר סיכום שרץ עבורו."""
+        if not MEMORY_SUMMARY_ENABLED or self._summarizer is None or user_id in self._compacting:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._compacting.add(user_id)
+        task = loop.create_task(self._compact(user_id))
+        self._compaction_tasks.add(task)
+        task.add_done_callback(self._compaction_tasks.discard)
+    
+    async def _compact(self, user_id: int) -> None:
+        """
+        מקפל לסיכום את ההודעות הישנות שלא סוכמו, כשהן עוברות את סף הטוקנים.
+        ההודעות האחרונות נשארות מחוץ לסיכום ונשלחות לסוכן במלואן.
+        """
+        generation = self._generations.get(user_id, 0)
+        try:
+            conversation = await asyncio.to_thread(self.get_conversation, user_id, self.max_messages)
+            state = await asyncio.to_thread(self._get_summary_state, user_id)
+            pending = self._unsummarized(conversation, state)
+            older = pending[:-MEMORY_SUMMARY_KEEP_RECENT] if MEMORY_SUMMARY_KEEP_RECENT > 0 else pending
+            tokens = sum(count_tokens(message.content) for message in older)
+            if not older or tokens < MEMORY_SUMMARY_TRIGGER_TOKENS:
+                return
+            
+            started = time.perf_counter()
+            summary = await self._summarizer(state["summary"] if state else None, [message.to_dict() for message in older])
+            if not summary or self._generations.get(user_id, 0) != generation:
+                # השיחה נוקתה בזמן הסיכום
+                return
+            
+            new_state = {"summary": summary, "last_message_id": older[-1].message_id}
+            self.summaries[user_id] = new_state
+            if DB_ENABLED:
+                await asyncio.to_thread(save_conversation_summary, str(user_id), summary, new_state["last_message_id"])
+            
+            self._compaction_stats["compactions"] += 1
+            self._compaction_stats["summarized_messages"] += len(older)
+            self._compaction_stats["summarized_tokens"] += tokens
+            logger.info(f"Summarized {len(older)} messages ({tokens} tokens) for user {user_id} into "
+                        f"{count_tokens(summary)} tokens in {time.perf_counter() - started:.2f} seconds")
+        except Exception as e:
+            self._compaction_stats["failures"] += 1
+            logger.error(f"Error summarizing conversation for user {user_id}: {str(e)}")
+        finally:
+            self._compacting.discard(user_id)
     
     def clear_conversation(self, user_id: int) -> None:
         """
@@ -166,10 +288,13 @@ class ConversationMemory:
         # ניקוי הזיכרון המקומי
         if user_id in self.conversations:
             self.conversations[user_id] = []
+        self.summaries[user_id] = None
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
         
         # ניקוי מסד הנתונים אם הוא מופעל
         if DB_ENABLED:
             clear_conversation_history(str(user_id))
+            clear_conversation_summary(str(user_id))
         
         logger.info(f"Cleared conversation history for user {user_id}")
     
@@ -189,7 +314,9 @@ class ConversationMemory:
             "total_messages": total_messages,
             "avg_messages_per_user": avg_messages_per_user,
             "max_messages_per_user": self.max_messages,
-            "db_enabled": DB_ENABLED
+            "db_enabled": DB_ENABLED,
+            "summaries": sum(1 for state in self.summaries.values() if state),
+            **self._compaction_stats
         }
         
         return stats
@@ -6,11 +6,18 @@ import logging
 import json
 import os
 import asyncio
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Awaitable, Union, Tuple
 
 from agents import Agent, Runner, function_tool, RunConfig, ModelSettings
+from openai.types.responses import ResponseCreatedEvent, ResponseTextDeltaEvent
+from pydantic import BaseModel
 
-from src.config import OPENAI_API_KEY, OPENAI_MODEL, ASSISTANT_INSTRUCTIONS, MEMORY_ENABLED, DB_ENABLED
+from src.config import (OPENAI_API_KEY, OPENAI_MODEL, ASSISTANT_INSTRUCTIONS, MEMORY_ENABLED, DB_ENABLED, STREAM_RESPONSES_ENABLED,
+                        MEMORY_SUMMARY_MODEL, MEMORY_SUMMARY_MAX_CHARS, SEMANTIC_CACHE_ENABLED)
+from src.openai.context import build_input_items
+from src.openai.matcher import PhraseMatcher, SubstringIndex
+from src.openai.semantic_cache import semantic_cache
+from src.woocommerce.versions import get_data_versions
 
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
@@ -21,6 +28,18 @@ tool_handlers_registry: Dict[str, Callable] = {}
 # סוכן OpenAI - יאותחל בפונקציה create_or_get_agent
 agent = None
 
+# סוכן לסיכום שיחות ארוכות - יאותחל בפונקציה summarize_conversation
+summary_agent = None
+
+SUMMARY_INSTRUCTIONS = """
+אתה מסכם שיחות בין מנהל חנות WooCommerce לבין עוזר וירטואלי.
+תקבל סיכום קודם (אם יש) והודעות חדשות, ועליך להחזיר סיכום מעודכן אחד בעברית.
+שמור על כל מה שנדרש להמשך השיחה: מזהים ושמות של מוצרים, הזמנות וקטגוריות, מחירים וכמויות,
+פעולות שבוצעו בחנות, החלטות ובקשות פתוחות של המשתמש.
+אל תעתיק רשימות ארוכות או פלט גולמי של כלים - סכם אותם במשפט.
+כתוב בנקודות קצרות, בלי הקדמה, ולא יותר מ-200 מילים.
+"""
+
 # מילון של תשובות מוכנות מראש לשאלות פשוטות
 SIMPLE_RESPONSES = {
     # ברכות בסיסיות
@@ -63,6 +82,47 @@ KEYWORD_RESPONSES = {
 # מטמון תשובות לשאלות קודמות
 response_cache = {}
 
+# טבלאות התשובות המוכנות מקומפלות לאוטומטים - יאותחלו בפונקציה compile_canned_responses
+_canned_phrases: List[Tuple[str, str]] = []
+_phrase_matcher = PhraseMatcher([])
+_question_index = SubstringIndex([])
+
+def compile_canned_responses() -> None:
+    """
+    מקמפל את מילות המפתח והשאלות הנפוצות לאוטומטים שסורקים כל הודעה במעבר אחד.
+    נקרא בטעינת המודול, וצריך לקרוא לו שוב אחרי שינוי של SIMPLE_RESPONSES או KEYWORD_RESPONSES.
+    """
+    global _canned_phrases, _phrase_matcher, _question_index
+    # בשוויון באורך ובמיקום, מילות מפתח קודמות לשאלות - כמו בסדר הבדיקה הקודם
+    _canned_phrases = list(KEYWORD_RESPONSES.items()) + list(SIMPLE_RESPONSES.items())
+    _phrase_matcher = PhraseMatcher([phrase for phrase, _ in _canned_phrases])
+    _question_index = SubstringIndex(list(SIMPLE_RESPONSES))
+
+compile_canned_responses()
+
+class NewProduct(BaseModel):
+    """
+    מוצר ליצירה בכלי batch
+    """
+    name: str
+    regular_price: str
+    description: Optional[str] = None
+    sale_price: Optional[str] = None
+    sku: Optional[str] = None
+    category_ids: Optional[List[int]] = None
+
+class ProductChanges(BaseModel):
+    """
+    עדכון למוצר קיים בכלי batch
+    """
+    id: int
+    name: Optional[str] = None
+    regular_price: Optional[str] = None
+    sale_price: Optional[str] = None
+    description: Optional[str] = None
+    stock_quantity: Optional[int] = None
+    category_ids: Optional[List[int]] = None
+
 def create_or_get_agent() -> Agent:
     """
     יוצר סוכן OpenAI חדש או מחזיר סוכן קיים
@@ -94,7 +154,7 @@ def create_or_get_agent() -> Agent:
             try:
                 handler = tool_handlers_registry.get("get_products_tool")
                 if handler:
-                    return handler()
+                    return await handler()
                 else:
                     logger.error("Handler for get_products_tool not found")
                     return {"error": "Handler not found"}
@@ -111,7 +171,7 @@ def create_or_get_agent() -> Agent:
             try:
                 handler = tool_handlers_registry.get("get_categories_tool")
                 if handler:
-                    return handler()
+                    return await handler()
                 else:
                     logger.error("Handler for get_categories_tool not found")
                     return {"error": "Handler not found"}
@@ -128,7 +188,7 @@ def create_or_get_agent() -> Agent:
             try:
                 handler = tool_handlers_registry.get("get_orders_tool")
                 if handler:
-                    return handler()
+                    return await handler()
                 else:
                     logger.error("Handler for get_orders_tool not found")
                     return {"error": "Handler not found"}
@@ -136,6 +196,195 @@ def create_or_get_agent() -> Agent:
                 logger.error(f"Error in get_orders_tool: {str(e)}")
                 return {"error": str(e)}
         
+        # הגדרת פונקציה עוטפת לקבלת כמה מוצרים לפי מזהים
+        @function_tool
+        async def get_products_by_ids_tool(ids: List[int]) -> Dict[str, Any]:
+            """
+            מחזיר כמה מוצרים לפי מזהים בבקשה אחת - עדיף על פני קריאות נפרדות לכל מוצר
+            
+            Args:
+                ids: מזהי המוצרים
+            """
+            try:
+                handler = tool_handlers_registry.get("get_products_by_ids_tool")
+                if handler:
+                    return await handler(ids=ids)
+                else:
+                    logger.error("Handler for get_products_by_ids_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in get_products_by_ids_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת לקבלת כמה הזמנות לפי מזהים
+        @function_tool
+        async def get_orders_by_ids_tool(ids: List[int]) -> Dict[str, Any]:
+            """
+            מחזיר כמה הזמנות לפי מזהים בבקשה אחת - עדיף על פני קריאות נפרדות לכל הזמנה
+            
+            Args:
+                ids: מזהי ההזמנות
+            """
+            try:
+                handler = tool_handlers_registry.get("get_orders_by_ids_tool")
+                if handler:
+                    return await handler(ids=ids)
+                else:
+                    logger.error("Handler for get_orders_by_ids_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in get_orders_by_ids_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת לשאילתת הזמנות מסוננת
+        @function_tool
+        async def query_orders_tool(status: Optional[str] = None, after: Optional[str] = None, before: Optional[str] = None, customer: Optional[int] = None, search: Optional[str] = None, orderby: Optional[str] = None, order: Optional[str] = None, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+            """
+            מחזיר הזמנות לפי מסננים. עדיף על פני get_orders_tool כשמחפשים הזמנות מסוימות.
+            
+            Args:
+                status: סטטוס ההזמנה (pending, processing, on-hold, completed, cancelled, refunded, failed), או כמה סטטוסים מופרדים בפסיקים
+                after: רק הזמנות שנוצרו אחרי התאריך (YYYY-MM-DD)
+                before: רק הזמנות שנוצרו לפני התאריך (YYYY-MM-DD)
+                customer: מזהה הלקוח
+                search: טקסט לחיפוש
+                orderby: שדה למיון (date, id, title)
+                order: כיוון המיון (asc או desc)
+                page: מספר הדף
+                per_page: מספר הזמנות בדף (עד 100)
+            """
+            try:
+                handler = tool_handlers_registry.get("query_orders_tool")
+                if handler:
+                    return await handler(status=status, after=after, before=before, customer=customer, search=search, orderby=orderby, order=order, page=page, per_page=per_page)
+                else:
+                    logger.error("Handler for query_orders_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in query_orders_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת לשאילתת מוצרים מסוננת
+        @function_tool
+        async def query_products_tool(search: Optional[str] = None, category: Optional[int] = None, stock_status: Optional[str] = None, status: Optional[str] = None, sku: Optional[str] = None, on_sale: Optional[bool] = None, min_price: Optional[str] = None, max_price: Optional[str] = None, orderby: Optional[str] = None, order: Optional[str] = None, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
+            """
+            מחזיר מוצרים לפי מסננים. עדיף על פני get_products_tool כשמחפשים מוצרים מסוימים.
+            
+            Args:
+                search: טקסט לחיפוש
+                category: מזהה הקטגוריה
+                stock_status: מצב המלאי (instock, outofstock, onbackorder)
+                status: סטטוס המוצר (publish, draft, pending, private)
+                sku: מק"ט
+                on_sale: רק מוצרים במבצע
+                min_price: מחיר מינימלי
+                max_price: מחיר מקסימלי
+                orderby: שדה למיון (date, id, title, price, popularity, rating)
+                order: כיוון המיון (asc או desc)
+                page: מספר הדף
+                per_page: מספר מוצרים בדף (עד 100)
+            """
+            try:
+                handler = tool_handlers_registry.get("query_products_tool")
+                if handler:
+                    return await handler(search=search, category=category, stock_status=stock_status, status=status, sku=sku, on_sale=on_sale, min_price=min_price, max_price=max_price, orderby=orderby, order=order, page=page, per_page=per_page)
+                else:
+                    logger.error("Handler for query_products_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in query_products_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת לחיפוש מוצרים
+        @function_tool
+        async def search_products_tool(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+            """
+            מחפש מוצרים לפי שם, מק"ט או קטגוריה, בעברית או באנגלית, גם עם שגיאות הקלדה.
+            השתמש בכלי זה כדי למצוא מוצר לפי שם במקום לעבור על כל רשימת המוצרים.
+            
+            Args:
+                query: טקסט החיפוש
+                limit: מספר התוצאות המקסימלי
+            """
+            try:
+                handler = tool_handlers_registry.get("search_products_tool")
+                if handler:
+                    return await handler(query=query, limit=limit)
+                else:
+                    logger.error("Handler for search_products_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in search_products_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת לדוח מכירות
+        @function_tool
+        async def sales_report_tool(start: Optional[str] = None, end: Optional[str] = None, period: Optional[str] = None) -> Dict[str, Any]:
+            """
+            מחזיר דוח מכירות מחושב: הכנסות, מספר הזמנות, ממוצע להזמנה ופילוח לפי סטטוס.
+            השתמש בכלי זה לשאלות על הכנסות ומכירות במקום לסכם הזמנות בעצמך.
+            
+            Args:
+                start: תאריך התחלה כולל (YYYY-MM-DD)
+                end: תאריך סיום לא כולל (YYYY-MM-DD)
+                period: קיבוץ לפי תקופה - day, week, month או year
+            """
+            try:
+                handler = tool_handlers_registry.get("sales_report_tool")
+                if handler:
+                    return await handler(start=start, end=end, period=period)
+                else:
+                    logger.error("Handler for sales_report_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in sales_report_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת למוצרים הנמכרים ביותר
+        @function_tool
+        async def top_products_tool(limit: int = 5, metric: str = "quantity", start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+            """
+            מחזיר את המוצרים הנמכרים ביותר לפי כמות או הכנסות
+            
+            Args:
+                limit: מספר המוצרים
+                metric: quantity (כמות) או revenue (הכנסות)
+                start: תאריך התחלה כולל (YYYY-MM-DD)
+                end: תאריך סיום לא כולל (YYYY-MM-DD)
+            """
+            try:
+                handler = tool_handlers_registry.get("top_products_tool")
+                if handler:
+                    return await handler(limit=limit, metric=metric, start=start, end=end)
+                else:
+                    logger.error("Handler for top_products_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in top_products_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת ללקוחות המובילים
+        @function_tool
+        async def top_customers_tool(limit: int = 5, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+            """
+            מחזיר את הלקוחות המובילים לפי סכום ההזמנות
+            
+            Args:
+                limit: מספר הלקוחות
+                start: תאריך התחלה כולל (YYYY-MM-DD)
+                end: תאריך סיום לא כולל (YYYY-MM-DD)
+            """
+            try:
+                handler = tool_handlers_registry.get("top_customers_tool")
+                if handler:
+                    return await handler(limit=limit, start=start, end=end)
+                else:
+                    logger.error("Handler for top_customers_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in top_customers_tool: {str(e)}")
+                return {"error": str(e)}
+        
         # הגדרת פונקציה עוטפת לקבלת מידע על החנות
         @function_tool
         async def get_store_info_tool() -> Dict[str, Any]:
@@ -145,7 +394,7 @@ def create_or_get_agent() -> Agent:
             try:
                 handler = tool_handlers_registry.get("get_store_info_tool")
                 if handler:
-                    return handler()
+                    return await handler()
                 else:
                     logger.error("Handler for get_store_info_tool not found")
                     return {"error": "Handler not found"}
@@ -168,7 +417,7 @@ def create_or_get_agent() -> Agent:
             try:
                 handler = tool_handlers_registry.get("create_product_tool")
                 if handler:
-                    return handler(name=name, regular_price=regular_price, description=description, categories=categories)
+                    return await handler(name=name, regular_price=regular_price, description=description, categories=categories)
                 else:
                     logger.error("Handler for create_product_tool not found")
                     return {"error": "Handler not found"}
@@ -192,7 +441,7 @@ def create_or_get_agent() -> Agent:
             try:
                 handler = tool_handlers_registry.get("update_product_tool")
                 if handler:
-                    return handler(id=id, name=name, regular_price=regular_price, description=description, categories=categories)
+                    return await handler(id=id, name=name, regular_price=regular_price, description=description, categories=categories)
                 else:
                     logger.error("Handler for update_product_tool not found")
                     return {"error": "Handler not found"}
@@ -212,7 +461,7 @@ def create_or_get_agent() -> Agent:
             try:
                 handler = tool_handlers_registry.get("delete_product_tool")
                 if handler:
-                    return handler(id=id)
+                    return await handler(id=id)
                 else:
                     logger.error("Handler for delete_product_tool not found")
                     return {"error": "Handler not found"}
@@ -220,15 +469,86 @@ def create_or_get_agent() -> Agent:
                 logger.error(f"Error in delete_product_tool: {str(e)}")
                 return {"error": str(e)}
         
+        # הגדרת פונקציה עוטפת ליצירת מוצרים רבים
+        @function_tool
+        async def batch_create_products_tool(products: List[NewProduct]) -> Dict[str, Any]:
+            """
+            יוצר מוצרים רבים בבת אחת - עדיף על פני קריאות נפרדות ל-create_product_tool
+            
+            Args:
+                products: המוצרים ליצירה
+            """
+            try:
+                handler = tool_handlers_registry.get("batch_create_products_tool")
+                if handler:
+                    return await handler(products=[product.model_dump() for product in products])
+                else:
+                    logger.error("Handler for batch_create_products_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in batch_create_products_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת לעדכון מוצרים רבים
+        @function_tool
+        async def batch_update_products_tool(products: List[ProductChanges]) -> Dict[str, Any]:
+            """
+            מעדכן מוצרים רבים בבת אחת (למשל שינוי מחירים) - עדיף על פני קריאות נפרדות ל-update_product_tool
+            
+            Args:
+                products: העדכונים, כל אחד עם מזהה המוצר והשדות שמשתנים
+            """
+            try:
+                handler = tool_handlers_registry.get("batch_update_products_tool")
+                if handler:
+                    return await handler(products=[product.model_dump() for product in products])
+                else:
+                    logger.error("Handler for batch_update_products_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in batch_update_products_tool: {str(e)}")
+                return {"error": str(e)}
+        
+        # הגדרת פונקציה עוטפת למחיקת מוצרים רבים
+        @function_tool
+        async def batch_delete_products_tool(ids: List[int]) -> Dict[str, Any]:
+            """
+            מוחק מוצרים רבים בבת אחת
+            
+            Args:
+                ids: מזהי המוצרים למחיקה
+            """
+            try:
+                handler = tool_handlers_registry.get("batch_delete_products_tool")
+                if handler:
+                    return await handler(ids=ids)
+                else:
+                    logger.error("Handler for batch_delete_products_tool not found")
+                    return {"error": "Handler not found"}
+            except Exception as e:
+                logger.error(f"Error in batch_delete_products_tool: {str(e)}")
+                return {"error": str(e)}
+        
         # הוספת כל הכלים לרשימה
         tools = [
             get_products_tool,
             get_categories_tool,
             get_orders_tool,
+            get_products_by_ids_tool,
+            get_orders_by_ids_tool,
+            query_orders_tool,
+            query_products_tool,
+            search_products_tool,
+            sales_report_tool,
+            top_products_tool,
+            top_customers_tool,
             get_store_info_tool,
             create_product_tool,
             update_product_tool,
-            delete_product_tool
+            delete_product_tool,
+            batch_create_products_tool,
+            batch_update_products_tool,
+            batch_delete_products_tool
         ]
         
         # יצירת הגדרות מודל באמצעות ModelSettings
@@ -286,18 +606,20 @@ def is_simple_question(message: str) -> Optional[str]:
         logger.info(f"Found cached response for: '{clean_message}'")
         return response_cache[clean_message]
     
-    # בדוק אם ההודעה מכילה מילות מפתח
-    for keyword, response in KEYWORD_RESPONSES.items():
-        if keyword in clean_message:
-            logger.info(f"Identified keyword '{keyword}' in message: '{clean_message}'")
-            # שמור את התשובה במטמון
-            response_cache[clean_message] = response
-            return response
+    # בדוק במעבר אחד אם ההודעה מכילה מילת מפתח או שאלה נפוצה - הביטוי הארוך ביותר קובע
+    index = _phrase_matcher.best_match(clean_message)
+    if index is not None:
+        phrase, response = _canned_phrases[index]
+        logger.info(f"Identified canned phrase '{phrase}' in message: '{clean_message}'")
+        # שמור את התשובה במטמון
+        response_cache[clean_message] = response
+        return response
     
-    # בדוק אם ההודעה דומה לשאלות נפוצות (בדיקה פשוטה)
-    for question in SIMPLE_RESPONSES:
-        # בדוק אם השאלה הנוכחית מכילה את השאלה מהמילון או להיפך
-        if (question in clean_message) or (len(clean_message) > 5 and clean_message in question):
+    # בדוק אם ההודעה היא חלק משאלה נפוצה
+    if len(clean_message) > 5:
+        index = _question_index.find(clean_message)
+        if index is not None:
+            question = _question_index.phrases[index]
             logger.info(f"Found similar question: '{question}' for '{clean_message}'")
             # שמור את התשובה במטמון
             response_cache[clean_message] = SIMPLE_RESPONSES[question]
@@ -305,13 +627,86 @@ def is_simple_question(message: str) -> Optional[str]:
     
     return None
 
-async def _process_message_async(message: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+async def summarize_conversation(previous_summary: Optional[str], messages: List[Dict[str, str]]) -> str:
+    """
+    מקפל הודעות ישנות בשיחה לתוך הסיכום המצטבר שלה
+    
+    Args:
+        previous_summary: הסיכום הקודם (אופציונלי)
+        messages: ההודעות החדשות לסיכום, מהישנה לחדשה
+    
+    Returns:
+        הסיכום המעודכן
+    """
+    global summary_agent
+    if summary_agent is None:
+        os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+        summary_agent = Agent(
+            name="Conversation Summarizer",
+            instructions=SUMMARY_INSTRUCTIONS,
+            model=MEMORY_SUMMARY_MODEL,
+            model_settings=ModelSettings(temperature=0)
+        )
+    
+    # הודעות ארוכות (למשל פלט של כלים שהודבק בתשובה) נחתכות לפני הסיכום
+    lines = []
+    for msg in messages:
+        role = "משתמש" if msg["role"] == "user" else "בוט"
+        content = msg["content"]
+        if len(content) > MEMORY_SUMMARY_MAX_CHARS:
+            content = content[:MEMORY_SUMMARY_MAX_CHARS] + "..."
+        lines.append(f"{role}: {content}")
+    
+    input_text = f"סיכום קודם:\n{previous_summary or 'אין'}\n\nהודעות חדשות:\n" + "\n".join(lines)
+    result = await Runner.run(summary_agent, input_text)
+    return str(result.final_output).strip()
+
+async def _run_streamed(agent: Agent, input_message: Union[str, List[Dict[str, str]]], run_config: RunConfig,
+                        on_text: Callable[[str], Awaitable[None]], start_time: float) -> Any:
+    """
+    מריץ את הסוכן בהזרמה ומעביר את הטקסט שנצבר אחרי כל קטע חדש.
+    הטקסט מתאפס בתחילת כל תשובה של המודל, כך שטקסט ביניים לפני קריאה לכלי מוחלף בתשובה הסופית.
+
+    Args:
+        agent: הסוכן
+        input_message: הקלט לסוכן - מחרוזת או רשימת הודעות
+        run_config: הגדרות ההרצה
+        on_text: פונקציה שמקבלת את הטקסט שנצבר עד כה
+        start_time: זמן תחילת העיבוד, למדידת הזמן עד הקטע הראשון
+
+    Returns:
+        תוצאת ההרצה אחרי שהסתיימה
+    """
+    loop = asyncio.get_event_loop()
+    result = Runner.run_streamed(agent, input_message, run_config=run_config)
+    text = ""
+    first_token_time = None
+    async for event in result.stream_events():
+        if event.type != "raw_response_event":
+            continue
+        if isinstance(event.data, ResponseCreatedEvent):
+            text = ""
+        elif isinstance(event.data, ResponseTextDeltaEvent) and event.data.delta:
+            if first_token_time is None:
+                first_token_time = loop.time()
+                logger.info(f"Time to first token: {first_token_time - start_time:.4f} seconds")
+            text += event.data.delta
+            try:
+                await on_text(text)
+            except Exception as e:
+                # תקלה בהצגת הטקסט לא עוצרת את יצירת התשובה
+                logger.error(f"Error delivering streamed text: {e}")
+    return result
+
+async def _process_message_async(message: str, conversation_history: Optional[List[Dict[str, str]]] = None,
+                                 on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
     """
     מעבד הודעה באופן אסינכרוני
     
     Args:
         message: הודעת המשתמש
         conversation_history: היסטוריית השיחה (אופציונלי)
+        on_text: פונקציה שמקבלת את התשובה החלקית בזמן שהיא נוצרת (אופציונלי)
     
     Returns:
         מילון עם התשובה ומזהה השרשור
@@ -361,6 +756,19 @@ async def _process_message_async(message: str, conversation_history: Optional[Li
         except Exception as e:
             logger.error(f"Error checking database cache: {str(e)}")
 
+    # בדוק אם נשאלה שאלה דומה שהתשובה שלה עדיין תקפה לנתוני החנות הנוכחיים
+    data_versions = get_data_versions()
+    if SEMANTIC_CACHE_ENABLED:
+        semantic_response = semantic_cache.lookup(clean_message, data_versions)
+        if semantic_response:
+            end_time = asyncio.get_event_loop().time()
+            logger.info(f"Semantic cache hit processing time: {end_time - start_time:.4f} seconds")
+            return {
+                "thread_id": "not_used_with_sdk",
+                "response": semantic_response,
+                "success": True
+            }
+
     try:
         # קבל או צור סוכן
         agent = create_or_get_agent()
@@ -373,27 +781,23 @@ async def _process_message_async(message: str, conversation_history: Optional[Li
                 )
             )
             
-            # שלב את היסטוריית השיחה בתוך ההודעה אם קיימת
-            input_message = message
+            # העבר את היסטוריית השיחה כהודעות עם תפקידים, בתוך תקציב הטוקנים
+            input_message: Union[str, List[Dict[str, str]]] = message
             if MEMORY_ENABLED and conversation_history and len(conversation_history) > 0:
-                logger.info(f"Adding conversation history with {len(conversation_history)} messages")
-                
-                # בנה מחרוזת היסטוריה
-                history_text = "היסטוריית שיחה:\n"
-                for msg in conversation_history:
-                    role = "משתמש" if msg["role"] == "user" else "בוט"
-                    history_text += f"{role}: {msg['content']}\n"
-                
-                # שלב את ההיסטוריה עם ההודעה הנוכחית
-                input_message = f"{history_text}\n\nהשאלה הנוכחית: {message}"
-                logger.info("Created input message with conversation history")
+                input_message, context_stats = build_input_items(message, conversation_history)
+                logger.info(f"Sending {context_stats['messages_sent']} of {context_stats['history_messages']} history messages "
+                            f"({context_stats['tokens_sent']} of {context_stats['history_tokens']} tokens, "
+                            f"{context_stats['tokens_saved']} saved)")
             
-            # הפעל את הסוכן עם ההודעה המשולבת
-            result = await Runner.run(
-                agent,
-                input_message,
-                run_config=run_config
-            )
+            # הפעל את הסוכן עם ההודעה המשולבת - בהזרמה אם התבקש עדכון תוך כדי יצירת התשובה
+            if on_text is not None and STREAM_RESPONSES_ENABLED:
+                result = await _run_streamed(agent, input_message, run_config, on_text, start_time)
+            else:
+                result = await Runner.run(
+                    agent,
+                    input_message,
+                    run_config=run_config
+                )
             
             # בדוק אם התקבלה תוצאה
             if not result:
@@ -443,6 +847,12 @@ async def _process_message_async(message: str, conversation_history: Optional[Li
                         logger.info(f"Cached response in database for: '{clean_message}'")
                     except Exception as e:
                         logger.error(f"Error caching response in database: {str(e)}")
+                
+                # שמירה במטמון הסמנטי, יחד עם גרסאות הנתונים שהתשובה נשענה עליהן
+                if SEMANTIC_CACHE_ENABLED:
+                    tool_names = [item.raw_item.name for item in getattr(result, "new_items", [])
+                                  if item.type == "tool_call_item" and hasattr(item.raw_item, "name")]
+                    semantic_cache.add(clean_message, response, tool_names, data_versions)
 
             # מדוד את זמן הסיום ורשום ללוג
             end_time = asyncio.get_event_loop().time()
@@ -470,13 +880,15 @@ async def _process_message_async(message: str, conversation_history: Optional[Li
             "success": False
         }
 
-async def process_message(message: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+async def process_message(message: str, conversation_history: Optional[List[Dict[str, str]]] = None,
+                          on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
     """
     מעבד הודעה ומחזיר תשובה מהסוכן (גרסה אסינכרונית)
     
     Args:
         message: הודעת המשתמש
         conversation_history: היסטוריית השיחה (אופציונלי)
+        on_text: פונקציה שמקבלת את התשובה החלקית בזמן שהיא נוצרת (אופציונלי)
     
     Returns:
         מילון עם התשובה ומזהה השרשור
@@ -485,7 +897,7 @@ async def process_message(message: str, conversation_history: Optional[List[Dict
     
     try:
         # קרא ישירות לפונקציה האסינכרונית
-        return await _process_message_async(message, conversation_history)
+        return await _process_message_async(message, conversation_history, on_text)
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         return {
@@ -0,0 +1,137 @@
+"""
+בניית הקלט לסוכן מהיסטוריית השיחה - הודעות עם תפקידים במקום מחרוזת אחת,
+שנבחרות מהחדשה לישנה עד שתקציב הטוקנים מתמלא
+"""
+
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+
+from src.config import OPENAI_MODEL, MEMORY_TOKEN_BUDGET
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# טוקנים שכל הודעה מוסיפה מעבר לתוכן שלה (תפקיד ומפרידים)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# קידוד הטוקנים של המודל, כשספריית tiktoken מותקנת
+_ENCODING = None
+if tiktoken is not None:
+    try:
+        _ENCODING = tiktoken.encoding_for_model(OPENAI_MODEL)
+    except KeyError:
+        _ENCODING = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # הקידוד נטען מהרשת בשימוש הראשון - בלי גישה נשתמש בהערכה
+        logger.warning(f"Could not load a tiktoken encoding, using estimated token counts: {e}")
+
+# מונים מצטברים לכל הבקשות
+_stats_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "history_messages": 0,
+    "messages_sent": 0,
+    "history_tokens": 0,
+    "tokens_sent": 0,
+    "tokens_saved": 0
+}
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """
+    סופר את הטוקנים בטקסט. בלי tiktoken מחזיר הערכה: כ-4 תווים לטוקן באנגלית
+    וכ-2 תווים לטוקן בעברית ובשאר התווים שאינם ASCII.
+
+    Args:
+        text: הטקסט
+
+    Returns:
+        מספר הטוקנים
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return max(1, round((len(text) - non_ascii) / 4 + non_ascii / 2))
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    """
+    מחזיר את מספר הטוקנים שהודעה תופסת בקלט, כולל התקורה של ההודעה
+    """
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def build_input_items(message: str, conversation_history: Optional[List[Dict[str, str]]] = None,
+                      token_budget: int = MEMORY_TOKEN_BUDGET) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """
+    בונה את רשימת הודעות הקלט לסוכן: הודעות מההיסטוריה מהחדשה לישנה כל עוד הן נכנסות בתקציב,
+    ואחריהן ההודעה הנוכחית. הבחירה נעצרת בהודעה הראשונה שלא נכנסת, כך שלא נוצרים פערים בשיחה.
+    סיכום השיחה, אם הוא מופיע בראש ההיסטוריה, נשלח תמיד.
+
+    Args:
+        message: הודעת המשתמש הנוכחית
+        conversation_history: היסטוריית השיחה מהישנה לחדשה (אופציונלי)
+        token_budget: מספר הטוקנים המקסימלי להיסטוריה (0 או פחות - כל ההיסטוריה)
+
+    Returns:
+        טאפל של רשימת ההודעות ושל נתוני הטוקנים של הבקשה
+    """
+    history = list(conversation_history or [])
+    # הבוט שומר את ההודעה הנוכחית בזיכרון לפני שהוא קורא את ההיסטוריה
+    if history and history[-1]["role"] == "user" and history[-1]["content"] == message:
+        history.pop()
+
+    # הודעות מערכת בראש ההיסטוריה (סיכום החלק הקודם בשיחה) נשלחות תמיד ונספרות ראשונות בתקציב
+    pinned: List[Dict[str, str]] = []
+    while history and history[0]["role"] == "system":
+        pinned.append(history.pop(0))
+
+    history_tokens = sum(message_tokens(item) for item in pinned + history)
+    selected: List[Dict[str, str]] = []
+    used = sum(message_tokens(item) for item in pinned)
+    for item in reversed(history):
+        tokens = message_tokens(item)
+        if token_budget > 0 and used + tokens > token_budget:
+            break
+        selected.append({"role": item["role"], "content": item["content"]})
+        used += tokens
+    selected.reverse()
+
+    items = pinned + selected + [{"role": "user", "content": message}]
+    stats = {
+        "history_messages": len(pinned) + len(history),
+        "messages_sent": len(pinned) + len(selected),
+        "history_tokens": history_tokens,
+        "tokens_sent": used,
+        "tokens_saved": history_tokens - used,
+        "message_tokens": message_tokens(items[-1])
+    }
+    with _stats_lock:
+        _stats["requests"] += 1
+        for key in ("history_messages", "messages_sent", "history_tokens", "tokens_sent", "tokens_saved"):
+            _stats[key] += stats[key]
+    return items, stats
+
+
+def get_context_stats() -> Dict[str, Any]:
+    """
+    מחזיר סטטיסטיקות מצטברות על הקלט שנשלח לסוכן
+
+    Returns:
+        מילון עם הסטטיסטיקות
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["token_counter"] = "tiktoken" if _ENCODING is not None else "estimate"
+    stats["token_budget"] = MEMORY_TOKEN_BUDGET
+    return stats
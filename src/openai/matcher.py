@@ -0,0 +1,158 @@
+"""
+התאמת ביטויים מהירה לזיהוי שאלות עם תשובה מוכנה.
+טבלת הביטויים מקומפלת פעם אחת, וכל הודעה נסרקת במעבר אחד - בלי קשר למספר הביטויים.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class PhraseMatcher:
+    """
+    אוטומט Aho-Corasick שמוצא בהודעה את הביטוי המתאים ביותר מתוך רשימה.
+    עדיפות קבועה: הביטוי הארוך ביותר, אחריו המופיע ראשון בהודעה, ואחריו הקודם ברשימה.
+    """
+
+    def __init__(self, phrases: Sequence[str]):
+        """
+        Args:
+            phrases: הביטויים לפי סדר העדיפות שלהם
+        """
+        self.phrases = list(phrases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # הביטוי הארוך ביותר שמסתיים במצב (כולל דרך קישורי הכישלון), כמזהה ברשימה
+        self._output: List[Optional[int]] = [None]
+
+        for index, phrase in enumerate(self.phrases):
+            if not phrase:
+                continue
+            state = 0
+            for char in phrase:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(None)
+                state = next_state
+            # ביטוי שמופיע פעמיים שייך למופע הראשון שלו
+            if self._output[state] is None:
+                self._output[state] = index
+
+        # קישורי כישלון לפי רוחב - כל מצב מקבל את הביטוי הארוך ביותר שמסתיים בו
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+    def best_match(self, text: str) -> Optional[int]:
+        """
+        מוצא את הביטוי המתאים ביותר שמופיע בטקסט
+
+        Args:
+            text: הטקסט לסריקה
+
+        Returns:
+            מיקום הביטוי ברשימה, או None אם אף ביטוי לא מופיע
+        """
+        best: Optional[Tuple[int, int, int]] = None
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            index = self._output[state]
+            if index is not None:
+                length = len(self.phrases[index])
+                key = (-length, position - length + 1, index)
+                if best is None or key < best:
+                    best = key
+        return best[2] if best is not None else None
+
+
+class SubstringIndex:
+    """
+    אוטומט סיומות על כל הביטויים, שבודק אם טקסט הוא חלק מאחד מהם במעבר אחד על הטקסט.
+    הביטויים משורשרים עם מפריד לפי סדרם, כך שהמופע הראשון של תת-מחרוזת שייך לביטוי הקודם ברשימה.
+    """
+
+    SEPARATOR = "\x00"
+
+    def __init__(self, phrases: Sequence[str]):
+        """
+        Args:
+            phrases: הביטויים לפי סדר העדיפות שלהם
+        """
+        self.phrases = list(phrases)
+        self._next: List[Dict[str, int]] = [{}]
+        self._link: List[int] = [-1]
+        self._length: List[int] = [0]
+        self._first_end: List[int] = [-1]  # סוף המופע הראשון של המחרוזות במצב
+        self._ends: List[int] = []  # מיקום הסוף של כל ביטוי בשרשור
+
+        text = ""
+        for phrase in self.phrases:
+            text += phrase
+            self._ends.append(len(text) - 1)
+            text += self.SEPARATOR
+
+        last = 0
+        for position, char in enumerate(text):
+            last = self._extend(last, char, position)
+
+    def _new_state(self, length: int, link: int, first_end: int, transitions: Dict[str, int]) -> int:
+        self._next.append(transitions)
+        self._link.append(link)
+        self._length.append(length)
+        self._first_end.append(first_end)
+        return len(self._next) - 1
+
+    def _extend(self, last: int, char: str, position: int) -> int:
+        current = self._new_state(self._length[last] + 1, 0, position, {})
+        state = last
+        while state != -1 and char not in self._next[state]:
+            self._next[state][char] = current
+            state = self._link[state]
+        if state == -1:
+            return current
+
+        target = self._next[state][char]
+        if self._length[state] + 1 == self._length[target]:
+            self._link[current] = target
+            return current
+
+        clone = self._new_state(self._length[state] + 1, self._link[target], self._first_end[target],
+                                dict(self._next[target]))
+        while state != -1 and self._next[state].get(char) == target:
+            self._next[state][char] = clone
+            state = self._link[state]
+        self._link[target] = clone
+        self._link[current] = clone
+        return current
+
+    def find(self, text: str) -> Optional[int]:
+        """
+        מוצא את הביטוי הראשון ברשימה שמכיל את הטקסט
+
+        Args:
+            text: הטקסט לחיפוש
+
+        Returns:
+            מיקום הביטוי ברשימה, או None אם הטקסט אינו חלק מאף ביטוי
+        """
+        if not text or self.SEPARATOR in text:
+            return None
+        state = 0
+        for char in text:
+            state = self._next[state].get(char)
+            if state is None:
+                return None
+        return bisect_left(self._ends, self._first_end[state])
@@ -0,0 +1,333 @@
+"""
+מטמון תשובות סמנטי - שאלה דומה מספיק לשאלה שכבר נענתה מקבלת את אותה תשובה.
+כל שאלה מיוצגת כווקטור של n-grams של תווים (hashing, בלי מודל ובלי רשת), והחיפוש הוא דמיון קוסינוס ב-NumPy.
+תשובה מוגשת רק לשאלה עם אותם מספרים ואותן מילות שלילה, זמן וסטטוס, ורק אם הנתונים שעליהם
+היא נשענה (מוצרים, הזמנות) לא השתנו מאז שנשמרה.
+"""
+
+import logging
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Any, Optional, Iterable, Set
+
+import numpy as np
+
+from src.config import (
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_DIM
+)
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# אורכי ה-n-grams של התווים שמרכיבים את הווקטור (בנוסף למילים השלמות)
+NGRAM_SIZES = (3, 4)
+
+# מילים שלא משנות את משמעות השאלה ("הצג לי את המוצרים בחנות" = "המוצרים")
+FILLER_WORDS = frozenset({
+    "בחנות", "שלי", "לי", "את", "בבקשה", "הצג", "תציג", "תראה", "הראה",
+    "please", "show", "me", "my", "the"
+})
+
+# סוגי הנתונים שכל כלי קורא, כשאי אפשר להסיק אותם מהשם
+TOOL_DATA_KINDS: Dict[str, Set[str]] = {
+    "sales_report_tool": {"orders"},
+    "top_customers_tool": {"orders"},
+    "top_products_tool": {"orders", "products"}
+}
+
+# כלים שמשנים את החנות - תשובה שלהם לא נשמרת במטמון
+WRITE_TOOL_PREFIXES = ("create_", "update_", "delete_", "batch_")
+
+ALL_DATA_KINDS = frozenset({"products", "orders"})
+
+# מילים שהופכות או מצמצמות את משמעות השאלה (שלילה, טווח זמן, סטטוס) - שאלות דומות שנבדלות
+# באחת מהן הן שאלות שונות, גם כשהדמיון ביניהן גבוה ("מוצרים במבצע" מול "מוצרים שלא במבצע")
+GUARD_WORDS = frozenset({
+    # שלילה
+    "לא", "אין", "בלי", "ללא", "אינם", "אינה", "אינו",
+    "not", "no", "without", "non", "never", "dont", "isnt", "arent",
+    # טווחי זמן
+    "היום", "אתמול", "מחר", "שבוע", "השבוע", "חודש", "החודש", "שנה", "השנה", "אחרון", "האחרון",
+    "האחרונה", "האחרונים", "האחרונות", "קודם", "הקודם", "הקודמת", "עכשיו", "כרגע",
+    "today", "yesterday", "tomorrow", "week", "month", "year", "last", "previous", "this", "now", "current",
+    # סטטוסים של הזמנות ומוצרים
+    "ממתינה", "ממתינות", "בטיפול", "בהמתנה", "הושלמה", "הושלמו", "בוטלה", "בוטלו", "הוחזרה", "הוחזרו",
+    "נכשלה", "נכשלו", "טיוטה", "טיוטות", "פורסם", "פורסמו", "מבצע", "מלאי", "אזל", "אזלו",
+    "pending", "processing", "hold", "completed", "cancelled", "canceled", "refunded", "failed",
+    "draft", "publish", "published", "private", "trash", "sale", "stock", "instock", "outofstock", "backorder"
+})
+
+# אותיות יחס וחיבור שמוצמדות למילה בעברית ("שלא", "במבצע", "והחודש")
+HEBREW_PREFIXES = "והשבלכמ"
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_NUMBER = re.compile(r"\d+")
+
+
+def normalize_query(text: str) -> str:
+    """
+    מנרמל שאלה להשוואה: אותיות קטנות, בלי סימני פיסוק ובלי מילות מילוי
+    """
+    words = _NON_WORD.sub(" ", text.lower()).split()
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+def guard_words(text: str) -> List[str]:
+    """
+    מחזיר את מילות השלילה, הזמן והסטטוס שבשאלה מנורמלת, כדי ששאלה תתאים רק לשאלה עם אותן מילים
+
+    Args:
+        text: שאלה מנורמלת
+
+    Returns:
+        רשימה ממוינת של המילים (בלי אותיות היחס שהוצמדו להן)
+    """
+    found = []
+    for word in text.split():
+        # עד שתי אותיות יחס בתחילת המילה, כל עוד נשארת מילה של שתי אותיות לפחות
+        for start in range(3):
+            candidate = word[start:]
+            if candidate in GUARD_WORDS:
+                found.append(candidate)
+                break
+            if len(candidate) <= 2 or candidate[0] not in HEBREW_PREFIXES:
+                break
+    return sorted(found)
+
+
+def embed(text: str, dim: int = SEMANTIC_CACHE_DIM) -> np.ndarray:
+    """
+    ממיר שאלה מנורמלת לווקטור מנורמל: כל n-gram של תווים וכל מילה ממופים בגיבוב לממד ולסימן.
+    הגיבוב (crc32) יציב בין הפעלות, כך שווקטורים שנבנים מחדש אחרי שחזור זהים למקוריים.
+
+    Args:
+        text: שאלה מנורמלת
+        dim: מספר הממדים
+
+    Returns:
+        וקטור באורך 1 (או וקטור אפסים לשאלה ריקה)
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    padded = f" {text} "
+    features = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+    features.extend(f"w:{word}" for word in text.split())
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def tool_data_kinds(tool_names: Iterable[str]) -> Optional[Set[str]]:
+    """
+    מחזיר את סוגי הנתונים שתשובה נשענה עליהם לפי הכלים שהסוכן הפעיל
+
+    Args:
+        tool_names: שמות הכלים שהופעלו
+
+    Returns:
+        קבוצת סוגי הנתונים, או None אם הופעל כלי שמשנה את החנות (תשובה שאסור לשמור)
+    """
+    kinds: Set[str] = set()
+    for name in tool_names:
+        if name.startswith(WRITE_TOOL_PREFIXES):
+            return None
+        if name in TOOL_DATA_KINDS:
+            kinds |= TOOL_DATA_KINDS[name]
+        elif "order" in name:
+            kinds.add("orders")
+        elif "product" in name or "categor" in name:
+            kinds.add("products")
+        else:
+            # כלי שלא ידוע מה הוא קורא - התשובה תלויה בכל הנתונים
+            kinds |= ALL_DATA_KINDS
+    return kinds
+
+
+class SemanticCache:
+    """
+    מטמון תשובות עם חיפוש לפי דמיון. הווקטורים שמורים במטריצה אחת, כך שחיפוש הוא מכפלה אחת ב-NumPy.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: float = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        dim: int = SEMANTIC_CACHE_DIM
+    ):
+        """
+        Args:
+            threshold: דמיון מינימלי להגשת תשובה
+            ttl: זמן חיים מקסימלי של תשובה בשניות
+            max_entries: מספר תשובות מקסימלי (הישנה ביותר מפנה מקום)
+            dim: מספר הממדים בווקטור
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._entries: List[Dict[str, Any]] = []  # שורה i במטריצה שייכת לרשומה i
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "stores": 0, "evictions": 0}
+
+    def _remove(self, index: int) -> None:
+        # הרשומה האחרונה עוברת למקום שהתפנה
+        last = len(self._entries) - 1
+        if index != last:
+            self._vectors[index] = self._vectors[last]
+            self._entries[index] = self._entries[last]
+        self._entries.pop()
+
+    def _is_valid(self, entry: Dict[str, Any], versions: Dict[str, int], now: float) -> bool:
+        if now - entry["created_at"] > self.ttl:
+            return False
+        return all(versions.get(kind) == version for kind, version in entry["versions"].items())
+
+    def lookup(self, query: str, versions: Dict[str, int]) -> Optional[str]:
+        """
+        מחפש תשובה לשאלה דומה
+
+        Args:
+            query: השאלה
+            versions: גרסאות הנתונים הנוכחיות של החנות
+
+        Returns:
+            התשובה השמורה, או None אם אין שאלה דומה עם תשובה שעדיין תקפה
+        """
+        text = normalize_query(query)
+        if not text:
+            return None
+        vector = embed(text, self.dim)
+        numbers = _NUMBER.findall(text)
+        guards = guard_words(text)
+        now = time.time()
+
+        with self._lock:
+            count = len(self._entries)
+            if count:
+                similarities = self._vectors[:count] @ vector
+                candidates = np.flatnonzero(similarities >= self.threshold)
+                stale = []
+                for index in candidates[np.argsort(-similarities[candidates])]:
+                    entry = self._entries[index]
+                    # שאלות שנבדלות רק במספר (מזהה הזמנה, כמות) או בשלילה, בזמן או בסטטוס הן שאלות שונות
+                    if entry["numbers"] != numbers or entry["guards"] != guards:
+                        continue
+                    if not self._is_valid(entry, versions, now):
+                        stale.append(index)
+                        continue
+                    self._stats["hits"] += 1
+                    self._stats["stale"] += len(stale)
+                    for stale_index in sorted(stale, reverse=True):
+                        self._remove(stale_index)
+                    logger.info(f"Semantic cache hit ({similarities[index]:.3f}) for '{query}' "
+                                f"matching '{entry['query']}'")
+                    return entry["response"]
+                # תשובות שהנתונים שלהן השתנו לא יוגשו יותר
+                self._stats["stale"] += len(stale)
+                for stale_index in sorted(stale, reverse=True):
+                    self._remove(stale_index)
+            self._stats["misses"] += 1
+        return None
+
+    def add(self, query: str, response: str, tool_names: Iterable[str], versions: Dict[str, int]) -> bool:
+        """
+        שומר תשובה לשאלה
+
+        Args:
+            query: השאלה
+            response: התשובה
+            tool_names: שמות הכלים שהסוכן הפעיל כדי לענות
+            versions: גרסאות הנתונים מתחילת העיבוד - שינוי שקרה בזמן העיבוד יבטל את התשובה
+
+        Returns:
+            האם התשובה נשמרה
+        """
+        text = normalize_query(query)
+        kinds = tool_data_kinds(tool_names)
+        if not text or kinds is None:
+            return False
+        entry = {
+            "query": text,
+            "numbers": _NUMBER.findall(text),
+            "guards": guard_words(text),
+            "response": response,
+            "versions": {kind: versions.get(kind, 0) for kind in kinds},
+            "created_at": time.time()
+        }
+        self._insert(entry, embed(text, self.dim))
+        return True
+
+    def _insert(self, entry: Dict[str, Any], vector: np.ndarray) -> None:
+        with self._lock:
+            # שאלה זהה מחליפה את התשובה הקודמת
+            for index, existing in enumerate(self._entries):
+                if existing["query"] == entry["query"]:
+                    self._remove(index)
+                    break
+            if len(self._entries) >= self.max_entries:
+                oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["created_at"])
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+            self._vectors[len(self._entries)] = vector
+            self._entries.append(entry)
+            self._stats["stores"] += 1
+
+    def clear(self) -> None:
+        """
+        מוחק את כל התשובות
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def export(self) -> List[Dict[str, Any]]:
+        """
+        מחזיר את הרשומות כמבנים פשוטים לשמירה (בלי הווקטורים, שנבנים מחדש בשחזור)
+        """
+        with self._lock:
+            return [dict(entry) for entry in self._entries]
+
+    def restore(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        משחזר רשומות שנשמרו, בלי רשומות שזמן החיים שלהן עבר
+
+        Returns:
+            מספר הרשומות ששוחזרו
+        """
+        now = time.time()
+        restored = 0
+        for entry in sorted(entries, key=lambda e: e["created_at"]):
+            if now - entry["created_at"] > self.ttl:
+                continue
+            entry = dict(entry)
+            # תמונות מצב ישנות נשמרו לפני שנוספה בדיקת מילות השלילה, הזמן והסטטוס
+            entry.setdefault("guards", guard_words(entry["query"]))
+            self._insert(entry, embed(entry["query"], self.dim))
+            restored += 1
+        return restored
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        מחזיר סטטיסטיקות על המטמון
+
+        Returns:
+            מילון עם הסטטיסטיקות
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["memory_bytes"] = self._vectors.nbytes
+        return stats
+
+
+# יצירת מופע גלובלי של המטמון הסמנטי
+semantic_cache = SemanticCache()
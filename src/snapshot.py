@@ -0,0 +1,157 @@
+"""
+תמונת מצב של המטמונים בדיסק - שחזור בעליית הבוט ושמירה תקופתית ובסגירה,
+כדי שאחרי הפעלה מחדש המשתמשים הראשונים לא ישלמו את זמן הטעינה המלא
+"""
+
+import asyncio
+import io
+import logging
+import os
+import pickle
+import time
+import zlib
+from typing import Dict, Any, Optional
+
+from src.config import CACHE_ENABLED, CACHE_SNAPSHOT_ENABLED, CACHE_SNAPSHOT_PATH, CACHE_SNAPSHOT_INTERVAL
+from src.openai.agent import response_cache
+from src.openai.semantic_cache import semantic_cache
+from src.woocommerce.cache import dump_cache_entries, restore_cache_entries
+from src.woocommerce.versions import get_data_versions, restore_data_versions
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# חתימת הקובץ וגרסת הפורמט - קובץ עם חתימה אחרת לא נטען
+SNAPSHOT_MAGIC = b"WTBSNAP"
+SNAPSHOT_VERSION = 1
+
+# משימת השמירה התקופתית
+_snapshot_task: Optional[asyncio.Task] = None
+
+
+class _PlainUnpickler(pickle.Unpickler):
+    """
+    טוען רק מבנים פשוטים (מילונים, רשימות, טאפלים, מחרוזות ומספרים) - בלי מחלקות ופונקציות,
+    כך שקובץ תמונת מצב שנפגע או שונה לא יכול להריץ קוד
+    """
+
+    def find_class(self, module: str, name: str) -> Any:
+        raise pickle.UnpicklingError(f"Snapshot contains a disallowed object: {module}.{name}")
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    body = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 6)
+    return SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]) + body
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    header = len(SNAPSHOT_MAGIC) + 1
+    if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC or data[len(SNAPSHOT_MAGIC)] != SNAPSHOT_VERSION:
+        raise ValueError("Unknown cache snapshot format")
+    return _PlainUnpickler(io.BytesIO(zlib.decompress(data[header:]))).load()
+
+
+def save_snapshot(path: str = CACHE_SNAPSHOT_PATH) -> bool:
+    """
+    שומר את מטמון WooCommerce ואת מטמוני התשובות של הסוכן לקובץ.
+    הכתיבה נעשית לקובץ זמני שמחליף את הקובץ הקיים, כך שקריסה באמצע לא משאירה קובץ פגום.
+
+    Args:
+        path: נתיב הקובץ
+
+    Returns:
+        האם השמירה הצליחה
+    """
+    started = time.perf_counter()
+    try:
+        payload = {
+            "created_at": time.time(),
+            "cache": dump_cache_entries(),
+            "responses": dict(response_cache),
+            "semantic": semantic_cache.export(),
+            "data_versions": get_data_versions()
+        }
+        if not payload["cache"] and not payload["responses"] and not payload["semantic"]:
+            # לא דורסים תמונת מצב קיימת במטמון ריק, למשל כשהבוט נכשל בעלייה
+            logger.info("Cache is empty, not saving a snapshot")
+            return False
+        data = _encode(payload)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except Exception as e:
+        logger.error(f"Error saving cache snapshot to {path}: {e}")
+        return False
+
+    logger.info(f"Saved cache snapshot with {len(payload['cache'])} entries, {len(payload['responses'])} responses "
+                f"and {len(payload['semantic'])} semantic responses ({len(data)} bytes) in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return True
+
+
+def restore_snapshot(path: str = CACHE_SNAPSHOT_PATH) -> bool:
+    """
+    משחזר את המטמונים מקובץ, עם זמני התפוגה המקוריים של כל רשומה
+
+    Args:
+        path: נתיב הקובץ
+
+    Returns:
+        האם השחזור הצליח
+    """
+    if not os.path.exists(path):
+        logger.info(f"No cache snapshot found at {path}")
+        return False
+
+    try:
+        with open(path, "rb") as f:
+            payload = _decode(f.read())
+        restored = restore_cache_entries(payload["cache"])
+        response_cache.update(payload["responses"])
+        # גרסאות הנתונים משוחזרות לפני התשובות הסמנטיות, כדי שתשובות שעדיין תקפות יוגשו
+        restore_data_versions(payload.get("data_versions", {}))
+        semantic_restored = semantic_cache.restore(payload.get("semantic", []))
+    except Exception as e:
+        logger.error(f"Error restoring cache snapshot from {path}: {e}")
+        return False
+
+    age = time.time() - payload["created_at"]
+    logger.info(f"Restored {restored} of {len(payload['cache'])} cache entries, {len(payload['responses'])} "
+                f"responses and {semantic_restored} semantic responses from a snapshot taken {age:.0f} seconds ago")
+    return True
+
+
+async def _snapshot_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        # השמירה רצה ב-thread כדי שלא תעצור את לולאת האירועים
+        await asyncio.to_thread(save_snapshot)
+
+
+def start_periodic_snapshots(interval: float = CACHE_SNAPSHOT_INTERVAL) -> None:
+    """
+    מפעיל שמירה תקופתית של תמונת מצב ברקע
+
+    Args:
+        interval: מרווח בין שמירות בשניות
+    """
+    global _snapshot_task
+    if not CACHE_ENABLED or not CACHE_SNAPSHOT_ENABLED or interval <= 0 or _snapshot_task is not None:
+        return
+    _snapshot_task = asyncio.get_running_loop().create_task(_snapshot_loop(interval))
+    logger.info(f"Cache snapshots will be saved every {interval:.0f} seconds")
+
+
+async def stop_periodic_snapshots() -> None:
+    """
+    עוצר את השמירה התקופתית
+    """
+    global _snapshot_task
+    if _snapshot_task is None:
+        return
+    _snapshot_task.cancel()
+    try:
+        await _snapshot_task
+    except asyncio.CancelledError:
+        pass
+    _snapshot_task = None
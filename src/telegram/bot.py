@@ -3,10 +3,12 @@
 """
 
 import logging
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Awaitable
 import asyncio
 import time
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from telegram.constants import MessageLimit
+from telegram.error import BadRequest, RetryAfter
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -16,7 +18,8 @@ from telegram.ext import (
     filters
 )
 
-from src.config import TELEGRAM_BOT_TOKEN, DEBUG, MEMORY_ENABLED, MEMORY_CONTEXT_LIMIT
+from src.config import (TELEGRAM_BOT_TOKEN, DEBUG, MEMORY_ENABLED, MEMORY_CONTEXT_LIMIT, MEMORY_MAX_MESSAGES, MEMORY_TOKEN_BUDGET,
+                        CACHE_ENABLED, CACHE_WARMUP_ENABLED, STREAM_RESPONSES_ENABLED, STREAM_EDIT_INTERVAL)
 from src.openai.agent import process_message, is_simple_question
 from src.memory import conversation_memory
 
@@ -26,6 +29,91 @@ logger = logging.getLogger(__name__)
 # זמן המתנה בין עדכוני הודעה (בשניות)
 TYPING_INDICATOR_INTERVAL = 1.5
 
+# סימן שמוצג בסוף תשובה שעדיין נכתבת
+STREAM_CURSOR = " ▌"
+
+class StreamingMessageEditor:
+    """
+    מעדכן הודעה בטלגרם בתשובה החלקית בזמן שהיא נוצרת.
+    העדכונים מרוכזים כך שנשלחת לכל היותר עריכה אחת בכל מרווח - רק הטקסט האחרון שהצטבר -
+    כדי לעמוד במגבלת הקצב של טלגרם לעריכות בצ'אט.
+    """
+
+    def __init__(self, message: Message, interval: float = STREAM_EDIT_INTERVAL,
+                 on_first_text: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            message: ההודעה לעדכון
+            interval: זמן מינימלי בין עריכות בשניות
+            on_first_text: פונקציה שנקראת כשמגיע הטקסט הראשון (למשל לעצירת אינדיקטור ההקלדה)
+        """
+        self._message = message
+        self._interval = interval
+        self._on_first_text = on_first_text
+        self._pending: Optional[str] = None
+        self._shown: Optional[str] = None
+        self._next_edit_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.edits = 0
+
+    async def update(self, text: str) -> None:
+        """
+        מקבל את הטקסט שנצבר עד כה ומתזמן עריכה אם אין אחת ממתינה
+        """
+        if self._on_first_text is not None:
+            self._on_first_text()
+            self._on_first_text = None
+        self._pending = text
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_pending())
+
+    async def _flush_pending(self) -> None:
+        while self._pending is not None:
+            delay = self._next_edit_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            text, self._pending = self._pending, None
+            # בזמן ההזרמה מוצגת רק ההתחלה של תשובה ארוכה מהמותר בהודעה אחת
+            limit = MessageLimit.MAX_TEXT_LENGTH - len(STREAM_CURSOR)
+            await self._edit(text[:limit] + STREAM_CURSOR)
+
+    async def _edit(self, text: str) -> bool:
+        if text == self._shown:
+            return True
+        try:
+            await self._message.edit_text(text)
+        except RetryAfter as e:
+            # טלגרם ביקש להאט - העריכה הבאה תחכה לזמן שנדרש
+            logger.warning(f"Telegram asked to retry message edits after {e.retry_after} seconds")
+            self._next_edit_at = time.monotonic() + e.retry_after
+            return False
+        except BadRequest as e:
+            if "not modified" not in str(e).lower():
+                raise
+        self._shown = text
+        self.edits += 1
+        self._next_edit_at = time.monotonic() + self._interval
+        return True
+
+    async def finish(self, text: str) -> None:
+        """
+        מציג את הטקסט הסופי במקום התשובה החלקית, אחרי שהמרווח מהעריכה הקודמת עבר
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._pending = None
+        for _ in range(2):
+            delay = self._next_edit_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if await self._edit(text):
+                return
+        logger.error("Could not deliver the final message edit")
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """
     מטפל בפקודת /start
@@ -102,9 +190,11 @@ async def clear_cache_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     
     # יבוא מקומי כדי למנוע יבוא מעגלי
     from src.woocommerce.cache import clear_cache
+    from src.openai.semantic_cache import semantic_cache
     
-    # נקה את המטמון
+    # נקה את המטמון, כולל תשובות סמנטיות שנשענו על הנתונים שבו
     clear_cache()
+    semantic_cache.clear()
     
     # שלח הודעת אישור
     response = "המטמון נוקה בהצלחה!"
@@ -237,21 +327,29 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     # הפעל טיימר לעדכון אינדיקטור הקלדה
     typing_task = asyncio.create_task(update_typing_indicator(processing_message))
     
+    # התשובה מוצגת בהדרגה באותה הודעה, ואינדיקטור ההקלדה נעצר כשמגיע הטקסט הראשון
+    editor = StreamingMessageEditor(processing_message, on_first_text=typing_task.cancel)
+    on_text = editor.update if STREAM_RESPONSES_ENABLED else None
+    
     try:
         # קבל את היסטוריית השיחה אם זיכרון השיחה מופעל
         conversation_history = None
         if MEMORY_ENABLED:
-            conversation_history = conversation_memory.get_conversation_for_agent(user_id, MEMORY_CONTEXT_LIMIT)
+            # עם תקציב טוקנים כל ההיסטוריה השמורה היא מועמדת, והתקציב קובע כמה ממנה יישלח
+            history_limit = MEMORY_MAX_MESSAGES if MEMORY_TOKEN_BUDGET > 0 else MEMORY_CONTEXT_LIMIT
+            conversation_history = conversation_memory.get_conversation_for_agent(user_id, history_limit)
         
         # עבד את ההודעה באופן אסינכרוני
-        response_data = await _process_message_async(message_text, conversation_history)
+        response_data = await _process_message_async(message_text, conversation_history, on_text)
         
         # עצור את הטיימר
         typing_task.cancel()
         
         if response_data["success"]:
             # עדכן את הודעת "מעבד..." עם התשובה במקום למחוק אותה
-            await processing_message.edit_text(response_data["response"])
+            await editor.finish(response_data["response"])
+            if editor.edits > 1:
+                logger.info(f"Streamed response to user {user_id} in {editor.edits} message edits")
             
             # שמור את התשובה בזיכרון השיחה
             if MEMORY_ENABLED:
@@ -261,7 +359,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             error_message = "מצטער, לא הצלחתי לעבד את הבקשה שלך. נסה שוב מאוחר יותר."
             if DEBUG:  # הצג את הודעת השגיאה המלאה רק במצב דיבאג
                 error_message += f"\n\nפרטי שגיאה: {response_data['response']}"
-            await processing_message.edit_text(error_message)
+            await editor.finish(error_message)
             
             # שמור את הודעת השגיאה בזיכרון השיחה
             if MEMORY_ENABLED:
@@ -274,7 +372,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         
         # עדכן את הודעת "מעבד..." עם הודעת שגיאה
         error_message = f"אירעה שגיאה בעיבוד הבקשה שלך. נסה שוב מאוחר יותר."
-        await processing_message.edit_text(error_message)
+        await editor.finish(error_message)
         
         # שמור את הודעת השגיאה בזיכרון השיחה
         if MEMORY_ENABLED:
@@ -300,19 +398,53 @@ async def update_typing_indicator(message):
     except Exception as e:
         logger.error(f"Error updating typing indicator: {e}")
 
-async def _process_message_async(message: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+async def _process_message_async(message: str, conversation_history: Optional[List[Dict[str, str]]] = None,
+                                 on_text: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
     """
     מעבד הודעה באופן אסינכרוני
     
     Args:
         message: הודעת המשתמש
         conversation_history: היסטוריית השיחה (אופציונלי)
+        on_text: פונקציה שמקבלת את התשובה החלקית בזמן שהיא נוצרת (אופציונלי)
     
     Returns:
         מילון עם התשובה
     """
     # קורא לפונקציה האסינכרונית process_message עם await
-    return await process_message(message, conversation_history)
+    return await process_message(message, conversation_history, on_text)
+
+async def _on_startup(application: Application) -> None:
+    """
+    מפעיל שירותי רקע אסינכרוניים לאחר אתחול הבוט
+    
+    Args:
+        application: אפליקציית הטלגרם
+    """
+    # יבוא מקומי כדי למנוע יבוא מעגלי
+    from src.woocommerce.api import start_background_services, warm_up_cache
+    from src.snapshot import start_periodic_snapshots
+    
+    await start_background_services()
+    
+    # טעינה מוקדמת של נתוני הליבה לפני שהבוט מתחיל לקבל הודעות
+    if CACHE_ENABLED and CACHE_WARMUP_ENABLED:
+        await warm_up_cache()
+    start_periodic_snapshots()
+
+async def _on_shutdown(application: Application) -> None:
+    """
+    סוגר משאבים אסינכרוניים בסיום פעולת הבוט
+    
+    Args:
+        application: אפליקציית הטלגרם
+    """
+    # יבוא מקומי כדי למנוע יבוא מעגלי
+    from src.woocommerce.api import close_client
+    from src.snapshot import stop_periodic_snapshots
+    
+    await stop_periodic_snapshots()
+    await close_client()
 
 def run_bot() -> None:
     """
@@ -321,7 +453,14 @@ def run_bot() -> None:
     logger.info("Starting Telegram bot")
     
     # הגדר את הבוט
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .concurrent_updates(True)
+        .post_init(_on_startup)
+        .post_shutdown(_on_shutdown)
+        .build()
+    )
     
     # הוסף מטפלי פקודות
     application.add_handler(CommandHandler("start", start_command))
@@ -0,0 +1,356 @@
+"""
+מנוע ניתוח הזמנות בתוך התהליך - ההזמנות נטענות למערכים עמודתיים של NumPy
+ושאלות כמו "הכנסות החודש" או "5 המוצרים הנמכרים ביותר" נענות בחישוב וקטורי
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import ANALYTICS_PAID_STATUSES
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# השדות שנדרשים לניתוח - נשלחים כ-_fields כדי לא לשלוף את ההזמנות המלאות
+ANALYTICS_FIELDS = "currency,customer_id,date_created,id,line_items,status,total"
+
+# יחידות הזמן הנתמכות לקיבוץ לפי תקופה
+PERIOD_UNITS = {
+    "day": "D",
+    "week": "D",
+    "month": "M",
+    "year": "Y"
+}
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class OrderFrame:
+    """
+    ההזמנות בייצוג עמודתי: מערך לכל שדה של הזמנה, ומערכים נפרדים לשורות ההזמנה
+    """
+    ids: np.ndarray  # מזהי ההזמנות
+    dates: np.ndarray  # זמן יצירת ההזמנה (datetime64[s])
+    totals: np.ndarray  # סכום ההזמנה
+    status_codes: np.ndarray  # קוד הסטטוס - אינדקס לתוך statuses
+    statuses: List[str]  # שמות הסטטוסים
+    customer_ids: np.ndarray  # מזהה הלקוח (0 לאורח)
+    item_order_index: np.ndarray  # לכל שורת הזמנה - האינדקס של ההזמנה שלה
+    item_product_ids: np.ndarray  # לכל שורת הזמנה - מזהה המוצר
+    item_quantities: np.ndarray  # לכל שורת הזמנה - הכמות
+    item_totals: np.ndarray  # לכל שורת הזמנה - הסכום
+    product_names: Dict[int, str]  # שם המוצר לפי מזהה, מהשורות עצמן
+    currency: str
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def build_frame(orders: Sequence[Dict[str, Any]]) -> OrderFrame:
+    """
+    בונה ייצוג עמודתי מרשימת הזמנות
+
+    Args:
+        orders: ההזמנות כפי שהתקבלו מ-WooCommerce
+
+    Returns:
+        ההזמנות בייצוג עמודתי
+    """
+    started = time.perf_counter()
+    count = len(orders)
+    statuses, status_codes = np.unique(
+        np.array([order.get("status") or "" for order in orders], dtype=str), return_inverse=True
+    )
+
+    item_order_index: List[int] = []
+    item_product_ids: List[int] = []
+    item_quantities: List[int] = []
+    item_totals: List[float] = []
+    product_names: Dict[int, str] = {}
+    for index, order in enumerate(orders):
+        for line in order.get("line_items") or []:
+            product_id = line.get("product_id") or 0
+            item_order_index.append(index)
+            item_product_ids.append(product_id)
+            item_quantities.append(line.get("quantity") or 0)
+            item_totals.append(_to_float(line.get("total")))
+            if product_id and line.get("name"):
+                product_names[product_id] = line["name"]
+
+    frame = OrderFrame(
+        ids=np.fromiter((order.get("id", 0) for order in orders), dtype=np.int64, count=count),
+        dates=np.array([order.get("date_created") or "NaT" for order in orders], dtype="datetime64[s]"),
+        totals=np.fromiter((_to_float(order.get("total")) for order in orders), dtype=np.float64, count=count),
+        status_codes=status_codes.astype(np.int32),
+        statuses=[str(status) for status in statuses],
+        customer_ids=np.fromiter((order.get("customer_id") or 0 for order in orders), dtype=np.int64, count=count),
+        item_order_index=np.array(item_order_index, dtype=np.int64),
+        item_product_ids=np.array(item_product_ids, dtype=np.int64),
+        item_quantities=np.array(item_quantities, dtype=np.int64),
+        item_totals=np.array(item_totals, dtype=np.float64),
+        product_names=product_names,
+        currency=next((order["currency"] for order in orders if order.get("currency")), "")
+    )
+    logger.info(f"Built analytics frame for {count} orders and {len(item_product_ids)} line items "
+                f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return frame
+
+
+def _parse_date(value: Optional[str]) -> Optional[np.datetime64]:
+    if not value:
+        return None
+    return np.datetime64(value, "s")
+
+
+def order_mask(
+    frame: OrderFrame,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    statuses: Optional[Sequence[str]] = None
+) -> np.ndarray:
+    """
+    מחזיר מסכה בוליאנית של ההזמנות בטווח התאריכים ובסטטוסים המבוקשים
+
+    Args:
+        frame: ההזמנות בייצוג עמודתי
+        start: תאריך התחלה כולל (YYYY-MM-DD או ISO 8601)
+        end: תאריך סיום לא כולל (YYYY-MM-DD או ISO 8601)
+        statuses: הסטטוסים שנכללים (None לכל הסטטוסים)
+
+    Returns:
+        מסכה באורך מספר ההזמנות
+    """
+    mask = np.ones(len(frame), dtype=bool)
+    start_date, end_date = _parse_date(start), _parse_date(end)
+    if start_date is not None:
+        mask &= frame.dates >= start_date
+    if end_date is not None:
+        mask &= frame.dates < end_date
+    if statuses is not None:
+        codes = [code for code, status in enumerate(frame.statuses) if status in statuses]
+        mask &= np.isin(frame.status_codes, codes)
+    return mask
+
+
+def _table(columns: List[str], rows: List[List[Any]]) -> Dict[str, Any]:
+    return {"columns": columns, "rows": rows}
+
+
+def sales_summary(
+    frame: OrderFrame,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    statuses: Optional[Sequence[str]] = ANALYTICS_PAID_STATUSES
+) -> Dict[str, Any]:
+    """
+    סיכום מכירות: הכנסות, מספר הזמנות, ממוצע להזמנה ומספר פריטים
+
+    Args:
+        frame: ההזמנות בייצוג עמודתי
+        start: תאריך התחלה כולל
+        end: תאריך סיום לא כולל
+        statuses: הסטטוסים שנחשבים כמכירה
+
+    Returns:
+        מילון עם הסיכום
+    """
+    mask = order_mask(frame, start, end, statuses)
+    orders = int(mask.sum())
+    revenue = float(frame.totals[mask].sum())
+    items = int(frame.item_quantities[mask[frame.item_order_index]].sum()) if len(frame.item_order_index) else 0
+    return {
+        "revenue": round(revenue, 2),
+        "orders": orders,
+        "average_order_value": round(revenue / orders, 2) if orders else 0.0,
+        "items_sold": items,
+        "currency": frame.currency
+    }
+
+
+def sales_by_period(
+    frame: OrderFrame,
+    period: str = "day",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    statuses: Optional[Sequence[str]] = ANALYTICS_PAID_STATUSES
+) -> Dict[str, Any]:
+    """
+    הכנסות ומספר הזמנות לפי תקופה (יום, שבוע, חודש או שנה)
+
+    Args:
+        frame: ההזמנות בייצוג עמודתי
+        period: יחידת הזמן - day, week, month או year
+        start: תאריך התחלה כולל
+        end: תאריך סיום לא כולל
+        statuses: הסטטוסים שנחשבים כמכירה
+
+    Returns:
+        טבלה עם עמודות period, revenue, orders
+    """
+    if period not in PERIOD_UNITS:
+        raise ValueError(f"Unsupported period '{period}', expected one of {', '.join(PERIOD_UNITS)}")
+
+    mask = order_mask(frame, start, end, statuses) & ~np.isnat(frame.dates)
+    if period == "week":
+        # שבוע ב-NumPy מתחיל ביום חמישי (1970-01-01), ולכן השבוע מחושב ידנית כך שיתחיל ביום ראשון
+        days = frame.dates[mask].astype("datetime64[D]")
+        periods = days - (days.astype(np.int64) + 4) % 7
+    else:
+        periods = frame.dates[mask].astype(f"datetime64[{PERIOD_UNITS[period]}]")
+    keys, inverse = np.unique(periods, return_inverse=True)
+    revenue = np.bincount(inverse, weights=frame.totals[mask], minlength=len(keys))
+    orders = np.bincount(inverse, minlength=len(keys))
+
+    rows = [[str(label), round(float(total), 2), int(count)] for label, total, count in zip(keys.astype(str), revenue, orders)]
+    return _table(["period", "revenue", "orders"], rows)
+
+
+def _top_k(keys: np.ndarray, values: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    מחזיר את limit המפתחות עם הערכים הגבוהים ביותר, ממוינים בסדר יורד
+    """
+    if len(keys) > limit:
+        top = np.argpartition(-values, limit - 1)[:limit]
+        keys, values = keys[top], values[top]
+    order = np.argsort(-values, kind="stable")
+    return keys[order], values[order]
+
+
+def top_products(
+    frame: OrderFrame,
+    limit: int = 5,
+    metric: str = "quantity",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    statuses: Optional[Sequence[str]] = ANALYTICS_PAID_STATUSES
+) -> Dict[str, Any]:
+    """
+    המוצרים המובילים לפי כמות שנמכרה או לפי הכנסות
+
+    Args:
+        frame: ההזמנות בייצוג עמודתי
+        limit: מספר המוצרים להחזרה
+        metric: quantity או revenue
+        start: תאריך התחלה כולל
+        end: תאריך סיום לא כולל
+        statuses: הסטטוסים שנחשבים כמכירה
+
+    Returns:
+        טבלה עם עמודות product_id, name, quantity, revenue
+    """
+    if metric not in ("quantity", "revenue"):
+        raise ValueError(f"Unsupported metric '{metric}', expected quantity or revenue")
+    if not len(frame.item_order_index) or limit <= 0:
+        return _table(["product_id", "name", "quantity", "revenue"], [])
+
+    item_mask = order_mask(frame, start, end, statuses)[frame.item_order_index]
+    product_ids, inverse = np.unique(frame.item_product_ids[item_mask], return_inverse=True)
+    quantities = np.bincount(inverse, weights=frame.item_quantities[item_mask], minlength=len(product_ids))
+    revenue = np.bincount(inverse, weights=frame.item_totals[item_mask], minlength=len(product_ids))
+
+    ranked = quantities if metric == "quantity" else revenue
+    positions, _ = _top_k(np.arange(len(product_ids)), ranked, limit)
+    rows = [
+        [int(product_ids[i]), frame.product_names.get(int(product_ids[i]), ""), int(quantities[i]), round(float(revenue[i]), 2)]
+        for i in positions
+    ]
+    return _table(["product_id", "name", "quantity", "revenue"], rows)
+
+
+def top_customers(
+    frame: OrderFrame,
+    limit: int = 5,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    statuses: Optional[Sequence[str]] = ANALYTICS_PAID_STATUSES
+) -> Dict[str, Any]:
+    """
+    הלקוחות המובילים לפי סכום ההזמנות (ללא הזמנות אורח)
+
+    Args:
+        frame: ההזמנות בייצוג עמודתי
+        limit: מספר הלקוחות להחזרה
+        start: תאריך התחלה כולל
+        end: תאריך סיום לא כולל
+        statuses: הסטטוסים שנחשבים כמכירה
+
+    Returns:
+        טבלה עם עמודות customer_id, orders, revenue
+    """
+    mask = order_mask(frame, start, end, statuses) & (frame.customer_ids > 0)
+    customer_ids, inverse = np.unique(frame.customer_ids[mask], return_inverse=True)
+    if not len(customer_ids) or limit <= 0:
+        return _table(["customer_id", "orders", "revenue"], [])
+    revenue = np.bincount(inverse, weights=frame.totals[mask], minlength=len(customer_ids))
+    orders = np.bincount(inverse, minlength=len(customer_ids))
+
+    positions, _ = _top_k(np.arange(len(customer_ids)), revenue, limit)
+    rows = [[int(customer_ids[i]), int(orders[i]), round(float(revenue[i]), 2)] for i in positions]
+    return _table(["customer_id", "orders", "revenue"], rows)
+
+
+def status_breakdown(frame: OrderFrame, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+    """
+    מספר ההזמנות וסכומן לפי סטטוס
+
+    Args:
+        frame: ההזמנות בייצוג עמודתי
+        start: תאריך התחלה כולל
+        end: תאריך סיום לא כולל
+
+    Returns:
+        טבלה עם עמודות status, orders, total
+    """
+    mask = order_mask(frame, start, end)
+    codes = frame.status_codes[mask]
+    counts = np.bincount(codes, minlength=len(frame.statuses))
+    totals = np.bincount(codes, weights=frame.totals[mask], minlength=len(frame.statuses))
+    rows = [
+        [status, int(counts[code]), round(float(totals[code]), 2)]
+        for code, status in enumerate(frame.statuses)
+        if counts[code]
+    ]
+    rows.sort(key=lambda row: -row[1])
+    return _table(["status", "orders", "total"], rows)
+
+
+class OrderAnalytics:
+    """
+    מחזיק את הייצוג העמודתי של ההזמנות ובונה אותו מחדש רק כשרשימת ההזמנות השתנתה
+    """
+
+    def __init__(self):
+        self._source: Optional[List[Dict[str, Any]]] = None
+        self._frame: Optional[OrderFrame] = None
+        self.builds = 0
+
+    def frame_for(self, orders: List[Dict[str, Any]]) -> OrderFrame:
+        """
+        מחזיר ייצוג עמודתי של רשימת ההזמנות. רשימה שמוחזרת מהמטמון היא אותו אובייקט
+        כל עוד לא השתנתה (עדכונים יוצרים רשימה חדשה), ולכן ההשוואה היא לפי זהות.
+
+        Args:
+            orders: רשימת ההזמנות
+
+        Returns:
+            ההזמנות בייצוג עמודתי
+        """
+        if self._frame is None or orders is not self._source:
+            self._frame = build_frame(orders)
+            self._source = orders
+            self.builds += 1
+        return self._frame
+
+
+# מופע גלובלי של מנוע הניתוח
+order_analytics = OrderAnalytics()
@@ -2,43 +2,132 @@
 מודול לתקשורת עם WooCommerce API
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
-from woocommerce import API
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple
 
-from src.config import WOO_URL, WOO_CONSUMER_KEY, WOO_CONSUMER_SECRET, WOO_API_VERSION
-from src.woocommerce.cache import cached
+from src.config import (
+    WOO_URL, WOO_CONSUMER_KEY, WOO_CONSUMER_SECRET, WOO_API_VERSION,
+    WOO_TIMEOUT, WOO_READ_TIMEOUT, WOO_CONNECT_TIMEOUT, WOO_POOL_SIZE, WOO_POOL_SIZE_PER_HOST, WOO_KEEPALIVE_TIMEOUT,
+    WOO_BATCH_SIZE, WOO_BATCH_CONCURRENCY, JSON_STREAM_THRESHOLD,
+    MIRROR_ENABLED, WEBHOOK_ENABLED, WEBHOOK_CACHE_EXPIRY, CATALOG_COMPACT_ENABLED, CACHE_WARMUP_TIMEOUT
+)
+from src.woocommerce.analytics import ANALYTICS_FIELDS
+from src.woocommerce.cache import cached, clear_cache_for_function, fill_cache_entry, peek_cached_value
+from src.woocommerce.catalog import catalog_codec, find_product
+from src.woocommerce.client import WooCommerceClient, WooResponse
+from src.woocommerce.invalidation import CACHED_FUNCTIONS, apply_change, apply_removal
+from src.woocommerce.loader import DataLoader
+from src.woocommerce.mirror import store_mirror
+from src.woocommerce.pagination import fetch_all_pages, fetch_page, iter_pages
+from src.woocommerce.projection import api_fields, fields_for
+from src.woocommerce.resilience import Resilience
+from src.woocommerce.search import product_index
+from src.woocommerce.shared_cache import shared_cache
+from src.woocommerce.result import WooCommerceError
+from src.woocommerce.webhooks import webhook_server
 
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
 
-# יצירת חיבור ל-WooCommerce API
-woocommerce = API(
+# יצירת לקוח אסינכרוני ל-WooCommerce API עם מאגר חיבורים משותף ושכבת עמידות
+woocommerce = WooCommerceClient(
     url=WOO_URL,
     consumer_key=WOO_CONSUMER_KEY,
     consumer_secret=WOO_CONSUMER_SECRET,
     version=WOO_API_VERSION,
-    timeout=30
+    timeout=WOO_TIMEOUT,
+    read_timeout=WOO_READ_TIMEOUT,
+    connect_timeout=WOO_CONNECT_TIMEOUT,
+    pool_size=WOO_POOL_SIZE,
+    pool_size_per_host=WOO_POOL_SIZE_PER_HOST,
+    keepalive_timeout=WOO_KEEPALIVE_TIMEOUT,
+    resilience=Resilience(),
+    stream_threshold=JSON_STREAM_THRESHOLD
 )
 
-@cached()
-def get_products() -> List[Dict[str, Any]]:
+async def _load_one(kind: str, object_id: int) -> Optional[Dict[str, Any]]:
+    """
+    טוען פריט בודד מנקודת הקצה שלו, או None אם הוא לא קיים
+    """
+    response = await woocommerce.get(f"{kind}/{object_id}")
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+async def _load_by_ids(kind: str, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    טוען כמה פריטים בבקשה אחת עם include, ושומר כל פריט במטמון של השליפה הבודדת שלו.
+    include מחזיר רק פריטים ברשימות הרגילות (בלי וריאציות ובלי פריטים שבפח), ולכן מזהים
+    שחסרים בתשובה נטענים מנקודת הקצה של הפריט הבודד.
+
+    Args:
+        kind: סוג הפריטים ("products" או "orders")
+        ids: מזהי הפריטים
+
+    Returns:
+        מילון ממזהה לפריט - מזהים שלא נמצאו חסרים במילון
+    """
+    logger.info(f"Getting {len(ids)} {kind} by id from WooCommerce")
+    response = await woocommerce.get(kind, params={
+        "include": ",".join(str(object_id) for object_id in ids),
+        "per_page": len(ids)
+    })
+    response.raise_for_status()
+    items = {item["id"]: item for item in response.json()}
+
+    missing = [object_id for object_id in ids if object_id not in items]
+    if missing:
+        logger.info(f"Getting {len(missing)} {kind} missing from the batch one by one")
+        for object_id, item in zip(missing, await asyncio.gather(*(_load_one(kind, object_id) for object_id in missing))):
+            if item is not None:
+                items[object_id] = item
+
+    single_function = CACHED_FUNCTIONS[kind][0]
+    for object_id, item in items.items():
+        fill_cache_entry(single_function, item, object_id)
+    return items
+
+# טוענים מקובצים למוצרים ולהזמנות לפי מזהה
+product_loader = DataLoader(lambda ids: _load_by_ids("products", ids), name="products")
+order_loader = DataLoader(lambda ids: _load_by_ids("orders", ids), name="orders")
+
+# כשה-webhooks פעילים, מוצרים והזמנות מתעדכנים במטמון ברגע השינוי ולכן אפשר לשמור אותם זמן רב יותר
+PUSH_INVALIDATED_EXPIRY = WEBHOOK_CACHE_EXPIRY if WEBHOOK_ENABLED else None
+
+@cached(
+    expiry=PUSH_INVALIDATED_EXPIRY,
+    bypass=lambda: store_mirror.serves("products"),
+    codec=catalog_codec if CATALOG_COMPACT_ENABLED else None
+)
+async def get_products(fields: Optional[str] = None) -> List[Dict[str, Any]]:
     """
-    מחזיר רשימה של כל המוצרים בחנות
+    מחזיר רשימה של כל המוצרים בחנות.
+    כשהקטלוג הקומפקטי פעיל, הרשימה המלאה (בלי fields) נשמרת במטמון בייצוג קומפקטי ומוחזרת עם השדות החמים בלבד
+    (שם, מק"ט, מחירים, מלאי, קטגוריות) - המוצר המלא זמין דרך get_product. רשימה עם fields מוחזרת עם כל השדות שביקשו.
+    
+    Args:
+        fields: שדות להחזרה מופרדים בפסיקים (פרמטר _fields של ה-API), או None לכל השדות
     
     Returns:
         רשימה של מוצרים
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
     """
+    if store_mirror.serves("products"):
+        return await store_mirror.list_items("products")
+    
     logger.info("Getting products list from WooCommerce")
     try:
-        response = woocommerce.get("products", params={"per_page": 100})
-        return response.json()
-    except Exception as e:
+        return await fetch_all_pages(woocommerce, "products", {"_fields": fields} if fields else None)
+    except WooCommerceError as e:
         logger.error(f"Error getting products: {e}")
-        return []
+        raise
 
-@cached()
-def get_product(product_id: int) -> Optional[Dict[str, Any]]:
+@cached(expiry=PUSH_INVALIDATED_EXPIRY, bypass=lambda: store_mirror.serves("products"))
+async def get_product(product_id: int) -> Optional[Dict[str, Any]]:
     """
     מחזיר מוצר לפי מזהה
     
@@ -47,49 +136,92 @@ def get_product(product_id: int) -> Optional[Dict[str, Any]]:
     
     Returns:
         מידע על המוצר או None אם המוצר לא נמצא
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
     """
+    if store_mirror.serves("products"):
+        product = await store_mirror.get_item("products", product_id)
+        if product is not None:
+            return product
+    
+    if CATALOG_COMPACT_ENABLED:
+        # השדות הקרים של המוצר נפתחים מהקטלוג הקומפקטי בלי לפנות לחנות
+        product = find_product(peek_cached_value("get_products"), product_id)
+        if product is not None:
+            return product
+
     logger.info(f"Getting product {product_id} from WooCommerce")
     try:
-        response = woocommerce.get(f"products/{product_id}")
-        return response.json()
-    except Exception as e:
+        # בקשות למזהים בודדים שמגיעות יחד נשלחות כבקשה אחת עם include
+        return await product_loader.load(product_id)
+    except WooCommerceError as e:
         logger.error(f"Error getting product {product_id}: {e}")
-        return None
+        raise
+
+async def search_products(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    מחפש מוצרים באינדקס החיפוש המקומי (עברית ואנגלית, כולל שגיאות הקלדה).
+    האינדקס נבנה מהקטלוג בפעם הראשונה ומתעדכן במקום כשמוצרים משתנים.
+    
+    Args:
+        query: טקסט החיפוש
+        limit: מספר התוצאות המקסימלי
+    
+    Returns:
+        המוצרים המתאימים ביותר, ממוינים לפי ציון
+    
+    Raises:
+        WooCommerceError: אם בניית האינדקס דרשה את הקטלוג והקריאה לחנות נכשלה
+    """
+    if product_index.needs_rebuild():
+        product_index.rebuild(await get_products())
+    return product_index.search(query, limit)
 
 @cached()
-def get_categories() -> List[Dict[str, Any]]:
+async def get_categories() -> List[Dict[str, Any]]:
     """
     מחזיר רשימה של כל הקטגוריות בחנות
     
     Returns:
         רשימה של קטגוריות
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
     """
     logger.info("Getting categories list from WooCommerce")
     try:
-        response = woocommerce.get("products/categories", params={"per_page": 100})
-        return response.json()
-    except Exception as e:
+        return await fetch_all_pages(woocommerce, "products/categories")
+    except WooCommerceError as e:
         logger.error(f"Error getting categories: {e}")
-        return []
+        raise
 
-@cached()
-def get_orders() -> List[Dict[str, Any]]:
+@cached(expiry=PUSH_INVALIDATED_EXPIRY, bypass=lambda: store_mirror.serves("orders"))
+async def get_orders(fields: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     מחזיר רשימה של כל ההזמנות בחנות
     
+    Args:
+        fields: שדות להחזרה מופרדים בפסיקים (פרמטר _fields של ה-API), או None לכל השדות
+    
     Returns:
         רשימה של הזמנות
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
     """
+    if store_mirror.serves("orders"):
+        return await store_mirror.list_items("orders")
+    
     logger.info("Getting orders list from WooCommerce")
     try:
-        response = woocommerce.get("orders", params={"per_page": 100})
-        return response.json()
-    except Exception as e:
+        return await fetch_all_pages(woocommerce, "orders", {"_fields": fields} if fields else None)
+    except WooCommerceError as e:
         logger.error(f"Error getting orders: {e}")
-        return []
+        raise
 
-@cached()
-def get_order(order_id: int) -> Optional[Dict[str, Any]]:
+@cached(expiry=PUSH_INVALIDATED_EXPIRY, bypass=lambda: store_mirror.serves("orders"))
+async def get_order(order_id: int) -> Optional[Dict[str, Any]]:
     """
     מחזיר הזמנה לפי מזהה
     
@@ -98,32 +230,230 @@ def get_order(order_id: int) -> Optional[Dict[str, Any]]:
     
     Returns:
         מידע על ההזמנה או None אם ההזמנה לא נמצאה
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
     """
+    if store_mirror.serves("orders"):
+        order = await store_mirror.get_item("orders", order_id)
+        if order is not None:
+            return order
+    
     logger.info(f"Getting order {order_id} from WooCommerce")
     try:
-        response = woocommerce.get(f"orders/{order_id}")
-        return response.json()
-    except Exception as e:
+        # בקשות למזהים בודדים שמגיעות יחד נשלחות כבקשה אחת עם include
+        return await order_loader.load(order_id)
+    except WooCommerceError as e:
         logger.error(f"Error getting order {order_id}: {e}")
-        return None
+        raise
+
+def _iso_datetime(value: Optional[str]) -> Optional[str]:
+    """
+    משלים תאריך בלבד (YYYY-MM-DD) לפורמט ISO 8601 המלא ש-WooCommerce דורש
+    """
+    if value and len(value) == 10:
+        return f"{value}T00:00:00"
+    return value
+
+def _query_params(**filters: Any) -> Dict[str, Any]:
+    """
+    בונה פרמטרי שאילתה מהמסננים שסופקו בלבד
+    """
+    return {name: value for name, value in filters.items() if value is not None and value != ""}
+
+@cached(expiry=PUSH_INVALIDATED_EXPIRY)
+async def query_orders(
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    customer: Optional[int] = None,
+    search: Optional[str] = None,
+    orderby: Optional[str] = None,
+    order: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20,
+    fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    מחזיר דף של הזמנות שמתאימות למסננים. הסינון מתבצע בחנות, וכל שילוב מסננים נשמר במטמון בנפרד.
+    
+    Args:
+        status: סטטוס ההזמנה, או כמה סטטוסים מופרדים בפסיקים (למשל "processing,on-hold")
+        after: רק הזמנות שנוצרו אחרי התאריך (YYYY-MM-DD או ISO 8601)
+        before: רק הזמנות שנוצרו לפני התאריך (YYYY-MM-DD או ISO 8601)
+        customer: מזהה הלקוח
+        search: טקסט לחיפוש
+        orderby: שדה למיון (date, id, include, title, slug)
+        order: כיוון המיון (asc או desc)
+        page: מספר הדף
+        per_page: מספר הזמנות בדף (עד 100)
+        fields: שדות להחזרה מופרדים בפסיקים (פרמטר _fields של ה-API)
+    
+    Returns:
+        מילון עם items, page, total_pages ו-total
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
+    """
+    params = _query_params(
+        status=status, after=_iso_datetime(after), before=_iso_datetime(before), customer=customer,
+        search=search, orderby=orderby, order=order, _fields=fields
+    )
+    logger.info(f"Querying orders from WooCommerce with {params}")
+    try:
+        return await fetch_page(woocommerce, "orders", params, page=page, per_page=min(per_page, 100))
+    except WooCommerceError as e:
+        logger.error(f"Error querying orders: {e}")
+        raise
+
+@cached(expiry=PUSH_INVALIDATED_EXPIRY)
+async def query_products(
+    search: Optional[str] = None,
+    category: Optional[int] = None,
+    stock_status: Optional[str] = None,
+    status: Optional[str] = None,
+    sku: Optional[str] = None,
+    on_sale: Optional[bool] = None,
+    min_price: Optional[str] = None,
+    max_price: Optional[str] = None,
+    orderby: Optional[str] = None,
+    order: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20,
+    fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    מחזיר דף של מוצרים שמתאימים למסננים. הסינון מתבצע בחנות, וכל שילוב מסננים נשמר במטמון בנפרד.
+    
+    Args:
+        search: טקסט לחיפוש
+        category: מזהה הקטגוריה
+        stock_status: מצב המלאי (instock, outofstock, onbackorder)
+        status: סטטוס המוצר (publish, draft, pending, private)
+        sku: מק"ט
+        on_sale: רק מוצרים במבצע
+        min_price: מחיר מינימלי
+        max_price: מחיר מקסימלי
+        orderby: שדה למיון (date, id, title, slug, price, popularity, rating)
+        order: כיוון המיון (asc או desc)
+        page: מספר הדף
+        per_page: מספר מוצרים בדף (עד 100)
+        fields: שדות להחזרה מופרדים בפסיקים (פרמטר _fields של ה-API)
+    
+    Returns:
+        מילון עם items, page, total_pages ו-total
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
+    """
+    params = _query_params(
+        search=search, category=category, stock_status=stock_status, status=status, sku=sku,
+        on_sale=None if on_sale is None else str(on_sale).lower(),
+        min_price=min_price, max_price=max_price, orderby=orderby, order=order, _fields=fields
+    )
+    logger.info(f"Querying products from WooCommerce with {params}")
+    try:
+        return await fetch_page(woocommerce, "products", params, page=page, per_page=min(per_page, 100))
+    except WooCommerceError as e:
+        logger.error(f"Error querying products: {e}")
+        raise
 
 @cached()
-def get_store_info() -> Dict[str, Any]:
+async def get_store_info() -> Dict[str, Any]:
     """
     מחזיר מידע כללי על החנות
     
     Returns:
         מידע על החנות
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
     """
     logger.info("Getting store info from WooCommerce")
     try:
-        response = woocommerce.get("")
+        response = await woocommerce.get("")
+        response.raise_for_status()
         return response.json()
-    except Exception as e:
+    except WooCommerceError as e:
         logger.error(f"Error getting store info: {e}")
-        return {}
+        raise
+
+async def get_products_by_ids(product_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+    """
+    מחזיר כמה מוצרים לפי מזהים. מוצרים שאינם במטמון נשלפים יחד בבקשה אחת.
+    
+    Args:
+        product_ids: מזהי המוצרים
+    
+    Returns:
+        רשימת המוצרים לפי סדר המזהים, עם None לכל מוצר שלא נמצא
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
+    """
+    return list(await asyncio.gather(*(get_product(product_id) for product_id in product_ids)))
+
+async def get_orders_by_ids(order_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+    """
+    מחזיר כמה הזמנות לפי מזהים. הזמנות שאינן במטמון נשלפות יחד בבקשה אחת.
+    
+    Args:
+        order_ids: מזהי ההזמנות
+    
+    Returns:
+        רשימת ההזמנות לפי סדר המזהים, עם None לכל הזמנה שלא נמצאה
+    
+    Raises:
+        WooCommerceError: אם הקריאה לחנות נכשלה
+    """
+    return list(await asyncio.gather(*(get_order(order_id) for order_id in order_ids)))
 
-def create_product(product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def _write_through(response: WooResponse) -> Any:
+    """
+    מעדכן את המטמון עם המוצר שהחנות החזירה אחרי יצירה או עדכון,
+    כך שהקריאות הבאות נשארות חמות ועקביות בלי לשלוף מחדש
+    
+    Args:
+        response: תשובת ה-API
+    
+    Returns:
+        גוף התשובה
+    """
+    product = response.json()
+    if response.status_code < 400 and isinstance(product, dict) and "id" in product:
+        apply_change("products", product)
+        # מספר המוצרים בכל קטגוריה משתנה, ולכן רשימת הקטגוריות נשלפת מחדש בפעם הבאה
+        if product.get("categories"):
+            clear_cache_for_function("get_categories")
+    return product
+
+async def iter_products(params: Optional[Dict[str, Any]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    מחזיר את המוצרים בחנות דף אחרי דף, בלי להחזיק את כל הקטלוג בזיכרון
+    
+    Args:
+        params: פרמטרי שאילתה נוספים (אופציונלי)
+    
+    Yields:
+        רשימת המוצרים של כל דף
+    """
+    async for page in iter_pages(woocommerce, "products", params):
+        yield page
+
+async def iter_orders(params: Optional[Dict[str, Any]] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    מחזיר את ההזמנות בחנות דף אחרי דף, בלי להחזיק את כל ההזמנות בזיכרון
+    
+    Args:
+        params: פרמטרי שאילתה נוספים (אופציונלי)
+    
+    Yields:
+        רשימת ההזמנות של כל דף
+    """
+    async for page in iter_pages(woocommerce, "orders", params):
+        yield page
+
+async def create_product(product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     יוצר מוצר חדש בחנות
     
@@ -135,13 +465,13 @@ def create_product(product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     logger.info(f"Creating new product in store: {product_data.get('name', '')}")
     try:
-        response = woocommerce.post("products", data=product_data)
-        return response.json()
+        response = await woocommerce.post("products", data=product_data)
+        return _write_through(response)
     except Exception as e:
         logger.error(f"Error creating product: {e}")
         return None
 
-def update_product(product_id: int, product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+async def update_product(product_id: int, product_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     מעדכן מוצר קיים בחנות
     
@@ -154,13 +484,13 @@ def update_product(product_id: int, product_data: Dict[str, Any]) -> Optional[Di
     """
     logger.info(f"Updating product {product_id} in store")
     try:
-        response = woocommerce.put(f"products/{product_id}", data=product_data)
-        return response.json()
+        response = await woocommerce.put(f"products/{product_id}", data=product_data)
+        return _write_through(response)
     except Exception as e:
         logger.error(f"Error updating product {product_id}: {e}")
         return None
 
-def delete_product(product_id: int) -> bool:
+async def delete_product(product_id: int) -> bool:
     """
     מוחק מוצר מהחנות
     
@@ -172,8 +502,170 @@ def delete_product(product_id: int) -> bool:
     """
     logger.info(f"Deleting product {product_id} from store")
     try:
-        response = woocommerce.delete(f"products/{product_id}", params={"force": True})
-        return response.status_code == 200
+        response = await woocommerce.delete(f"products/{product_id}", params={"force": True})
+        if response.status_code != 200:
+            return False
+        apply_removal("products", product_id)
+        clear_cache_for_function("get_categories")
+        return True
     except Exception as e:
         logger.error(f"Error deleting product {product_id}: {e}")
-        return False 
\ No newline at end of file
+        return False
+
+def _batch_item_result(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ממיר פריט מתשובת products/batch לתוצאה אחידה - WooCommerce מחזיר שגיאה בתוך הפריט עצמו
+    """
+    error = item.get("error")
+    if error:
+        return {"ok": False, "id": item.get("id") or None, "error": error.get("message") or error.get("code")}
+    return {"ok": True, "id": item.get("id"), "item": item}
+
+async def _send_product_batch(chunk: List[Tuple[str, int, Any]]) -> List[Tuple[str, int, Dict[str, Any]]]:
+    """
+    שולח קבוצה אחת (עד 100 פעולות) ל-products/batch
+
+    Args:
+        chunk: רשימה של (סוג פעולה, מיקום בקלט, נתוני הפעולה)
+
+    Returns:
+        רשימה של (סוג פעולה, מיקום בקלט, תוצאה)
+    """
+    body: Dict[str, List[Any]] = {}
+    for operation, _, payload in chunk:
+        body.setdefault(operation, []).append(payload)
+
+    try:
+        response = await woocommerce.post("products/batch", data=body)
+        response.raise_for_status()
+        returned = response.json()
+    except WooCommerceError as e:
+        logger.error(f"Error in products batch of {len(chunk)} operations: {e}")
+        return [(operation, index, {"ok": False, "error": str(e)}) for operation, index, _ in chunk]
+
+    # WooCommerce מחזיר את התוצאות של כל סוג פעולה באותו סדר שבו נשלחו
+    positions: Dict[str, int] = {}
+    results = []
+    for operation, index, payload in chunk:
+        position = positions.get(operation, 0)
+        positions[operation] = position + 1
+        items = returned.get(operation) or []
+        if position < len(items):
+            result = _batch_item_result(items[position])
+        else:
+            result = {"ok": False, "error": "Missing result in batch response"}
+        if operation == "delete" and result.get("id") is None:
+            result["id"] = payload
+        results.append((operation, index, result))
+    return results
+
+async def batch_products(
+    create: Optional[List[Dict[str, Any]]] = None,
+    update: Optional[List[Dict[str, Any]]] = None,
+    delete: Optional[List[int]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    יוצר, מעדכן ומוחק מוצרים רבים דרך products/batch.
+    הפעולות מחולקות לקבוצות של עד WOO_BATCH_SIZE, שנשלחות במקביל עד WOO_BATCH_CONCURRENCY קבוצות בכל רגע.
+    
+    Args:
+        create: נתוני המוצרים ליצירה
+        update: נתוני המוצרים לעדכון (כל אחד כולל id)
+        delete: מזהי המוצרים למחיקה
+    
+    Returns:
+        מילון עם תוצאה לכל פריט בכל סוג פעולה, לפי סדר הקלט.
+        כל תוצאה כוללת ok, id, ו-item (בהצלחה) או error (בכישלון)
+    """
+    operations = [
+        (operation, index, payload)
+        for operation, payloads in (("create", create), ("update", update), ("delete", delete))
+        for index, payload in enumerate(payloads or [])
+    ]
+    results: Dict[str, List[Dict[str, Any]]] = {
+        operation: [{} for _ in payloads or []]
+        for operation, payloads in (("create", create), ("update", update), ("delete", delete))
+    }
+    if not operations:
+        return results
+
+    chunks = [operations[i:i + WOO_BATCH_SIZE] for i in range(0, len(operations), WOO_BATCH_SIZE)]
+    logger.info(f"Sending {len(operations)} product operations in {len(chunks)} batches")
+    semaphore = asyncio.Semaphore(WOO_BATCH_CONCURRENCY)
+
+    async def send(chunk: List[Tuple[str, int, Any]]) -> List[Tuple[str, int, Dict[str, Any]]]:
+        async with semaphore:
+            return await _send_product_batch(chunk)
+
+    categories_changed = False
+    for chunk_results in await asyncio.gather(*(send(chunk) for chunk in chunks)):
+        for operation, index, result in chunk_results:
+            results[operation][index] = result
+            if not result["ok"]:
+                continue
+            # עדכון המטמון לכל מוצר שהפעולה עליו הצליחה
+            if operation == "delete":
+                apply_removal("products", result["id"])
+                categories_changed = True
+            else:
+                apply_change("products", result["item"])
+                categories_changed = categories_changed or bool(result["item"].get("categories"))
+
+    if categories_changed:
+        clear_cache_for_function("get_categories")
+    return results
+
+# טעינות מוקדמות שלא הסתיימו בזמן - נשמרות כדי שימשיכו ברקע ולא ייאספו לפני שהסתיימו
+_WARMUP_TASKS: set = set()
+
+async def warm_up_cache(timeout: float = CACHE_WARMUP_TIMEOUT) -> None:
+    """
+    טוען במקביל את נתוני הליבה (פרטי החנות, קטגוריות, מוצרים והזמנות) למטמון, לפני שהבוט מתחיל לקבל הודעות.
+    הרשימות נטענות עם אותם שדות שהכלים מבקשים, כדי שהקריאה הראשונה של כל כלי תמצא אותן במטמון.
+    ערכים ששוחזרו מתמונת מצב ועדיין טריים מוגשים מהמטמון בלי לפנות לחנות.
+    טעינה שלא הסתיימה תוך timeout שניות ממשיכה ברקע, כדי לא לעכב את עליית הבוט.
+
+    Args:
+        timeout: זמן המתנה מקסימלי בשניות
+    """
+    started = asyncio.get_running_loop().time()
+    # אותם ארגומנטים בדיוק כמו ב-get_products_tool ובניתוחי ההזמנות, כדי שמפתחות המטמון יהיו זהים
+    product_fields = fields_for("get_products_tool")
+    loaders = {
+        "get_store_info": get_store_info,
+        "get_categories": get_categories,
+        "get_products": lambda: get_products(api_fields(product_fields) if product_fields else None),
+        "get_orders": lambda: get_orders(ANALYTICS_FIELDS)
+    }
+    tasks = {asyncio.create_task(load()): name for name, load in loaders.items()}
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+
+    for task in done:
+        if task.exception() is not None:
+            logger.warning(f"Cache warm-up of {tasks[task]} failed: {task.exception()}")
+    for task in pending:
+        _WARMUP_TASKS.add(task)
+        task.add_done_callback(_WARMUP_TASKS.discard)
+        logger.warning(f"Cache warm-up of {tasks[task]} is still running after {timeout:.0f} seconds, continuing in background")
+    logger.info(f"Cache warm-up finished in {asyncio.get_running_loop().time() - started:.2f} seconds")
+
+async def start_background_services() -> None:
+    """
+    מפעיל את שירותי הרקע של WooCommerce לפי ההגדרות
+    """
+    await shared_cache.start()
+    if MIRROR_ENABLED:
+        store_mirror.start(woocommerce)
+    if WEBHOOK_ENABLED:
+        await webhook_server.start()
+
+async def close_client() -> None:
+    """
+    עוצר את שירותי הרקע וסוגר את החיבורים הפתוחים ל-WooCommerce
+    """
+    if WEBHOOK_ENABLED:
+        await webhook_server.stop()
+    if MIRROR_ENABLED:
+        await store_mirror.stop()
+    await shared_cache.stop()
+    await woocommerce.close()
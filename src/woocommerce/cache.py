@@ -2,13 +2,25 @@
 מודול מטמון (cache) לשיפור ביצועי קריאות ל-WooCommerce API
 """
 
+import sys
 import time
-import json
+import heapq
+import asyncio
 import logging
-from typing import Dict, Any, Callable, Optional, TypeVar, cast
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Awaitable, Callable, Optional, Tuple, Hashable, TypeVar, cast
 from functools import wraps
 
-from src.config import CACHE_ENABLED, CACHE_EXPIRY
+from src.config import (
+    CACHE_ENABLED, CACHE_EXPIRY, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES,
+    CACHE_TTL_OVERRIDES, CACHE_STALE_WHILE_REVALIDATE, CACHE_MAX_STALENESS,
+    CACHE_MAX_STALENESS_OVERRIDES, CACHE_REFRESH_AHEAD_FUNCTIONS, CACHE_REFRESH_AHEAD_RATIO,
+    CACHE_NEGATIVE_EXPIRY, CACHE_OUTAGE_GRACE
+)
+from src.woocommerce.result import Result, WooCommerceError
+from src.woocommerce.serializer import dumps
+from src.woocommerce.shared_cache import shared_cache, Invalidation
 
 # הגדרת טיפוס גנרי לפונקציות
 T = TypeVar('T')
@@ -16,71 +28,915 @@ T = TypeVar('T')
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
 
-# מטמון גלובלי - מילון שמכיל את כל הנתונים במטמון
-# המפתח הוא מחרוזת המייצגת את שם הפונקציה והפרמטרים
-# הערך הוא מילון עם הנתונים והזמן שבו הם נשמרו
-CACHE: Dict[str, Dict[str, Any]] = {}
+# מפתח מטמון - טאפל שמתחיל בשם הפונקציה ואחריו הפרמטרים
+CacheKey = Tuple[Hashable, ...]
+
+# זמן התפוגה וחלון הערך הישן של כל פונקציה עטופה, כדי שעדכונים ישירים למטמון ישתמשו באותם זמנים
+FUNCTION_POLICIES: Dict[str, Tuple[int, int]] = {}
+
+# משימות רענון ברקע - נשמרות כדי שלא ייאספו לפני שהסתיימו
+_BACKGROUND_TASKS: set = set()
+
+
+class CacheCodec:
+    """
+    ממיר בין הערך שפונקציה מחזירה לבין הייצוג שנשמר במטמון (ברירת מחדל: אותו ערך).
+    מאפשר לשמור ערכים גדולים בייצוג קומפקטי ולשחזר אותם בכל קריאה מהמטמון.
+    """
+
+    def applies_to(self, cache_key: CacheKey) -> bool:
+        """
+        האם הממיר חל על קריאה מסוימת (ברירת מחדל: על כל הקריאות לפונקציה)
+        """
+        return True
+
+    def encode(self, value: Any) -> Any:
+        return value
+
+    def decode(self, stored: Any) -> Any:
+        return stored
+
+    def dump(self, stored: Any) -> Any:
+        """
+        ממיר ערך שמור למבנה פשוט (מילונים, רשימות, מחרוזות ומספרים) לשמירה בתמונת מצב
+        """
+        return stored
+
+    def load(self, plain: Any) -> Any:
+        """
+        משחזר ערך שמור ממבנה פשוט שנטען מתמונת מצב
+        """
+        return plain
+
+
+# הממיר של כל פונקציה עטופה שהוגדר לה ממיר, כדי שעדכונים ישירים למטמון יישמרו באותו ייצוג
+FUNCTION_CODECS: Dict[str, CacheCodec] = {}
+
+
+def _estimate_size(obj: Any, depth: int = 0) -> int:
+    """
+    מעריך את גודל האובייקט בזיכרון בבתים, כולל האובייקטים שהוא מכיל
+
+    Args:
+        obj: האובייקט
+        depth: עומק הרקורסיה הנוכחי
+
+    Returns:
+        הערכת הגודל בבתים
+    """
+    if hasattr(obj, "memory_footprint"):
+        return obj.memory_footprint()
+    size = sys.getsizeof(obj)
+    if depth > 20:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _estimate_size(key, depth + 1) + _estimate_size(value, depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += _estimate_size(item, depth + 1)
+    return size
+
+
+class CacheEntry:
+    """
+    רשומה במטמון
+    """
+    __slots__ = ("data", "timestamp", "expires_at", "stale_until", "size")
+
+    def __init__(self, data: Any, timestamp: float, expires_at: float, stale_until: float, size: int):
+        self.data = data
+        self.timestamp = timestamp
+        self.expires_at = expires_at  # עד מתי הערך טרי
+        self.stale_until = stale_until  # עד מתי מותר להגיש את הערך כישן בזמן רענון ברקע
+        self.size = size
+
+    def is_fresh(self, now: float) -> bool:
+        """
+        האם הערך עדיין טרי
+        """
+        return now < self.expires_at
+
+
+class CacheStore:
+    """
+    מטמון חסום בגודל: פינוי לפי LRU כשעוברים את מספר הרשומות או את תקציב הזיכרון,
+    ומחיקה פעילה של רשומות שעברו את זמן ההגשה המקסימלי שלהן (כולל חלון הערך הישן).
+    רשומות שעברו את חלון הערך הישן נשמרות עוד outage_grace שניות, רק כגיבוי לזמן שהחנות לא זמינה.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        outage_grace: float = 0
+    ):
+        """
+        Args:
+            max_entries: מספר רשומות מקסימלי
+            max_bytes: תקציב זיכרון משוער בבתים
+            outage_grace: כמה שניות אחרי חלון הערך הישן הרשומה נשמרת כגיבוי
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.outage_grace = outage_grace
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._by_function: Dict[Hashable, set] = {}
+        self._expiry_heap: List[Tuple[float, int, CacheKey]] = []
+        self._heap_counter = 0
+        self._lock = threading.RLock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.background_refreshes = 0
+        self.outage_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self._entries
+
+    def _remove(self, key: CacheKey) -> Optional[CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+            keys = self._by_function.get(key[0])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_function[key[0]]
+        return entry
+
+    def _purge_expired(self, now: float) -> None:
+        """
+        מוחק רשומות שפג תוקפן, לפי ערימה ממוינת של זמני תפוגה
+        """
+        heap = self._expiry_heap
+        while heap and heap[0][0] + self.outage_grace <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # רשומה שנכתבה מחדש מאז נשארת - הערך בערימה ישן
+            if entry is not None and entry.stale_until == expires_at:
+                self._remove(key)
+                self.expirations += 1
+
+        # בנייה מחדש של הערימה כשהיא מתמלאת בערכים ישנים
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [(entry.stale_until, i, key) for i, (key, entry) in enumerate(self._entries.items())]
+            heapq.heapify(self._expiry_heap)
+            self._heap_counter = len(self._expiry_heap)
+
+    def _evict(self) -> None:
+        """
+        מפנה את הרשומות שהשימוש בהן הכי ישן עד שהמטמון חוזר לגבולות שהוגדרו
+        """
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        מחזיר רשומה שעדיין מותר להגיש (טרייה או ישנה בחלון המותר),
+        או None אם היא לא קיימת
+        """
+        with self._lock:
+            now = time.time()
+            self._purge_expired(now)
+            entry = self._entries.get(key)
+            if entry is None or entry.stale_until <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def get_fallback(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        מחזיר את הערך האחרון שנשמר, גם אם עבר את חלון הערך הישן -
+        לשימוש רק כשהחנות לא זמינה
+        """
+        with self._lock:
+            self._purge_expired(time.time())
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.outage_hits += 1
+            return entry
+
+    def peek(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        מחזיר רשומה בלי לעדכן את סדר השימוש ואת הסטטיסטיקות
+        """
+        with self._lock:
+            self._purge_expired(time.time())
+            return self._entries.get(key)
+
+    def set(
+        self,
+        key: CacheKey,
+        data: Any,
+        expiry: float,
+        max_stale: float = 0,
+        timestamp: Optional[float] = None
+    ) -> None:
+        """
+        שומר ערך במטמון
+
+        Args:
+            key: מפתח המטמון
+            data: הערך לשמירה
+            expiry: זמן התפוגה בשניות
+            max_stale: כמה שניות אחרי התפוגה מותר עדיין להגיש את הערך כישן
+            timestamp: זמן השמירה (ברירת מחדל: עכשיו)
+        """
+        now = time.time() if timestamp is None else timestamp
+        size = _estimate_size(data)
+        if size > self.max_bytes:
+            logger.warning(f"Value for {key[0]} is larger than the cache budget ({size} bytes), not caching")
+            # הערך הקודם של המפתח כבר לא עדכני - אסור להמשיך להגיש אותו
+            with self._lock:
+                self._remove(key)
+            return
+
+        entry = CacheEntry(data, now, now + expiry, now + expiry + max_stale, size)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._by_function.setdefault(key[0], set()).add(key)
+            self.total_bytes += size
+            self._heap_counter += 1
+            heapq.heappush(self._expiry_heap, (entry.stale_until, self._heap_counter, key))
+            self._purge_expired(time.time())
+            self._evict()
+
+    def replace_data(self, key: CacheKey, data: Any) -> None:
+        """
+        מחליף את הערך של רשומה קיימת בלי לשנות את זמן התפוגה שלה
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            size = _estimate_size(data)
+            self.total_bytes += size - entry.size
+            entry.data = data
+            entry.size = size
+            self._evict()
+
+    def pop(self, key: CacheKey, default: Any = None) -> Any:
+        """
+        מוחק רשומה ומחזיר אותה
+        """
+        with self._lock:
+            entry = self._remove(key)
+            return default if entry is None else entry
+
+    def export(self) -> List[Tuple[CacheKey, CacheEntry]]:
+        """
+        מחזיר את כל הרשומות השמורות, מהפחות ליותר בשימוש
+        """
+        with self._lock:
+            self._purge_expired(time.time())
+            return list(self._entries.items())
+
+    def keys_for(self, function_name: str) -> List[CacheKey]:
+        """
+        מחזיר את כל המפתחות השמורים עבור פונקציה
+        """
+        with self._lock:
+            return list(self._by_function.get(function_name, ()))
+
+    def clear(self) -> None:
+        """
+        מנקה את כל המטמון
+        """
+        with self._lock:
+            self._entries.clear()
+            self._by_function.clear()
+            self._expiry_heap.clear()
+            self.total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על המטמון
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits,
+            "background_refreshes": self.background_refreshes,
+            "outage_hits": self.outage_hits
+        }
+
+
+class _Call:
+    """
+    קריאה סינכרונית שנמצאת בביצוע, שקוראים נוספים ממתינים לתוצאתה
+    """
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    איחוד קריאות זהות בו-זמניות: קוראים שמבקשים את אותו מפתח בזמן שקריאה
+    כבר בביצוע ממתינים לתוצאה שלה במקום לשלוח בקשה נוספת לחנות.
+    תומך גם ב-threads וגם ב-asyncio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[CacheKey, _Call] = {}
+        self._tasks: Dict[Tuple[int, CacheKey], "asyncio.Task[Any]"] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: CacheKey, fn: Callable[[], T]) -> T:
+        """
+        מריץ את הפונקציה פעם אחת לכל מפתח, גם אם נקראה במקביל מכמה threads
+
+        Args:
+            key: מפתח הקריאה
+            fn: הפונקציה להרצה
+
+        Returns:
+            תוצאת הפונקציה
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return cast(T, call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def do_async(self, key: CacheKey, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        מריץ את הקורוטינה פעם אחת לכל מפתח, גם אם נקראה במקביל מכמה משימות.
+        הקריאה רצה כמשימה נפרדת, כך שביטול של אחד הממתינים לא מבטל אותה עבור האחרים.
+
+        Args:
+            key: מפתח הקריאה
+            fn: פונקציה שמחזירה את הקורוטינה להרצה
+
+        Returns:
+            תוצאת הקורוטינה
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        task = self._tasks.get(flight_key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = loop.create_task(fn())
+            self._tasks[flight_key] = task
+            self.executed += 1
+
+            def done(finished: "asyncio.Task[Any]") -> None:
+                self._tasks.pop(flight_key, None)
+                # מסמן את השגיאה כנקראה גם אם כל הממתינים בוטלו
+                if not finished.cancelled():
+                    finished.exception()
+
+            task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על איחוד הקריאות
+        """
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._tasks)
+        }
+
+
+# מטמון גלובלי - המפתח הוא טאפל של שם הפונקציה והפרמטרים שלה
+CACHE = CacheStore(outage_grace=CACHE_OUTAGE_GRACE)
+
+# מטמון שלילי - כישלונות אחרונים של קריאות, לזמן קצר בלבד
+NEGATIVE_CACHE = CacheStore(max_bytes=1024 * 1024)
+
+# איחוד קריאות בו-זמניות לאותו מפתח מטמון
+FLIGHTS = SingleFlight()
+
+def _codec_for(cache_key: CacheKey) -> Optional[CacheCodec]:
+    codec = FUNCTION_CODECS.get(cache_key[0])
+    return codec if codec is not None and codec.applies_to(cache_key) else None
+
+def _codec_dump(cache_key: CacheKey) -> Callable[[Any], Any]:
+    codec = _codec_for(cache_key)
+    return codec.dump if codec is not None else (lambda value: value)
+
+def _apply_shared_invalidation(invalidation: Invalidation) -> None:
+    """
+    מוחק מהמטמון שבזיכרון רשומות שתהליך אחר ביטל או עדכן (בלי להפיץ את הביטול שוב).
+    הקריאה הבאה תטען את הערך העדכני מהמטמון המשותף.
+    """
+    function_name, cache_key = invalidation
+    if function_name is None:
+        CACHE.clear()
+        NEGATIVE_CACHE.clear()
+    elif cache_key is None:
+        for key in CACHE.keys_for(function_name):
+            CACHE.pop(key)
+        for key in NEGATIVE_CACHE.keys_for(function_name):
+            NEGATIVE_CACHE.pop(key)
+    else:
+        CACHE.pop(cache_key)
+        NEGATIVE_CACHE.pop(cache_key)
+    logger.debug(f"Applied shared cache invalidation for {function_name or 'all functions'}")
+
+shared_cache.on_invalidate = _apply_shared_invalidation
+
+def _longest_retention() -> float:
+    """
+    הגיל המקסימלי של רשומה שעוד אפשר להגיש מהמטמון המשותף - זמן התפוגה וחלון הערך הישן הארוכים ביותר
+    """
+    return max(
+        (cache_expiry + max_stale for cache_expiry, max_stale in FUNCTION_POLICIES.values()),
+        default=CACHE_EXPIRY + CACHE_MAX_STALENESS
+    )
+
+shared_cache.max_age = _longest_retention
+
+def _promote_shared(
+    function_name: str,
+    cache_key: CacheKey,
+    row: Optional[Tuple[Any, float]],
+    cache_expiry: float,
+    max_stale: float
+) -> Optional[CacheEntry]:
+    """
+    מעתיק רשומה מהמטמון המשותף למטמון שבזיכרון, עם זמן השמירה המקורי שלה
+
+    Returns:
+        הרשומה במטמון שבזיכרון, או None אם אין רשומה או שעבר זמן ההגשה שלה
+    """
+    if row is None:
+        return None
+    data, timestamp = row
+    if timestamp + cache_expiry + max_stale <= time.time():
+        return None
+    codec = _codec_for(cache_key)
+    CACHE.set(cache_key, codec.load(data) if codec is not None else data, cache_expiry, max_stale, timestamp=timestamp)
+    return CACHE.peek(cache_key)
 
 def clear_cache() -> None:
     """
-    מנקה את כל המטמון
+    מנקה את כל המטמון, כולל המטמון המשותף של כל התהליכים
     """
-    global CACHE
     logger.info("Clearing cache")
     CACHE.clear()
+    NEGATIVE_CACHE.clear()
+    shared_cache.invalidate()
 
 def clear_cache_for_function(function_name: str) -> None:
     """
     מנקה את המטמון עבור פונקציה מסוימת
-    
+
     Args:
         function_name: שם הפונקציה שעבורה יש לנקות את המטמון
     """
-    global CACHE
-    keys_to_remove = [key for key in CACHE if key.startswith(f"{function_name}:")]
-    for key in keys_to_remove:
-        del CACHE[key]
+    for key in CACHE.keys_for(function_name):
+        CACHE.pop(key)
+    for key in NEGATIVE_CACHE.keys_for(function_name):
+        NEGATIVE_CACHE.pop(key)
+    shared_cache.invalidate(function_name)
     logger.info(f"Clearing cache for function {function_name}")
 
-def cached(expiry: Optional[int] = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+def get_cache_stats() -> Dict[str, Any]:
     """
-    דקורטור שמטמין את התוצאה של פונקציה
-    
+    קבלת סטטיסטיקות על המטמון
+
+    Returns:
+        מילון עם סטטיסטיקות
+    """
+    stats = CACHE.get_stats()
+    stats["negative_entries"] = len(NEGATIVE_CACHE)
+    stats["singleflight"] = FLIGHTS.get_stats()
+    stats["tiers"] = {
+        "l1": {"hits": stats["hits"], "misses": stats["misses"], "hit_rate": stats["hit_rate"]},
+        "l2": shared_cache.get_stats()
+    }
+    # יבוא מקומי - מודול הקטלוג מייבא את המטמון
+    from src.woocommerce.catalog import get_catalog_stats
+    stats["catalog"] = get_catalog_stats()
+    return stats
+
+def dump_cache_entries() -> List[Tuple[CacheKey, Any, float, float, float]]:
+    """
+    מחזיר את כל רשומות המטמון כמבנים פשוטים לשמירה בתמונת מצב, עם זמני התפוגה שלהן
+
+    Returns:
+        רשימה של (מפתח, ערך, זמן שמירה, טרי עד, ישן עד), מהפחות ליותר בשימוש
+    """
+    entries = []
+    for key, entry in CACHE.export():
+        codec = _codec_for(key)
+        data = codec.dump(entry.data) if codec is not None else entry.data
+        entries.append((key, data, entry.timestamp, entry.expires_at, entry.stale_until))
+    return entries
+
+def restore_cache_entries(entries: List[Tuple[CacheKey, Any, float, float, float]]) -> int:
+    """
+    משחזר רשומות מתמונת מצב עם זמני התפוגה המקוריים שלהן.
+    רשומות שעבר זמנן (כולל חלון הגיבוי לזמן שהחנות לא זמינה) מדולגות.
+
+    Args:
+        entries: הרשומות כפי שהוחזרו מ-dump_cache_entries
+
+    Returns:
+        מספר הרשומות ששוחזרו
+    """
+    now = time.time()
+    restored = 0
+    for key, data, timestamp, expires_at, stale_until in entries:
+        if stale_until + CACHE.outage_grace <= now:
+            continue
+        codec = _codec_for(key)
+        CACHE.set(
+            key,
+            codec.load(data) if codec is not None else data,
+            expires_at - timestamp,
+            stale_until - expires_at,
+            timestamp=timestamp
+        )
+        restored += 1
+    return restored
+
+def make_cache_key(function_name: str, *args: Any, **kwargs: Any) -> CacheKey:
+    """
+    יוצר מפתח מטמון ייחודי לפונקציה והפרמטרים שלה.
+    לפרמטרים פשוטים (מספרים, מחרוזות) המפתח הוא טאפל שזול לחשב;
+    רק פרמטרים שאינם ניתנים ל-hash (רשימות, מילונים) עוברים סריאליזציה.
+
+    Args:
+        function_name: שם הפונקציה
+        args: הפרמטרים הפוזיציונליים
+        kwargs: הפרמטרים בשם
+
+    Returns:
+        מפתח המטמון
+    """
+    key = (function_name, args, tuple(sorted(kwargs.items())) if kwargs else ())
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return (function_name, dumps(args, sort_keys=True), dumps(kwargs, sort_keys=True))
+
+def _policy_for(function_name: str) -> Tuple[int, int]:
+    return FUNCTION_POLICIES.get(function_name, (CACHE_EXPIRY, 0))
+
+def _store_entry(cache_key: CacheKey, value: Any, broadcast: bool) -> None:
+    cache_expiry, max_stale = _policy_for(cache_key[0])
+    codec = _codec_for(cache_key)
+    stored = codec.encode(value) if codec is not None else value
+    CACHE.set(cache_key, stored, cache_expiry, max_stale)
+    NEGATIVE_CACHE.pop(cache_key)
+    shared_cache.put(cache_key, stored, time.time(), _codec_dump(cache_key), broadcast=broadcast)
+
+def set_cache_entry(function_name: str, value: Any, *args: Any, **kwargs: Any) -> None:
+    """
+    שומר ערך חדש במטמון עבור קריאה מסוימת לפונקציה, אחרי שהנתונים השתנו.
+    שאר התהליכים מקבלים ביטול, כדי שלא יגישו את הערך הקודם.
+
+    Args:
+        function_name: שם הפונקציה
+        value: הערך לשמירה
+        args: הפרמטרים הפוזיציונליים של הקריאה
+        kwargs: הפרמטרים בשם של הקריאה
+    """
+    _store_entry(make_cache_key(function_name, *args, **kwargs), value, broadcast=True)
+
+def fill_cache_entry(function_name: str, value: Any, *args: Any, **kwargs: Any) -> None:
+    """
+    שומר במטמון ערך שנקרא מהחנות עבור קריאה מסוימת לפונקציה (למשל פריט מתוך שליפה מקובצת).
+    זו קריאה ולא שינוי, ולכן שאר התהליכים לא מקבלים ביטול.
+
     Args:
-        expiry: זמן תפוגה בשניות (ברירת מחדל: CACHE_EXPIRY מקובץ ההגדרות)
-    
+        function_name: שם הפונקציה
+        value: הערך לשמירה
+        args: הפרמטרים הפוזיציונליים של הקריאה
+        kwargs: הפרמטרים בשם של הקריאה
+    """
+    _store_entry(make_cache_key(function_name, *args, **kwargs), value, broadcast=False)
+
+def invalidate_cache_entry(function_name: str, *args: Any, **kwargs: Any) -> None:
+    """
+    מוחק מהמטמון את התוצאה של קריאה מסוימת לפונקציה
+
+    Args:
+        function_name: שם הפונקציה
+        args: הפרמטרים הפוזיציונליים של הקריאה
+        kwargs: הפרמטרים בשם של הקריאה
+    """
+    cache_key = make_cache_key(function_name, *args, **kwargs)
+    CACHE.pop(cache_key)
+    shared_cache.invalidate(function_name, cache_key)
+
+def peek_cached_value(function_name: str, *args: Any, **kwargs: Any) -> Any:
+    """
+    מחזיר את הערך השמור (בייצוג שבו נשמר) עבור קריאה מסוימת לפונקציה, בלי לעדכן סטטיסטיקות
+
+    Args:
+        function_name: שם הפונקציה
+        args: הפרמטרים הפוזיציונליים של הקריאה
+        kwargs: הפרמטרים בשם של הקריאה
+
+    Returns:
+        הערך השמור, או None אם אין ערך שמותר עדיין להגיש
+    """
+    entry = CACHE.peek(make_cache_key(function_name, *args, **kwargs))
+    if entry is None or entry.stale_until <= time.time():
+        return None
+    return entry.data
+
+def _project_for_key(cache_key: CacheKey, item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    מצמצם פריט לשדות שהקריאה ביקשה (פרמטר fields, כמו _fields ב-API), כדי שרשימה מוטלת
+    תישאר עם פריטים באותה צורה. שדה מקונן ("a.b") שומר את כל השדה העליון שלו.
+    """
+    _, args, kwargs = cache_key
+    if not isinstance(args, tuple):
+        return item
+    fields = args[0] if args else dict(kwargs).get("fields")
+    if not fields:
+        return item
+    wanted = {name.strip().split(".")[0] for name in fields.split(",")}
+    return {key: value for key, value in item.items() if key in wanted}
+
+def patch_cached_lists(function_name: str, item: Dict[str, Any], remove: bool = False) -> int:
+    """
+    מעדכן במקום את כל הרשימות השמורות במטמון עבור פונקציה - מחליף, מוסיף או מסיר פריט לפי מזהה.
+    ברשימות שנשמרו עם fields הפריט מצומצם לאותם שדות.
+    ערכים שנשמרו בייצוג אחר (למשל קטלוג קומפקטי) מתעדכנים דרך המתודה patch שלהם.
+
+    Args:
+        function_name: שם הפונקציה שמחזירה רשימה
+        item: הפריט (חייב לכלול מזהה id)
+        remove: האם להסיר את הפריט במקום לעדכן אותו
+
+    Returns:
+        מספר הרשימות שעודכנו
+    """
+    patched = 0
+    for key in CACHE.keys_for(function_name):
+        entry = CACHE.peek(key)
+        if entry is None:
+            continue
+        if hasattr(entry.data, "patch"):
+            entry.data.patch(item, remove=remove)
+            CACHE.replace_data(key, entry.data)
+            shared_cache.put(key, entry.data, entry.timestamp, _codec_dump(key), broadcast=True)
+            patched += 1
+            continue
+        if not isinstance(entry.data, list):
+            continue
+        # יוצר רשימה חדשה כדי לא לשנות רשימה שכבר הוחזרה למי שקרא לפונקציה
+        items = list(entry.data)
+        projected = _project_for_key(key, item)
+        index = next((i for i, existing in enumerate(items) if existing.get("id") == item["id"]), None)
+        if index is not None:
+            if remove:
+                del items[index]
+            else:
+                items[index] = projected
+        elif not remove:
+            items.insert(0, projected)
+        CACHE.replace_data(key, items)
+        shared_cache.put(key, items, entry.timestamp, _codec_dump(key), broadcast=True)
+        patched += 1
+    return patched
+
+def _schedule_refresh(function_name: str, cache_key: CacheKey, load: Callable[[], Any], is_async: bool) -> None:
+    """
+    מתזמן רענון ברקע של רשומה. הרענון עובר דרך איחוד הקריאות,
+    כך שלכל היותר רענון אחד לכל מפתח רץ בכל רגע.
+    """
+    CACHE.background_refreshes += 1
+
+    def log_failure(error: BaseException) -> None:
+        logger.error(f"Background refresh of {function_name} failed: {error}")
+
+    if is_async:
+        async def refresh() -> None:
+            try:
+                await FLIGHTS.do_async(cache_key, load)
+            except Exception as e:
+                log_failure(e)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        _BACKGROUND_TASKS.add(task)
+        task.add_done_callback(_BACKGROUND_TASKS.discard)
+    else:
+        def refresh_in_thread() -> None:
+            try:
+                FLIGHTS.do(cache_key, load)
+            except Exception as e:
+                log_failure(e)
+
+        threading.Thread(target=refresh_in_thread, daemon=True).start()
+
+def cached(
+    expiry: Optional[int] = None,
+    bypass: Optional[Callable[[], bool]] = None,
+    max_stale: Optional[int] = None,
+    refresh_ahead: Optional[bool] = None,
+    codec: Optional[CacheCodec] = None
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    דקורטור שמטמין את התוצאה של פונקציה.
+    כשערך פג תוקף הוא מוגש מיד כערך ישן (עד max_stale שניות) ומתוזמן רענון ברקע,
+    כך שהמשתמש לא ממתין לחנות. פונקציות חמות מתרעננות עוד לפני שהן פגות.
+    כישלונות (WooCommerceError) אינם נשמרים במטמון הרגיל אלא רק במטמון שלילי קצר,
+    והפונקציה העטופה מקבלת מתודה result() שמחזירה Result במקום לזרוק שגיאה.
+
+    Args:
+        expiry: זמן תפוגה בשניות (ברירת מחדל: CACHE_TTL_OVERRIDES או CACHE_EXPIRY מקובץ ההגדרות)
+        bypass: פונקציה שמחזירה True כשיש לדלג על המטמון, למשל כשהנתונים מוגשים מהמראה המקומית (אופציונלי)
+        max_stale: כמה שניות אחרי התפוגה מותר להגיש ערך ישן (ברירת מחדל: CACHE_MAX_STALENESS, 0 מבטל)
+        refresh_ahead: האם לרענן ברקע לפני התפוגה (ברירת מחדל: לפי CACHE_REFRESH_AHEAD_FUNCTIONS)
+        codec: ממיר לייצוג שנשמר במטמון, למשל קטלוג קומפקטי במקום רשימת מילונים (אופציונלי)
+
     Returns:
         הפונקציה המקורית עטופה במנגנון מטמון
     """
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        name = func.__name__
+        cache_expiry = CACHE_TTL_OVERRIDES.get(name, expiry if expiry is not None else CACHE_EXPIRY)
+        if not CACHE_STALE_WHILE_REVALIDATE:
+            cache_max_stale = 0
+        else:
+            cache_max_stale = CACHE_MAX_STALENESS_OVERRIDES.get(
+                name, max_stale if max_stale is not None else CACHE_MAX_STALENESS
+            )
+        refresh_ahead_after = None
+        if refresh_ahead if refresh_ahead is not None else name in CACHE_REFRESH_AHEAD_FUNCTIONS:
+            refresh_ahead_after = cache_expiry * CACHE_REFRESH_AHEAD_RATIO
+        FUNCTION_POLICIES[name] = (cache_expiry, cache_max_stale)
+        if codec is not None:
+            FUNCTION_CODECS[name] = codec
+
+        def decode(cache_key: CacheKey, stored: Any) -> T:
+            key_codec = _codec_for(cache_key)
+            return key_codec.decode(stored) if key_codec is not None else stored
+
+        def needs_refresh(entry: CacheEntry, now: float) -> bool:
+            # ערך ישן תמיד מתרענן; ערך טרי מתרענן מראש רק בפונקציות חמות
+            if not entry.is_fresh(now):
+                CACHE.stale_hits += 1
+                logger.debug(f"Returning stale result from cache for {name}, refreshing in background")
+                return True
+            return refresh_ahead_after is not None and now - entry.timestamp >= refresh_ahead_after
+
+        def store(cache_key: CacheKey, result: Any) -> T:
+            key_codec = _codec_for(cache_key)
+            stored = key_codec.encode(result) if key_codec is not None else result
+            CACHE.set(cache_key, stored, cache_expiry, cache_max_stale)
+            NEGATIVE_CACHE.pop(cache_key)
+            shared_cache.put(cache_key, stored, time.time(), _codec_dump(cache_key))
+            logger.debug(f"Saving result to cache for {name}")
+            # כל הקוראים מקבלים את הערך כפי שהוא משוחזר מהמטמון, גם הקורא הראשון
+            return decode(cache_key, stored)
+
+        def remember_failure(cache_key: CacheKey, error: WooCommerceError) -> None:
+            # כישלון נשמר לזמן קצר בלבד, כדי לא להציף חנות שכבר מתקשה
+            NEGATIVE_CACHE.set(cache_key, error, CACHE_NEGATIVE_EXPIRY)
+            logger.warning(f"Caching failure of {name} for {CACHE_NEGATIVE_EXPIRY} seconds: {error}")
+
+        def failure_result(cache_key: CacheKey, error: WooCommerceError) -> Result[T]:
+            # כשהחנות לא זמינה מגישים את הערך האחרון שנשמר, גם אם הוא ישן
+            if error.retryable:
+                fallback = CACHE.get_fallback(cache_key)
+                if fallback is not None:
+                    logger.warning(f"Serving last known result of {name} while WooCommerce is unavailable")
+                    return Result(decode(cache_key, fallback.data), stale=True)
+            return Result(error=error)
+
+        # פונקציות אסינכרוניות מקבלות עוטף אסינכרוני כדי שלא יחסמו את לולאת האירועים
+        if asyncio.iscoroutinefunction(func):
+            async def fetch_result(*args: Any, **kwargs: Any) -> Result[T]:
+                # אם המטמון מושבת, פשוט מריץ את הפונקציה המקורית
+                if not CACHE_ENABLED or (bypass is not None and bypass()):
+                    try:
+                        return Result(await func(*args, **kwargs))
+                    except WooCommerceError as e:
+                        return Result(error=e)
+
+                cache_key = make_cache_key(name, *args, **kwargs)
+
+                # קוראים בו-זמניים לאותו מפתח חולקים קריאה אחת לחנות
+                async def load() -> T:
+                    return store(cache_key, await func(*args, **kwargs))
+
+                cached_result = CACHE.get(cache_key)
+                if cached_result is None and shared_cache.enabled:
+                    # החמצה במטמון שבזיכרון - בודקים את המטמון המשותף לפני שפונים לחנות
+                    row = await shared_cache.get_async(cache_key)
+                    cached_result = _promote_shared(name, cache_key, row, cache_expiry, cache_max_stale)
+                if cached_result is not None:
+                    now = time.time()
+                    if needs_refresh(cached_result, now):
+                        _schedule_refresh(name, cache_key, load, is_async=True)
+                    return Result(decode(cache_key, cached_result.data), stale=not cached_result.is_fresh(now))
+
+                failure = NEGATIVE_CACHE.get(cache_key)
+                if failure is not None:
+                    return failure_result(cache_key, failure.data)
+
+                # אם אין תוצאה במטמון, מריץ את הפונקציה ושומר את התוצאה
+                try:
+                    return Result(await FLIGHTS.do_async(cache_key, load))
+                except WooCommerceError as e:
+                    remember_failure(cache_key, e)
+                    return failure_result(cache_key, e)
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> T:
+                return (await fetch_result(*args, **kwargs)).unwrap()
+
+            async_wrapper.result = fetch_result
+            return cast(Callable[..., T], async_wrapper)
+
+        def fetch_result_sync(*args: Any, **kwargs: Any) -> Result[T]:
+            # אם המטמון מושבת, פשוט מריץ את הפונקציה המקורית
+            if not CACHE_ENABLED or (bypass is not None and bypass()):
+                try:
+                    return Result(func(*args, **kwargs))
+                except WooCommerceError as e:
+                    return Result(error=e)
+
+            cache_key = make_cache_key(name, *args, **kwargs)
+
+            # קוראים בו-זמניים לאותו מפתח חולקים קריאה אחת לחנות
+            def load() -> T:
+                return store(cache_key, func(*args, **kwargs))
+
+            cached_result = CACHE.get(cache_key)
+            if cached_result is None and shared_cache.enabled:
+                # החמצה במטמון שבזיכרון - בודקים את המטמון המשותף לפני שפונים לחנות
+                row = shared_cache.get(cache_key)
+                cached_result = _promote_shared(name, cache_key, row, cache_expiry, cache_max_stale)
+            if cached_result is not None:
+                now = time.time()
+                if needs_refresh(cached_result, now):
+                    _schedule_refresh(name, cache_key, load, is_async=False)
+                return Result(decode(cache_key, cached_result.data), stale=not cached_result.is_fresh(now))
+
+            failure = NEGATIVE_CACHE.get(cache_key)
+            if failure is not None:
+                return failure_result(cache_key, failure.data)
+
+            # אם אין תוצאה במטמון, מריץ את הפונקציה ושומר את התוצאה
+            try:
+                return Result(FLIGHTS.do(cache_key, load))
+            except WooCommerceError as e:
+                remember_failure(cache_key, e)
+                return failure_result(cache_key, e)
+
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> T:
-            # אם המטמון מושבת, פשוט מריץ את הפונקציה המקורית
-            if not CACHE_ENABLED:
-                return func(*args, **kwargs)
-            
-            # יוצר מפתח ייחודי לפונקציה והפרמטרים שלה
-            cache_key = f"{func.__name__}:{json.dumps(args)}:{json.dumps(kwargs, sort_keys=True)}"
-            
-            # בודק אם יש תוצאה במטמון ואם היא עדיין תקפה
-            current_time = time.time()
-            cache_expiry = expiry if expiry is not None else CACHE_EXPIRY
-            
-            if cache_key in CACHE:
-                cached_result = CACHE[cache_key]
-                if current_time - cached_result["timestamp"] < cache_expiry:
-                    logger.debug(f"Returning result from cache for {func.__name__}")
-                    return cast(T, cached_result["data"])
-            
-            # אם אין תוצאה במטמון או שהיא פגה, מריץ את הפונקציה ושומר את התוצאה
-            result = func(*args, **kwargs)
-            CACHE[cache_key] = {
-                "data": result,
-                "timestamp": current_time
-            }
-            logger.debug(f"Saving result to cache for {func.__name__}")
-            return result
-        
+            return fetch_result_sync(*args, **kwargs).unwrap()
+
+        wrapper.result = fetch_result_sync
         return wrapper
-    
-    return decorator 
\ No newline at end of file
+
+    return decorator
@@ -0,0 +1,306 @@
+"""
+ייצוג קומפקטי של קטלוג המוצרים בזיכרון - לחנויות גדולות.
+כל מוצר נשמר כרשומה עם __slots__ של השדות החמים בלבד, ערכים חוזרים (סטטוסים, קטגוריות, תגיות)
+נשמרים פעם אחת ומשותפים בין המוצרים, והשדות הקרים (תיאורים, תמונות, meta_data) נשמרים דחוסים
+ונפתחים רק כשמבקשים מוצר מלא.
+"""
+
+import logging
+import sys
+import threading
+import weakref
+import zlib
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from src.woocommerce.cache import CacheCodec, CacheKey
+from src.woocommerce.serializer import dumps_bytes, loads
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# השדות שנשמרים ישירות ברשומה - מה שרשימות המוצרים, החיפוש והכלים צריכים
+HOT_FIELDS: Tuple[str, ...] = (
+    "id", "parent_id", "name", "slug", "sku", "type", "status", "featured",
+    "price", "regular_price", "sale_price", "on_sale",
+    "stock_status", "stock_quantity", "manage_stock", "total_sales",
+    "categories", "tags", "permalink", "date_modified"
+)
+
+# שדות שהערכים שלהם חוזרים על עצמם בין מוצרים רבים ולכן נשמרים פעם אחת (interning)
+INTERNED_FIELDS = frozenset({"type", "status", "stock_status", "price", "regular_price", "sale_price"})
+
+# שדות של רשימת מונחים (קטגוריות, תגיות) - כל מונח נשמר פעם אחת בטבלה משותפת
+TERM_FIELDS = ("categories", "tags")
+
+# שדות שמעולם לא נדרשים - לא נשמרים כלל
+DROPPED_FIELDS = frozenset({"_links"})
+
+# רמת הדחיסה של השדות הקרים
+COLD_COMPRESSION_LEVEL = 6
+
+
+class ProductRecord:
+    """
+    רשומת מוצר קומפקטית - השדות החמים כ-slots, והשדות הקרים כ-JSON דחוס
+    """
+    __slots__ = HOT_FIELDS + ("present", "cold")
+
+    def __init__(self):
+        self.present: Tuple[str, ...] = ()  # השדות החמים שהופיעו במוצר המקורי, לפי הסדר
+        self.cold: Optional[bytes] = None
+
+
+class CompactCatalog:
+    """
+    קטלוג מוצרים קומפקטי. שומר על הסדר של הרשימה המקורית ותומך בעדכון ובהסרה במקום,
+    כך שהוא יכול לשמש כערך במטמון של get_products.
+    """
+
+    def __init__(self, products: Iterable[Dict[str, Any]] = ()):
+        """
+        Args:
+            products: המוצרים כפי שהתקבלו מהחנות
+        """
+        self._records: Dict[Any, ProductRecord] = {}  # מזהה -> רשומה, לפי סדר הרשימה
+        self._terms: Dict[Tuple[Any, ...], Dict[str, Any]] = {}  # מונח (קטגוריה או תגית) משותף
+        self._term_tuples: Dict[Tuple[int, ...], Tuple[Dict[str, Any], ...]] = {}  # צירופי מונחים משותפים
+        self._layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}  # סדרי שדות משותפים
+        self._lock = threading.RLock()
+        self._footprint: Optional[int] = None
+        self.raw_bytes = 0  # הגודל המשוער של המוצרים המקוריים כמילונים, בזמן הטעינה
+        for product in products:
+            self.raw_bytes += _deep_size(product)
+            self.upsert(product)
+        _CATALOGS.add(self)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _intern_terms(self, terms: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], ...]:
+        shared = []
+        for term in terms:
+            key = tuple(sorted(term.items(), key=lambda pair: pair[0]))
+            try:
+                shared.append(self._terms.setdefault(key, dict(term)))
+            except TypeError:
+                # מונח עם ערכים שאינם ניתנים ל-hash לא משותף, וגם הצירוף שלו לא
+                return tuple(dict(term) for term in terms)
+        identities = tuple(id(term) for term in shared)
+        return self._term_tuples.setdefault(identities, tuple(shared))
+
+    def _encode(self, product: Dict[str, Any]) -> ProductRecord:
+        record = ProductRecord()
+        present = []
+        cold = {}
+        for key, value in product.items():
+            if key in DROPPED_FIELDS:
+                continue
+            if key not in HOT_FIELDS:
+                cold[key] = value
+                continue
+            if key in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            elif key in TERM_FIELDS and isinstance(value, list):
+                value = self._intern_terms(value)
+            setattr(record, key, value)
+            present.append(key)
+        record.present = self._layouts.setdefault(tuple(present), tuple(present))
+        if cold:
+            record.cold = zlib.compress(dumps_bytes(cold), COLD_COMPRESSION_LEVEL)
+        return record
+
+    @staticmethod
+    def _hot_fields(record: ProductRecord) -> Dict[str, Any]:
+        product = {}
+        for key in record.present:
+            value = getattr(record, key)
+            # מונחים משותפים מוחזרים כעותקים, כדי שמי שמשנה את התוצאה לא ישנה את הקטלוג
+            product[key] = [dict(term) for term in value] if key in TERM_FIELDS and isinstance(value, tuple) else value
+        return product
+
+    def upsert(self, product: Dict[str, Any]) -> None:
+        """
+        מוסיף מוצר או מחליף את הגרסה הקיימת שלו (מוצר חדש נכנס לראש הרשימה, כמו ברשימה במטמון)
+        """
+        if "id" not in product:
+            return
+        with self._lock:
+            record = self._encode(product)
+            if product["id"] in self._records or not self._records:
+                self._records[product["id"]] = record
+            else:
+                self._records = {product["id"]: record, **self._records}
+            self._footprint = None
+
+    def remove(self, product_id: Any) -> None:
+        """
+        מסיר מוצר מהקטלוג
+        """
+        with self._lock:
+            if self._records.pop(product_id, None) is not None:
+                self._footprint = None
+
+    def patch(self, item: Dict[str, Any], remove: bool = False) -> None:
+        """
+        מעדכן את הקטלוג במקום כשמוצר משתנה - הממשק שבו patch_cached_lists מעדכן ערכים שאינם רשימות
+        """
+        if remove:
+            self.remove(item["id"])
+        else:
+            self.upsert(item)
+
+    def get(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        """
+        מחזיר מוצר מלא, כולל השדות הקרים שנפתחים מהדחיסה רק עכשיו
+
+        Args:
+            product_id: מזהה המוצר
+
+        Returns:
+            המוצר, או None אם הוא לא בקטלוג
+        """
+        record = self._records.get(product_id)
+        if record is None:
+            return None
+        product = self._hot_fields(record)
+        if record.cold is not None:
+            product.update(loads(zlib.decompress(record.cold)))
+        return product
+
+    def to_products(self) -> List[Dict[str, Any]]:
+        """
+        מחזיר את כל המוצרים המלאים, כולל השדות הקרים
+        """
+        with self._lock:
+            ids = list(self._records)
+        return [product for product in (self.get(product_id) for product_id in ids) if product is not None]
+
+    def list_items(self) -> List[Dict[str, Any]]:
+        """
+        מחזיר את כל המוצרים עם השדות החמים בלבד (שדות קרים זמינים דרך get)
+        """
+        with self._lock:
+            records = list(self._records.values())
+        return [self._hot_fields(record) for record in records]
+
+    def memory_footprint(self) -> int:
+        """
+        מעריך את גודל הקטלוג בזיכרון בבתים. ערכים משותפים (מחרוזות מוחזקות, מונחים) נספרים פעם אחת.
+        """
+        with self._lock:
+            if self._footprint is not None:
+                return self._footprint
+            size = sum(sys.getsizeof(table) for table in (self._records, self._terms, self._term_tuples, self._layouts))
+            size += sum(_deep_size(term) for term in self._terms.values())
+            size += sum(sys.getsizeof(terms) for terms in self._term_tuples.values())
+            size += sum(sys.getsizeof(layout) for layout in self._layouts.values())
+            seen = {id(terms) for terms in self._term_tuples.values()}
+            for record in self._records.values():
+                size += sys.getsizeof(record)
+                if record.cold is not None:
+                    size += sys.getsizeof(record.cold)
+                for key in record.present:
+                    value = getattr(record, key)
+                    if id(value) not in seen:
+                        seen.add(id(value))
+                        size += sys.getsizeof(value)
+            self._footprint = size
+            return size
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על הקטלוג
+        """
+        footprint = self.memory_footprint()
+        return {
+            "products": len(self._records),
+            "terms": len(self._terms),
+            "bytes": footprint,
+            "raw_bytes": self.raw_bytes,
+            "compression_ratio": self.raw_bytes / footprint if footprint else 0.0
+        }
+
+
+def _deep_size(obj: Any) -> int:
+    """
+    מעריך את הגודל של מבנה JSON בזיכרון בבתים
+    """
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sys.getsizeof(key) + _deep_size(value) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_size(item) for item in obj)
+    return size
+
+
+# כל הקטלוגים החיים (למשל ערכים שונים של get_products במטמון), לצורך מדד הזיכרון
+_CATALOGS: "weakref.WeakSet[CompactCatalog]" = weakref.WeakSet()
+
+
+class CatalogCodec(CacheCodec):
+    """
+    ממיר בין רשימת מוצרים לקטלוג קומפקטי - מחובר ל-cached כדי שהמטמון ישמור קטלוג במקום רשימה.
+    חל רק על הרשימה המלאה: רשימה עם _fields מחזירה בדיוק את השדות שביקשו, כולל שדות קרים.
+    """
+
+    def applies_to(self, cache_key: CacheKey) -> bool:
+        _, args, kwargs = cache_key
+        return args in ((), (None,)) and kwargs in ((), (("fields", None),))
+
+    def encode(self, products: Any) -> Any:
+        if not isinstance(products, list):
+            return products
+        catalog = CompactCatalog(products)
+        stats = catalog.get_stats()
+        logger.info(f"Stored {stats['products']} products in compact catalog: {stats['bytes']} bytes "
+                    f"instead of ~{stats['raw_bytes']} bytes")
+        return catalog
+
+    def decode(self, stored: Any) -> Any:
+        if isinstance(stored, CompactCatalog):
+            return stored.list_items()
+        return stored
+
+    def dump(self, stored: Any) -> Any:
+        if isinstance(stored, CompactCatalog):
+            return stored.to_products()
+        return stored
+
+    def load(self, plain: Any) -> Any:
+        return self.encode(plain)
+
+
+def find_product(catalog: Any, product_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    מחפש מוצר מלא בקטלוג קומפקטי ששמור במטמון
+
+    Args:
+        catalog: הערך ששמור במטמון
+        product_id: מזהה המוצר
+
+    Returns:
+        המוצר, או None אם הערך אינו קטלוג או שהמוצר לא נמצא בו
+    """
+    if not isinstance(catalog, CompactCatalog):
+        return None
+    return catalog.get(product_id)
+
+
+def get_catalog_stats() -> Dict[str, Any]:
+    """
+    קבלת מדד הזיכרון של כל הקטלוגים הקומפקטיים החיים
+    """
+    catalogs = list(_CATALOGS)
+    footprint = sum(catalog.memory_footprint() for catalog in catalogs)
+    raw_bytes = sum(catalog.raw_bytes for catalog in catalogs)
+    return {
+        "catalogs": len(catalogs),
+        "products": sum(len(catalog) for catalog in catalogs),
+        "bytes": footprint,
+        "raw_bytes": raw_bytes,
+        "compression_ratio": raw_bytes / footprint if footprint else 0.0
+    }
+
+
+# הממיר הגלובלי של קטלוג המוצרים
+catalog_codec = CatalogCodec()
@@ -0,0 +1,321 @@
+"""
+לקוח אסינכרוני ל-WooCommerce REST API מבוסס aiohttp
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Any, AsyncIterator, Optional, Mapping
+from urllib.parse import quote
+
+import aiohttp
+
+from src.woocommerce.resilience import Resilience
+from src.woocommerce.result import WooCommerceError
+from src.woocommerce.serializer import loads, read_json
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# גודל החתיכות שנקראות מתשובה שמפוענחת בהדרגה
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class WooResponse:
+    """
+    תשובה מ-WooCommerce API - ממשק דומה לתשובה של requests
+    """
+    status_code: int
+    data: Any
+    headers: Mapping[str, str] = field(default_factory=dict)
+    endpoint: str = ""
+
+    def json(self) -> Any:
+        """
+        מחזיר את גוף התשובה לאחר פענוח JSON
+        """
+        return self.data
+
+    def raise_for_status(self) -> None:
+        """
+        זורק WooCommerceError אם החנות החזירה תשובת שגיאה
+        """
+        if self.status_code >= 400:
+            message = self.data.get("message") if isinstance(self.data, dict) else None
+            raise WooCommerceError(
+                f"WooCommerce request to '{self.endpoint}' failed with status {self.status_code}"
+                + (f": {message}" if message else ""),
+                status_code=self.status_code,
+                endpoint=self.endpoint
+            )
+
+
+async def _prepend(head: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    מחזיר את החלק שכבר נקרא מהתשובה, ואחריו את שאר החתיכות
+    """
+    yield head
+    async for chunk in chunks:
+        yield chunk
+
+
+class WooCommerceClient:
+    """
+    לקוח אסינכרוני ל-WooCommerce עם מאגר חיבורים קבוע (keep-alive)
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        consumer_key: Optional[str],
+        consumer_secret: Optional[str],
+        version: str = "wc/v3",
+        timeout: float = 30,
+        read_timeout: Optional[float] = None,
+        connect_timeout: float = 10,
+        pool_size: int = 20,
+        pool_size_per_host: int = 10,
+        keepalive_timeout: float = 30,
+        resilience: Optional[Resilience] = None,
+        stream_threshold: int = 0
+    ):
+        """
+        אתחול הלקוח. הסשן עצמו נוצר בפעם הראשונה שמתבצעת בקשה,
+        כדי שייווצר בתוך לולאת האירועים של הבוט.
+
+        Args:
+            url: כתובת החנות
+            consumer_key: מפתח צרכן של WooCommerce
+            consumer_secret: סוד צרכן של WooCommerce
+            version: גרסת ה-API
+            timeout: זמן מקסימלי לבקשה בשניות
+            read_timeout: זמן מקסימלי לכל ניסיון של בקשת GET בשניות (ברירת מחדל: timeout)
+            connect_timeout: זמן מקסימלי להקמת חיבור בשניות
+            pool_size: מספר חיבורים מקסימלי במאגר
+            pool_size_per_host: מספר חיבורים מקסימלי לשרת
+            keepalive_timeout: זמן שמירה של חיבור פנוי במאגר בשניות
+            resilience: שכבת עמידות (הגבלת קצב, ניסיונות חוזרים, מפסק זרם) - אופציונלי
+            stream_threshold: גודל תשובה בבתים שממנו היא מפוענחת בהדרגה בזמן שהיא מגיעה (0 מבטל)
+        """
+        self.url = (url or "").rstrip("/")
+        self.consumer_key = consumer_key or ""
+        self.consumer_secret = consumer_secret or ""
+        self.version = version
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.read_timeout = read_timeout
+        self.resilience = resilience
+        self.stream_threshold = stream_threshold
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def is_ssl(self) -> bool:
+        """
+        האם החנות מוגשת ב-HTTPS
+        """
+        return self.url.startswith("https")
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        מחזיר את הסשן הפעיל, ויוצר אותו אם צריך
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            auth = aiohttp.BasicAuth(self.consumer_key, self.consumer_secret) if self.is_ssl else None
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                auth=auth,
+                headers={"Accept": "application/json", "User-Agent": "WooCommerce-Telegram-Bot"}
+            )
+            self._session_loop = loop
+            logger.info(f"Created WooCommerce HTTP session (pool size: {self.pool_size})")
+        return self._session
+
+    def _build_url(self, endpoint: str) -> str:
+        """
+        בונה את הכתובת המלאה של נקודת קצה ב-API
+        """
+        return f"{self.url}/wp-json/{self.version}/{endpoint}"
+
+    def _oauth_params(self, method: str, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        מוסיף חתימת OAuth 1.0a לפרמטרים - נדרש כשהחנות אינה מוגשת ב-HTTPS
+
+        Args:
+            method: שיטת ה-HTTP
+            url: הכתובת המלאה
+            params: פרמטרי השאילתה
+
+        Returns:
+            פרמטרי השאילתה בתוספת פרמטרי החתימה
+        """
+        signed = {key: str(value) for key, value in params.items()}
+        signed.update({
+            "oauth_consumer_key": self.consumer_key,
+            "oauth_timestamp": str(int(time.time())),
+            "oauth_nonce": uuid.uuid4().hex,
+            "oauth_signature_method": "HMAC-SHA256"
+        })
+        normalized = "&".join(
+            f"{quote(key, safe='')}%3D{quote(value, safe='')}"
+            for key, value in sorted(signed.items())
+        )
+        base_string = f"{method.upper()}&{quote(url, safe='')}&{quote(normalized, safe='')}"
+        key = f"{self.consumer_secret}&".encode()
+        digest = hmac.new(key, base_string.encode(), hashlib.sha256).digest()
+        signed["oauth_signature"] = base64.b64encode(digest).decode()
+        return signed
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Any] = None,
+        timeout: Optional[float] = None
+    ) -> WooResponse:
+        """
+        שולח בקשה ל-WooCommerce API, דרך שכבת העמידות אם הוגדרה
+
+        Args:
+            method: שיטת ה-HTTP (GET, POST, PUT, DELETE)
+            endpoint: נקודת הקצה, למשל "products"
+            params: פרמטרי שאילתה (אופציונלי)
+            data: גוף הבקשה, יישלח כ-JSON (אופציונלי)
+            timeout: זמן מקסימלי לבקשה זו בשניות (אופציונלי)
+
+        Returns:
+            תשובת ה-API
+        
+        Raises:
+            WooCommerceError: בתקלת רשת, בחריגה מזמן ההמתנה או בתשובה שאינה JSON
+        """
+        if timeout is None and method.upper() == "GET":
+            timeout = self.read_timeout
+
+        async def send() -> WooResponse:
+            return await self._send(method, endpoint, params, data, timeout)
+
+        if self.resilience is None:
+            return await send()
+        return await self.resilience.call(method, endpoint, send)
+
+    async def _read_body(self, response: aiohttp.ClientResponse) -> Any:
+        """
+        מפענח את גוף התשובה. תשובות גדולות מפוענחות בהדרגה, כך שהפענוח מתבצע בזמן שהתשובה
+        עוד מגיעה ולא בבת אחת בסופה. תשובה שגודלה לא ידוע (chunked, gzip) נקראת עד סף הגודל,
+        ועוברת לפענוח הדרגתי רק אם היא חורגת ממנו - תשובות קטנות מפוענחות במהירות בבת אחת.
+
+        Raises:
+            ValueError: אם גוף התשובה אינו JSON תקין
+        """
+        length = response.content_length
+        if not self.stream_threshold or (length is not None and length < self.stream_threshold):
+            body = await response.read()
+            return loads(body) if body.strip() else None
+
+        chunks = response.content.iter_chunked(STREAM_CHUNK_SIZE)
+        if length is not None:
+            return await read_json(chunks)
+
+        head = bytearray()
+        async for chunk in chunks:
+            head += chunk
+            if len(head) >= self.stream_threshold:
+                break
+        else:
+            body = bytes(head)
+            return loads(body) if body.strip() else None
+        return await read_json(_prepend(bytes(head), chunks))
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        data: Optional[Any],
+        timeout: Optional[float]
+    ) -> WooResponse:
+        """
+        שולח ניסיון בודד של בקשה
+        """
+        session = await self._get_session()
+        url = self._build_url(endpoint)
+        query = dict(params or {})
+        if not self.is_ssl:
+            query = self._oauth_params(method, url, query)
+
+        # בלי timeout לבקשה נשארים זמני ההמתנה של הסשן - timeout=None היה מבטל אותם לגמרי
+        options: Dict[str, Any] = {}
+        if timeout is not None:
+            options["timeout"] = aiohttp.ClientTimeout(total=timeout, connect=self.timeout.connect)
+        try:
+            async with session.request(method, url, params=query, json=data, **options) as response:
+                try:
+                    body = await self._read_body(response)
+                except ValueError as e:
+                    raise WooCommerceError(
+                        f"WooCommerce returned an invalid response for '{endpoint}' (status {response.status})",
+                        status_code=response.status if response.status >= 400 else 502,
+                        endpoint=endpoint
+                    ) from e
+                return WooResponse(
+                    status_code=response.status,
+                    data=body,
+                    headers=response.headers,
+                    endpoint=endpoint
+                )
+        except asyncio.TimeoutError as e:
+            raise WooCommerceError(f"WooCommerce request to '{endpoint}' timed out", endpoint=endpoint) from e
+        except aiohttp.ClientError as e:
+            raise WooCommerceError(f"WooCommerce request to '{endpoint}' failed: {e}", endpoint=endpoint) from e
+
+    async def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> WooResponse:
+        """
+        שולח בקשת GET
+        """
+        return await self.request("GET", endpoint, params=params, **kwargs)
+
+    async def post(self, endpoint: str, data: Any, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> WooResponse:
+        """
+        שולח בקשת POST
+        """
+        return await self.request("POST", endpoint, params=params, data=data, **kwargs)
+
+    async def put(self, endpoint: str, data: Any, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> WooResponse:
+        """
+        שולח בקשת PUT
+        """
+        return await self.request("PUT", endpoint, params=params, data=data, **kwargs)
+
+    async def delete(self, endpoint: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> WooResponse:
+        """
+        שולח בקשת DELETE
+        """
+        return await self.request("DELETE", endpoint, params=params, **kwargs)
+
+    async def close(self) -> None:
+        """
+        סוגר את הסשן ואת כל החיבורים במאגר
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("WooCommerce HTTP session closed")
+        self._session = None
+        self._session_loop = None
@@ -0,0 +1,71 @@
+"""
+עדכון המטמון והמראה המקומית כשמוצר או הזמנה משתנים בחנות
+"""
+
+import logging
+from typing import Dict, Any, Tuple
+
+from src.woocommerce.cache import set_cache_entry, invalidate_cache_entry, patch_cached_lists, clear_cache_for_function
+from src.woocommerce.mirror import store_mirror
+from src.woocommerce.search import product_index
+from src.woocommerce.versions import bump_data_version
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# לכל סוג אובייקט - הפונקציה שמחזירה אובייקט בודד והפונקציה שמחזירה רשימה
+CACHED_FUNCTIONS: Dict[str, Tuple[str, str]] = {
+    "products": ("get_product", "get_products"),
+    "orders": ("get_order", "get_orders")
+}
+
+# פונקציות שאילתה מסוננת - אי אפשר לדעת אם אובייקט שהשתנה עדיין מתאים לסינון, ולכן הן נמחקות
+QUERY_FUNCTIONS: Dict[str, str] = {
+    "products": "query_products",
+    "orders": "query_orders"
+}
+
+
+def apply_change(kind: str, item: Dict[str, Any]) -> None:
+    """
+    מעדכן במקום את המטמון והמראה עם הגרסה החדשה של אובייקט
+
+    Args:
+        kind: סוג האובייקט ('products' או 'orders')
+        item: האובייקט המעודכן כפי שהתקבל מהחנות
+    """
+    if item.get("status") == "trash":
+        apply_removal(kind, item["id"])
+        return
+
+    single_function, list_function = CACHED_FUNCTIONS[kind]
+    bump_data_version(kind)
+    set_cache_entry(single_function, item, item["id"])
+    patched = patch_cached_lists(list_function, item)
+    clear_cache_for_function(QUERY_FUNCTIONS[kind])
+    # המראה מעדכנת גם את אינדקס החיפוש
+    if store_mirror.serves(kind):
+        store_mirror.apply(kind, [item])
+    elif kind == "products" and product_index.built_at:
+        product_index.upsert(item)
+    logger.debug(f"Applied change to {kind} {item['id']} ({patched} cached lists patched)")
+
+
+def apply_removal(kind: str, object_id: int) -> None:
+    """
+    מסיר אובייקט שנמחק מהמטמון ומהמראה
+
+    Args:
+        kind: סוג האובייקט ('products' או 'orders')
+        object_id: מזהה האובייקט
+    """
+    single_function, list_function = CACHED_FUNCTIONS[kind]
+    bump_data_version(kind)
+    invalidate_cache_entry(single_function, object_id)
+    patched = patch_cached_lists(list_function, {"id": object_id}, remove=True)
+    clear_cache_for_function(QUERY_FUNCTIONS[kind])
+    if store_mirror.serves(kind):
+        store_mirror.apply(kind, [], removed_ids=[object_id])
+    elif kind == "products":
+        product_index.remove(object_id)
+    logger.debug(f"Applied removal of {kind} {object_id} ({patched} cached lists patched)")
@@ -0,0 +1,137 @@
+"""
+טעינה מקובצת (DataLoader) של פריטים לפי מזהה - בקשות למזהים בודדים שמגיעות בחלון זמן קצר
+נאספות לבקשה אחת עם include=1,2,3 במקום בקשה נפרדת לכל מזהה
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Any, Awaitable, Callable, Hashable, Optional
+
+from src.config import LOADER_BATCH_WINDOW, LOADER_MAX_BATCH_SIZE
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+
+class DataLoader:
+    """
+    אוסף בקשות לפריטים לפי מזהה ושולח אותן יחד.
+    כל קריאה ל-load ממתינה לכל היותר batch_window שניות (או עד שהקבוצה מלאה),
+    ואז כל המזהים שנאספו נטענים בקריאה אחת ל-batch_fn.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        max_batch_size: int = LOADER_MAX_BATCH_SIZE,
+        batch_window: float = LOADER_BATCH_WINDOW,
+        name: str = "loader"
+    ):
+        """
+        Args:
+            batch_fn: פונקציה שמקבלת רשימת מזהים ומחזירה מילון ממזהה לפריט (מזהה חסר = לא נמצא)
+            max_batch_size: מספר מזהים מקסימלי בקבוצה
+            batch_window: זמן ההמתנה לאיסוף מזהים נוספים בשניות
+            name: שם הטוען ללוגים
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.name = name
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.batches = 0
+        self.loaded = 0
+
+    def _reset_for_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._loop is not loop:
+            self._pending = {}
+            self._timer = None
+            self._loop = loop
+
+    async def load(self, key: Hashable) -> Optional[Any]:
+        """
+        טוען פריט לפי מזהה
+
+        Args:
+            key: מזהה הפריט
+
+        Returns:
+            הפריט, או None אם הוא לא נמצא
+        """
+        loop = asyncio.get_running_loop()
+        self._reset_for_loop(loop)
+
+        future = self._pending.get(key)
+        if future is None:
+            future = loop.create_future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.batch_window, self._dispatch)
+        # shield - ביטול של ממתין אחד לא מבטל את הפריט עבור ממתינים אחרים באותה קבוצה
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: List[Hashable]) -> List[Optional[Any]]:
+        """
+        טוען כמה פריטים לפי מזהים, בסדר שבו התבקשו
+
+        Args:
+            keys: מזהי הפריטים
+
+        Returns:
+            רשימת הפריטים, עם None לכל מזהה שלא נמצא
+        """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        """
+        שולח את הקבוצה הנוכחית לטעינה
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: Dict[Hashable, asyncio.Future]) -> None:
+        """
+        טוען קבוצה ומעביר לכל ממתין את הפריט שלו
+        """
+        self.batches += 1
+        self.loaded += len(batch)
+        logger.debug(f"{self.name}: loading {len(batch)} items in one request")
+        try:
+            results = await self.batch_fn(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # מסמן את השגיאה כנקראה גם אם כל הממתינים בוטלו
+                    future.exception()
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על הטוען
+        """
+        return {
+            "batches": self.batches,
+            "loaded": self.loaded,
+            "average_batch_size": self.loaded / self.batches if self.batches else 0.0,
+            "pending": len(self._pending)
+        }
@@ -0,0 +1,445 @@
+"""
+מראה מקומית של קטלוג המוצרים וההזמנות בחנות.
+טעינה מלאה אחת, ולאחריה סנכרון תקופתי של השינויים בלבד (modified_after).
+"""
+
+import asyncio
+import datetime
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Optional, Iterable
+
+from src.config import (
+    MIRROR_ENABLED, MIRROR_PERSISTENCE, MIRROR_SQLITE_PATH,
+    MIRROR_POLL_INTERVAL, MIRROR_MAX_STALENESS, MIRROR_FULL_RESYNC_INTERVAL
+)
+from src.woocommerce.client import WooCommerceClient
+from src.woocommerce.pagination import fetch_all_pages, PageFetchError
+from src.woocommerce.search import product_index
+from src.woocommerce.serializer import dumps, loads
+from src.woocommerce.versions import bump_data_version
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# סוגי האובייקטים שנשמרים במראה
+MIRROR_KINDS = ("products", "orders")
+
+
+class SQLiteMirrorStore:
+    """
+    שמירת המראה בקובץ SQLite מקומי
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: נתיב קובץ מסד הנתונים
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS store_mirror ("
+                "kind TEXT NOT NULL, object_id INTEGER NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (kind, object_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS store_mirror_state ("
+                "kind TEXT PRIMARY KEY, last_sync REAL NOT NULL, last_full_load REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def load(self, kind: str) -> List[Dict[str, Any]]:
+        """
+        טוען את כל האובייקטים מסוג מסוים
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute("SELECT data FROM store_mirror WHERE kind = ?", (kind,)).fetchall()
+        return [loads(row[0]) for row in rows]
+
+    def save(self, kind: str, items: List[Dict[str, Any]], removed_ids: Iterable[int] = ()) -> bool:
+        """
+        שומר אובייקטים חדשים או מעודכנים ומוחק אובייקטים שהוסרו
+        """
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM store_mirror WHERE kind = ? AND object_id = ?",
+                [(kind, object_id) for object_id in removed_ids]
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO store_mirror (kind, object_id, data) VALUES (?, ?, ?)",
+                [(kind, item["id"], dumps(item)) for item in items]
+            )
+        return True
+
+    def load_state(self, kind: str) -> Dict[str, float]:
+        """
+        טוען את זמני הסנכרון והטעינה המלאה האחרונים, או מילון ריק אם לא נשמרו
+        """
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT last_sync, last_full_load FROM store_mirror_state WHERE kind = ?", (kind,)
+            ).fetchone()
+        return {"last_sync": row[0], "last_full_load": row[1]} if row else {}
+
+    def save_state(self, kind: str, last_sync: float, last_full_load: float) -> bool:
+        """
+        שומר את זמני הסנכרון והטעינה המלאה האחרונים
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO store_mirror_state (kind, last_sync, last_full_load) VALUES (?, ?, ?)",
+                (kind, last_sync, last_full_load)
+            )
+        return True
+
+
+class PostgresMirrorStore:
+    """
+    שמירת המראה במסד הנתונים PostgreSQL של הבוט
+    """
+
+    def load(self, kind: str) -> List[Dict[str, Any]]:
+        """
+        טוען את כל האובייקטים מסוג מסוים
+        """
+        from src.database.repository import get_mirror_items
+        return get_mirror_items(kind)
+
+    def save(self, kind: str, items: List[Dict[str, Any]], removed_ids: Iterable[int] = ()) -> bool:
+        """
+        שומר אובייקטים חדשים או מעודכנים ומוחק אובייקטים שהוסרו
+        """
+        from src.database.repository import save_mirror_items
+        return save_mirror_items(kind, items, list(removed_ids))
+
+    def load_state(self, kind: str) -> Dict[str, float]:
+        """
+        טוען את זמני הסנכרון והטעינה המלאה האחרונים, או מילון ריק אם לא נשמרו
+        """
+        from src.database.repository import get_mirror_state
+        return get_mirror_state(kind)
+
+    def save_state(self, kind: str, last_sync: float, last_full_load: float) -> bool:
+        """
+        שומר את זמני הסנכרון והטעינה המלאה האחרונים
+        """
+        from src.database.repository import save_mirror_state
+        return save_mirror_state(kind, last_sync, last_full_load)
+
+
+def _parse_gmt(value: Optional[str]) -> Optional[datetime.datetime]:
+    """
+    ממיר תאריך GMT בפורמט של WooCommerce לאובייקט datetime
+    """
+    if not value:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class StoreMirror:
+    """
+    מראה מקומית של מוצרים והזמנות, מסונכרנת בעזרת שינויים בלבד
+    """
+
+    def __init__(
+        self,
+        store: Optional[Any] = None,
+        poll_interval: float = MIRROR_POLL_INTERVAL,
+        max_staleness: float = MIRROR_MAX_STALENESS,
+        full_resync_interval: float = MIRROR_FULL_RESYNC_INTERVAL
+    ):
+        """
+        Args:
+            store: מנגנון שמירה לדיסק (SQLiteMirrorStore או PostgresMirrorStore), או None לזיכרון בלבד
+            poll_interval: מרווח בין סנכרונים ברקע בשניות
+            max_staleness: גיל מקסימלי של המראה לפני שמגישים ממנה, בשניות
+            full_resync_interval: מרווח בין טעינות מלאות (לזיהוי מחיקות), בשניות
+        """
+        self.store = store
+        self.poll_interval = poll_interval
+        self.max_staleness = max_staleness
+        self.full_resync_interval = full_resync_interval
+        self.client: Optional[WooCommerceClient] = None
+        self.items: Dict[str, Dict[int, Dict[str, Any]]] = {kind: {} for kind in MIRROR_KINDS}
+        self.loaded: Dict[str, bool] = {kind: False for kind in MIRROR_KINDS}
+        self.last_sync: Dict[str, float] = {kind: 0.0 for kind in MIRROR_KINDS}
+        self.last_full_load: Dict[str, float] = {kind: 0.0 for kind in MIRROR_KINDS}
+        self.supports_modified_after = True
+        self._views: Dict[str, Optional[List[Dict[str, Any]]]] = {kind: None for kind in MIRROR_KINDS}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _lock(self, kind: str) -> asyncio.Lock:
+        if kind not in self._locks:
+            self._locks[kind] = asyncio.Lock()
+        return self._locks[kind]
+
+    def serves(self, kind: str) -> bool:
+        """
+        האם המראה פעילה וטעונה עבור סוג האובייקטים
+        """
+        return self.client is not None and self.loaded.get(kind, False)
+
+    def age(self, kind: str) -> float:
+        """
+        הזמן בשניות מאז הסנכרון האחרון
+        """
+        return time.time() - self.last_sync[kind]
+
+    def _watermark(self, kind: str, field: str) -> Optional[str]:
+        """
+        מחשב את התאריך המאוחר ביותר במראה, עם חפיפה קטנה כדי לא לפספס שינויים באותה שנייה
+        """
+        latest = max(
+            (parsed for parsed in (_parse_gmt(item.get(field)) for item in self.items[kind].values()) if parsed),
+            default=None
+        )
+        if latest is None:
+            return None
+        return (latest - datetime.timedelta(seconds=1)).isoformat()
+
+    def apply(self, kind: str, items: List[Dict[str, Any]], removed_ids: Iterable[int] = ()) -> None:
+        """
+        מחיל שינויים על המראה בזיכרון, ועל אינדקס החיפוש כשמדובר במוצרים שהאינדקס כבר נבנה עבורם
+
+        Args:
+            kind: סוג האובייקטים
+            items: אובייקטים חדשים או מעודכנים
+            removed_ids: מזהי אובייקטים שנמחקו
+        """
+        collection = self.items[kind]
+        index = product_index if kind == "products" and product_index.built_at else None
+        for object_id in removed_ids:
+            collection.pop(object_id, None)
+            if index is not None:
+                index.remove(object_id)
+        for item in items:
+            if item.get("status") == "trash":
+                collection.pop(item["id"], None)
+                if index is not None:
+                    index.remove(item["id"])
+            else:
+                collection[item["id"]] = item
+                if index is not None:
+                    index.upsert(item)
+        self._views[kind] = None
+
+    def _differs(self, kind: str, items: List[Dict[str, Any]], removed_ids: Iterable[int] = ()) -> bool:
+        """
+        בודק אם שינויים מהחנות משנים את תוכן המראה (סנכרון שינויים מחזיר תמיד גם את האובייקט שבחפיפה)
+        """
+        collection = self.items[kind]
+        if any(object_id in collection for object_id in removed_ids):
+            return True
+        for item in items:
+            if item.get("status") == "trash":
+                if item["id"] in collection:
+                    return True
+            elif collection.get(item["id"]) != item:
+                return True
+        return False
+
+    async def _persist(self, kind: str, items: List[Dict[str, Any]], removed_ids: Iterable[int] = ()) -> None:
+        """
+        שומר שינויים ואת זמני הסנכרון לדיסק מחוץ ללולאת האירועים
+        """
+        if self.store is None:
+            return
+        removed_ids = list(removed_ids)
+        try:
+            if items or removed_ids:
+                await asyncio.to_thread(self.store.save, kind, items, removed_ids)
+            await asyncio.to_thread(self.store.save_state, kind, self.last_sync[kind], self.last_full_load[kind])
+        except Exception as e:
+            logger.error(f"Error persisting store mirror ({kind}): {e}")
+
+    async def restore(self) -> None:
+        """
+        טוען את המראה מהדיסק, אם הוגדר מנגנון שמירה.
+        הזמנים השמורים משוחזרים כמו שהם, כך שהסנכרון הראשון ממשיך בשינויים בלבד מהמקום שבו נעצר,
+        וטעינה מלאה מתבצעת רק אם עבר מרווח הטעינה המלאה מאז הטעינה המלאה האחרונה שנשמרה.
+        """
+        if self.store is None:
+            return
+        for kind in MIRROR_KINDS:
+            try:
+                items = await asyncio.to_thread(self.store.load, kind)
+                state = await asyncio.to_thread(self.store.load_state, kind) if items else {}
+            except Exception as e:
+                logger.error(f"Error restoring store mirror ({kind}): {e}")
+                continue
+            if items:
+                self.apply(kind, items)
+                self.loaded[kind] = True
+                self.last_sync[kind] = state.get("last_sync", 0.0)
+                self.last_full_load[kind] = state.get("last_full_load", 0.0)
+                logger.info(f"Restored {len(items)} {kind} from persisted store mirror "
+                            f"(age: {round(self.age(kind))} seconds)")
+
+    async def full_load(self, kind: str) -> None:
+        """
+        טוען את כל האובייקטים מהחנות ומחליף את תוכן המראה
+        """
+        items = await fetch_all_pages(self.client, kind)
+        fresh_ids = {item["id"] for item in items}
+        removed_ids = [object_id for object_id in self.items[kind] if object_id not in fresh_ids]
+
+        if self._differs(kind, items, removed_ids):
+            bump_data_version(kind)
+        self.items[kind] = {}
+        self.apply(kind, items, removed_ids)
+        now = time.time()
+        self.loaded[kind] = True
+        self.last_sync[kind] = now
+        self.last_full_load[kind] = now
+        logger.info(f"Store mirror full load of {kind}: {len(self.items[kind])} items")
+        await self._persist(kind, items, removed_ids)
+
+    async def _delta_params(self, kind: str) -> Optional[Dict[str, Any]]:
+        """
+        בונה את פרמטרי השאילתה לסנכרון שינויים, או None אם נדרשת טעינה מלאה
+        """
+        if self.supports_modified_after:
+            watermark = self._watermark(kind, "date_modified_gmt")
+            if watermark:
+                return {"modified_after": watermark, "dates_are_gmt": "true"}
+        elif kind == "orders":
+            # חנויות ישנות ללא modified_after - לפחות מזהים הזמנות חדשות
+            watermark = self._watermark(kind, "date_created_gmt")
+            if watermark:
+                return {"after": watermark, "dates_are_gmt": "true"}
+        return None
+
+    async def sync(self, kind: str) -> None:
+        """
+        מסנכרן את המראה מול החנות - טעינה מלאה בפעם הראשונה, ולאחר מכן שינויים בלבד
+        """
+        async with self._lock(kind):
+            now = time.time()
+            params = await self._delta_params(kind) if self.loaded[kind] else None
+            if params is None or now - self.last_full_load[kind] >= self.full_resync_interval:
+                await self.full_load(kind)
+                return
+
+            try:
+                changed = await fetch_all_pages(self.client, kind, params)
+            except PageFetchError as e:
+                if e.status_code != 400 or "modified_after" not in params:
+                    raise
+                logger.warning("Store does not support modified_after, falling back to full loads")
+                self.supports_modified_after = False
+                await self.full_load(kind)
+                return
+
+            if self._differs(kind, changed):
+                bump_data_version(kind)
+            self.apply(kind, changed)
+            self.last_sync[kind] = time.time()
+            if changed:
+                logger.info(f"Store mirror applied {len(changed)} changed {kind}")
+            await self._persist(kind, changed)
+
+    async def _ensure_fresh(self, kind: str) -> None:
+        """
+        מסנכרן לפני הגשה אם המראה ישנה מדי
+        """
+        if self.age(kind) >= self.max_staleness:
+            try:
+                await self.sync(kind)
+            except Exception as e:
+                logger.error(f"Error refreshing stale store mirror ({kind}): {e}")
+
+    async def list_items(self, kind: str) -> List[Dict[str, Any]]:
+        """
+        מחזיר את כל האובייקטים מסוג מסוים, מהחדש לישן
+        """
+        await self._ensure_fresh(kind)
+        view = self._views[kind]
+        if view is None:
+            view = sorted(self.items[kind].values(), key=lambda item: item["id"], reverse=True)
+            self._views[kind] = view
+        return view
+
+    async def get_item(self, kind: str, object_id: int) -> Optional[Dict[str, Any]]:
+        """
+        מחזיר אובייקט לפי מזהה, או None אם הוא לא נמצא במראה
+        """
+        await self._ensure_fresh(kind)
+        return self.items[kind].get(object_id)
+
+    async def _run(self) -> None:
+        """
+        לולאת הסנכרון ברקע
+        """
+        await self.restore()
+        while True:
+            for kind in MIRROR_KINDS:
+                try:
+                    await self.sync(kind)
+                except Exception as e:
+                    logger.error(f"Error syncing store mirror ({kind}): {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self, client: WooCommerceClient) -> None:
+        """
+        מפעיל את הסנכרון ברקע. עד לסיום הטעינה הראשונה הקריאות ממשיכות לחנות.
+
+        Args:
+            client: לקוח WooCommerce
+        """
+        if self._task is not None and not self._task.done():
+            return
+        self.client = client
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Store mirror started (poll interval: {self.poll_interval} seconds)")
+
+    async def stop(self) -> None:
+        """
+        עוצר את הסנכרון ברקע
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.client = None
+        logger.info("Store mirror stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על המראה
+        """
+        return {
+            kind: {
+                "loaded": self.loaded[kind],
+                "items": len(self.items[kind]),
+                "age_seconds": round(self.age(kind), 1) if self.loaded[kind] else None
+            }
+            for kind in MIRROR_KINDS
+        }
+
+
+def _create_store() -> Optional[Any]:
+    """
+    יוצר את מנגנון השמירה לפי ההגדרות
+    """
+    if MIRROR_PERSISTENCE == "sqlite":
+        return SQLiteMirrorStore(MIRROR_SQLITE_PATH)
+    if MIRROR_PERSISTENCE == "postgres":
+        return PostgresMirrorStore()
+    return None
+
+
+# מופע גלובלי של המראה - מופעל רק אם MIRROR_ENABLED
+store_mirror = StoreMirror(store=_create_store() if MIRROR_ENABLED else None)
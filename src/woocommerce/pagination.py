@@ -0,0 +1,188 @@
+"""
+מנוע דפדוף לרשימות ב-WooCommerce API - שליפת כל הדפים במקביל
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, List, Any, Optional, AsyncIterator, Deque
+
+from src.config import WOO_PER_PAGE, WOO_PAGE_CONCURRENCY
+from src.woocommerce.client import WooCommerceClient, WooResponse
+from src.woocommerce.result import WooCommerceError
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+
+class PageFetchError(WooCommerceError):
+    """
+    שגיאה בשליפת דף מרשימה - תשובת שגיאה או תוכן שאינו רשימה
+    """
+
+
+def _page_items(response: WooResponse, endpoint: str, page: int) -> List[Dict[str, Any]]:
+    """
+    מחלץ את רשימת הפריטים מתשובה של דף בודד
+
+    Args:
+        response: תשובת ה-API
+        endpoint: נקודת הקצה שנשלפה
+        page: מספר הדף
+
+    Returns:
+        רשימת הפריטים בדף
+    """
+    items = response.json()
+    if response.status_code >= 400 or not isinstance(items, list):
+        raise PageFetchError(
+            f"Unexpected response for {endpoint} page {page} (status {response.status_code})",
+            status_code=response.status_code if response.status_code >= 400 else 502,
+            endpoint=endpoint
+        )
+    return items
+
+
+def _total_pages(response: WooResponse) -> int:
+    """
+    קורא את מספר הדפים הכולל מכותרות התשובה
+    """
+    try:
+        return max(1, int(response.headers.get("X-WP-TotalPages", 1)))
+    except (TypeError, ValueError):
+        return 1
+
+
+async def _fetch_page(
+    client: WooCommerceClient,
+    endpoint: str,
+    params: Dict[str, Any],
+    page: int
+) -> WooResponse:
+    """
+    שולף דף בודד מנקודת קצה של רשימה
+    """
+    return await client.get(endpoint, params={**params, "page": page})
+
+
+async def iter_pages(
+    client: WooCommerceClient,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    per_page: int = WOO_PER_PAGE,
+    concurrency: int = WOO_PAGE_CONCURRENCY
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    מחזיר את דפי הרשימה אחד אחרי השני, לפי הסדר.
+    הדף הראשון קובע את מספר הדפים, ושאר הדפים נשלפים במקביל בחלון מוגבל,
+    כך שבזיכרון נשמרים לכל היותר `concurrency` דפים בכל רגע.
+
+    Args:
+        client: לקוח WooCommerce
+        endpoint: נקודת הקצה, למשל "products"
+        params: פרמטרי שאילתה נוספים (אופציונלי)
+        per_page: מספר פריטים בכל דף
+        concurrency: מספר דפים מקסימלי שנשלפים במקביל
+
+    Yields:
+        רשימת הפריטים של כל דף
+    """
+    base_params = {**(params or {}), "per_page": per_page}
+
+    first = await _fetch_page(client, endpoint, base_params, 1)
+    yield _page_items(first, endpoint, 1)
+
+    total_pages = _total_pages(first)
+    if total_pages <= 1:
+        return
+
+    logger.debug(f"Fetching {total_pages - 1} more pages of {endpoint} (concurrency: {concurrency})")
+    next_page = 2
+    window: Deque[asyncio.Task] = deque()
+    try:
+        while next_page <= total_pages or window:
+            while next_page <= total_pages and len(window) < max(1, concurrency):
+                window.append(asyncio.create_task(_fetch_page(client, endpoint, base_params, next_page)))
+                next_page += 1
+            page = next_page - len(window)
+            response = await window.popleft()
+            yield _page_items(response, endpoint, page)
+    finally:
+        for task in window:
+            task.cancel()
+
+
+async def fetch_all_pages(
+    client: WooCommerceClient,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    per_page: int = WOO_PER_PAGE,
+    concurrency: int = WOO_PAGE_CONCURRENCY
+) -> List[Dict[str, Any]]:
+    """
+    שולף את כל הפריטים מנקודת קצה של רשימה
+
+    Args:
+        client: לקוח WooCommerce
+        endpoint: נקודת הקצה, למשל "products"
+        params: פרמטרי שאילתה נוספים (אופציונלי)
+        per_page: מספר פריטים בכל דף
+        concurrency: מספר דפים מקסימלי שנשלפים במקביל
+
+    Returns:
+        רשימה של כל הפריטים מכל הדפים
+    """
+    base_params = {**(params or {}), "per_page": per_page}
+
+    first = await _fetch_page(client, endpoint, base_params, 1)
+    items = _page_items(first, endpoint, 1)
+    total_pages = _total_pages(first)
+    if total_pages <= 1:
+        return items
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(page: int) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return _page_items(await _fetch_page(client, endpoint, base_params, page), endpoint, page)
+
+    pages = await asyncio.gather(*(fetch(page) for page in range(2, total_pages + 1)))
+    for page_items in pages:
+        items.extend(page_items)
+
+    logger.info(f"Fetched {len(items)} items of {endpoint} from {total_pages} pages")
+    return items
+
+
+async def fetch_page(
+    client: WooCommerceClient,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    page: int = 1,
+    per_page: int = WOO_PER_PAGE
+) -> Dict[str, Any]:
+    """
+    שולף דף בודד של רשימה, יחד עם מספר הפריטים והדפים הכולל
+
+    Args:
+        client: לקוח ה-API
+        endpoint: נקודת הקצה, למשל "orders"
+        params: פרמטרי שאילתה נוספים (אופציונלי)
+        page: מספר הדף
+        per_page: מספר פריטים בדף
+
+    Returns:
+        מילון עם items, page, total_pages ו-total
+    """
+    response = await _fetch_page(client, endpoint, {**(params or {}), "per_page": per_page}, page)
+    items = _page_items(response, endpoint, page)
+    try:
+        total = int(response.headers.get("X-WP-Total", len(items)))
+    except (TypeError, ValueError):
+        total = len(items)
+    return {
+        "items": items,
+        "page": page,
+        "total_pages": _total_pages(response),
+        "total": total
+    }
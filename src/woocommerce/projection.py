@@ -0,0 +1,207 @@
+"""
+הטלת שדות (projection) ותקציב גודל לתוצאות הכלים - כדי שהמודל יקבל רק את השדות שהוא צריך
+ולא את ה-JSON המלא של WooCommerce (תיאורים, meta_data, תמונות ו-_links)
+"""
+
+import json
+import logging
+from collections import Counter
+from typing import Dict, List, Any, Callable, Optional, Sequence, Tuple
+
+from src.config import TOOL_OUTPUT_MAX_CHARS, TOOL_OUTPUT_BUDGETS, TOOL_PROJECTION_OVERRIDES
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+
+def _category_names(item: Dict[str, Any]) -> List[str]:
+    return [category.get("name") for category in item.get("categories") or []]
+
+
+def _customer_name(order: Dict[str, Any]) -> str:
+    billing = order.get("billing") or {}
+    return f"{billing.get('first_name', '')} {billing.get('last_name', '')}".strip()
+
+
+def _items_count(order: Dict[str, Any]) -> int:
+    return sum(line.get("quantity", 0) for line in order.get("line_items") or [])
+
+
+# שדות מחושבים: שם השדה בפלט -> (השדה שצריך לבקש מה-API, פונקציה שמחשבת את הערך)
+DERIVED_FIELDS: Dict[str, Tuple[str, Callable[[Dict[str, Any]], Any]]] = {
+    "categories": ("categories", _category_names),
+    "customer": ("billing", _customer_name),
+    "items_count": ("line_items", _items_count)
+}
+
+# השדות שכל כלי מחזיר למודל
+TOOL_PROJECTIONS: Dict[str, List[str]] = {
+    "get_products_tool": [
+        "id", "name", "sku", "price", "regular_price", "sale_price",
+        "stock_status", "stock_quantity", "status", "categories"
+    ],
+    "get_orders_tool": [
+        "id", "number", "status", "date_created", "total", "currency", "customer", "items_count"
+    ],
+    "get_products_by_ids_tool": [
+        "id", "name", "sku", "price", "regular_price", "sale_price",
+        "stock_status", "stock_quantity", "status", "categories", "permalink"
+    ],
+    "get_orders_by_ids_tool": [
+        "id", "number", "status", "date_created", "total", "currency", "customer", "items_count", "payment_method_title"
+    ],
+    "query_orders_tool": [
+        "id", "number", "status", "date_created", "total", "currency", "customer", "items_count"
+    ],
+    "query_products_tool": [
+        "id", "name", "sku", "price", "regular_price", "sale_price",
+        "stock_status", "stock_quantity", "status", "categories"
+    ],
+    "get_categories_tool": ["id", "name", "parent", "count"],
+    "create_product_tool": ["id", "name", "price", "regular_price", "status", "categories", "permalink"],
+    "update_product_tool": ["id", "name", "price", "regular_price", "status", "categories", "permalink"],
+    "batch_create_products_tool": ["id", "name", "price", "status"],
+    "batch_update_products_tool": ["id", "name", "price", "stock_quantity", "status"]
+}
+TOOL_PROJECTIONS.update(TOOL_PROJECTION_OVERRIDES)
+
+
+def fields_for(tool_name: str) -> Optional[List[str]]:
+    """
+    מחזיר את רשימת השדות של כלי, או None אם אין לו הטלה
+    """
+    return TOOL_PROJECTIONS.get(tool_name)
+
+
+def budget_for(tool_name: str) -> int:
+    """
+    מחזיר את תקציב הגודל (בתווים) של הפלט של כלי
+    """
+    return TOOL_OUTPUT_BUDGETS.get(tool_name, TOOL_OUTPUT_MAX_CHARS)
+
+
+def api_fields(fields: Sequence[str]) -> str:
+    """
+    ממיר רשימת שדות לערך של פרמטר _fields ב-API, כולל השדות שמהם מחושבים שדות נגזרים
+
+    Args:
+        fields: שדות הפלט
+
+    Returns:
+        רשימת השדות מופרדת בפסיקים, ממוינת כדי שמפתח המטמון יהיה יציב
+    """
+    source = {DERIVED_FIELDS[name][0] if name in DERIVED_FIELDS else name for name in fields}
+    return ",".join(sorted(source))
+
+
+def project(item: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """
+    מחזיר עותק מצומצם של הפריט עם השדות המבוקשים בלבד
+
+    Args:
+        item: הפריט המלא (או החלקי) מ-WooCommerce
+        fields: השדות להחזרה
+
+    Returns:
+        הפריט המצומצם
+    """
+    projected = {}
+    for name in fields:
+        if name in DERIVED_FIELDS:
+            source, compute = DERIVED_FIELDS[name]
+            if source in item:
+                projected[name] = compute(item)
+        elif name in item:
+            projected[name] = item[name]
+    return projected
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def summarize(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    מסכם רשימה של פריטים - ספירה לפי סטטוסים וטווח מחירים או סכום הזמנות
+
+    Args:
+        items: הפריטים המלאים
+
+    Returns:
+        סיכום הרשימה
+    """
+    summary: Dict[str, Any] = {}
+    for field in ("status", "stock_status"):
+        counts = Counter(item.get(field) for item in items if item.get(field) is not None)
+        if counts:
+            summary[f"by_{field}"] = dict(counts)
+
+    prices = [price for price in (_to_float(item.get("price")) for item in items) if price is not None]
+    if prices:
+        summary["price_range"] = [min(prices), max(prices)]
+
+    totals = [total for total in (_to_float(item.get("total")) for item in items) if total is not None]
+    if totals:
+        summary["total_sum"] = round(sum(totals), 2)
+    return summary
+
+
+def compact_list(
+    items: List[Dict[str, Any]],
+    fields: Optional[Sequence[str]],
+    max_chars: int = TOOL_OUTPUT_MAX_CHARS,
+    summarizer: Callable[[List[Dict[str, Any]]], Dict[str, Any]] = summarize
+) -> Any:
+    """
+    מצמצם רשימה לפלט של כלי: מטיל את השדות ועוצר כשהפלט עובר את תקציב הגודל.
+    אם הרשימה נחתכה, מוחזר מילון עם הפריטים שנכנסו וסיכום של כל הרשימה.
+
+    Args:
+        items: הפריטים
+        fields: השדות להחזרה (None מחזיר את הפריטים כמו שהם)
+        max_chars: תקציב הגודל בתווים של JSON
+        summarizer: פונקציה שמסכמת את כל הרשימה כשהיא נחתכת
+
+    Returns:
+        רשימת הפריטים המצומצמים, או מילון עם total, shown, items ו-summary אם הרשימה נחתכה
+    """
+    compact = []
+    used = 2
+    for item in items:
+        projected = project(item, fields) if fields else item
+        size = len(json.dumps(projected, ensure_ascii=False, default=str)) + 2
+        if used + size > max_chars:
+            break
+        compact.append(projected)
+        used += size
+
+    if len(compact) == len(items):
+        return compact
+
+    logger.info(f"Tool output truncated to {len(compact)} of {len(items)} items ({max_chars} chars budget)")
+    return {
+        "total": len(items),
+        "shown": len(compact),
+        "truncated": True,
+        "summary": summarizer(items),
+        "items": compact
+    }
+
+
+def compact_item(item: Any, fields: Optional[Sequence[str]]) -> Any:
+    """
+    מצמצם פריט בודד לפלט של כלי
+
+    Args:
+        item: הפריט
+        fields: השדות להחזרה (None מחזיר את הפריט כמו שהוא)
+
+    Returns:
+        הפריט המצומצם
+    """
+    if not fields or not isinstance(item, dict):
+        return item
+    return project(item, fields)
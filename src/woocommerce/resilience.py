@@ -0,0 +1,356 @@
+"""
+שכבת עמידות לקריאות ל-WooCommerce: הגבלת קצב, הגבלת מקביליות אדפטיבית,
+ניסיונות חוזרים לבקשות GET ומפסק זרם (circuit breaker)
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from src.config import (
+    WOO_RATE_LIMIT, WOO_RATE_BURST, WOO_MIN_CONCURRENCY, WOO_MAX_CONCURRENCY,
+    WOO_SLOW_RESPONSE_THRESHOLD, WOO_RETRY_ATTEMPTS, WOO_RETRY_BASE_DELAY, WOO_RETRY_MAX_DELAY,
+    WOO_BREAKER_FAILURE_THRESHOLD, WOO_BREAKER_RECOVERY_TIMEOUT
+)
+from src.woocommerce.result import WooCommerceError
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# שיטות HTTP שבטוח לשלוח שוב - כתיבות לא נשלחות פעמיים כדי לא ליצור כפילויות
+IDEMPOTENT_METHODS = ("GET",)
+
+
+class CircuitOpenError(WooCommerceError):
+    """
+    נזרקת כשמפסק הזרם פתוח - החנות לא תקינה והבקשה לא נשלחה בכלל
+    """
+
+    def __init__(self, endpoint: str = "", retry_in: float = 0):
+        super().__init__(
+            f"WooCommerce is unavailable, skipping request to '{endpoint}' (retry in {retry_in:.0f}s)",
+            status_code=503,
+            endpoint=endpoint
+        )
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """
+    דלי אסימונים - מגביל את קצב הבקשות לחנות עם אפשרות לפרץ קצר
+    """
+
+    def __init__(self, rate: float = WOO_RATE_LIMIT, burst: int = WOO_RATE_BURST):
+        """
+        Args:
+            rate: מספר בקשות בשנייה (0 מבטל את ההגבלה)
+            burst: מספר בקשות מקסימלי ברצף
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self.throttled = 0
+
+    async def acquire(self) -> None:
+        """
+        ממתין עד שיש אסימון פנוי. כל קורא שומר לעצמו אסימון מיד (גם אם היתרה שלילית)
+        וממתין את הזמן שנדרש למילוי שלו, כך שאין צורך בנעילה.
+        """
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            self.throttled += 1
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    הגבלת מקביליות אדפטיבית (AIMD): המגבלה גדלה בהדרגה כל עוד החנות עונה מהר,
+    ונחתכת בחצי כשהחנות מחזירה 429/5xx או עונה לאט
+    """
+
+    def __init__(
+        self,
+        min_limit: int = WOO_MIN_CONCURRENCY,
+        max_limit: int = WOO_MAX_CONCURRENCY,
+        slow_threshold: float = WOO_SLOW_RESPONSE_THRESHOLD
+    ):
+        """
+        Args:
+            min_limit: מגבלת מקביליות מינימלית
+            max_limit: מגבלת מקביליות מקסימלית (גם ערך ההתחלה)
+            slow_threshold: זמן תגובה בשניות שמעליו התגובה נחשבת איטית
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.slow_threshold = slow_threshold
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.decreases = 0
+
+    async def acquire(self) -> None:
+        """
+        ממתין עד שיש מקום לבקשה נוספת
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # אם המקום כבר הועבר לממתין שבוטל, משחרר אותו לבא בתור
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """
+        משחרר מקום ומעביר אותו לממתינים לפי הסדר
+        """
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if waiter.done() or waiter.get_loop().is_closed():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def on_success(self, latency: float) -> None:
+        """
+        מעדכן את המגבלה אחרי תגובה תקינה
+        """
+        if latency > self.slow_threshold:
+            self.on_overload()
+        elif self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_overload(self) -> None:
+        """
+        חותך את המגבלה בחצי - לכל היותר פעם אחת בכל חלון של slow_threshold,
+        כדי שגל של תגובות כושלות מאותו עומס לא יוריד את המגבלה עד למינימום
+        """
+        now = time.monotonic()
+        if now - self._last_decrease < self.slow_threshold:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit / 2)
+        self.decreases += 1
+        logger.warning(f"WooCommerce is overloaded, reducing concurrency limit to {int(self.limit)}")
+
+
+class CircuitBreaker:
+    """
+    מפסק זרם: אחרי רצף כישלונות מפסיק לשלוח בקשות לחנות לזמן מה,
+    ואז מאפשר בקשת ניסיון אחת כדי לבדוק אם החנות חזרה
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = WOO_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = WOO_BREAKER_RECOVERY_TIMEOUT
+    ):
+        """
+        Args:
+            failure_threshold: מספר כישלונות רצופים שפותח את המפסק
+            recovery_timeout: זמן בשניות עד בקשת הניסיון הבאה
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self.rejected = 0
+
+    def retry_in(self) -> float:
+        """
+        כמה שניות נותרו עד בקשת הניסיון הבאה
+        """
+        return max(0.0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """
+        האם מותר לשלוח בקשה עכשיו
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and self.retry_in() == 0:
+            self.state = self.HALF_OPEN
+            logger.info("Circuit breaker half-open, sending a probe request to WooCommerce")
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """
+        מתעד בקשה מוצלחת - סוגר את המפסק
+        """
+        if self.state != self.CLOSED:
+            logger.info("WooCommerce recovered, circuit breaker closed")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def abort_probe(self) -> None:
+        """
+        מבטל בקשת ניסיון שלא הסתיימה (למשל כשהקורא בוטל) - המפסק חוזר למצב פתוח,
+        ובקשת הניסיון הבאה מותרת מיד כי לא התקבלה שום עדות לכך שהחנות עדיין לא זמינה
+        """
+        if self.state == self.HALF_OPEN:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic() - self.recovery_timeout
+
+    def record_failure(self) -> None:
+        """
+        מתעד בקשה כושלת - פותח את המפסק אחרי רצף כישלונות או כשבקשת הניסיון נכשלה
+        """
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            logger.error(
+                f"Circuit breaker opened after {self.failures} failures, "
+                f"pausing WooCommerce requests for {self.recovery_timeout} seconds"
+            )
+
+
+class Resilience:
+    """
+    מרכיב את הגבלת הקצב, הגבלת המקביליות, הניסיונות החוזרים ומפסק הזרם סביב שליחת בקשה
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[TokenBucket] = None,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retry_attempts: int = WOO_RETRY_ATTEMPTS,
+        retry_base_delay: float = WOO_RETRY_BASE_DELAY,
+        retry_max_delay: float = WOO_RETRY_MAX_DELAY
+    ):
+        """
+        Args:
+            bucket: דלי האסימונים
+            limiter: מגביל המקביליות
+            breaker: מפסק הזרם
+            retry_attempts: מספר ניסיונות מקסימלי לבקשת GET
+            retry_base_delay: ההמתנה הבסיסית בין ניסיונות בשניות
+            retry_max_delay: ההמתנה המקסימלית בין ניסיונות בשניות
+        """
+        self.bucket = bucket or TokenBucket()
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_attempts = max(1, retry_attempts)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.retries = 0
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """
+        זמן ההמתנה לפני הניסיון הבא - לפי Retry-After אם החנות שלחה אותו,
+        אחרת השהיה מעריכית עם jitter מלא כדי שהניסיונות החוזרים לא יגיעו יחד
+        """
+        if retry_after:
+            try:
+                return min(self.retry_max_delay, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def call(self, method: str, endpoint: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        שולח בקשה דרך שכבת העמידות
+
+        Args:
+            method: שיטת ה-HTTP
+            endpoint: נקודת הקצה (ללוגים ולשגיאות)
+            send: פונקציה ששולחת את הבקשה ומחזירה תשובה עם status_code
+
+        Returns:
+            התשובה האחרונה שהתקבלה
+
+        Raises:
+            CircuitOpenError: אם מפסק הזרם פתוח
+            WooCommerceError: אם הבקשה נכשלה בכל הניסיונות
+        """
+        attempts = self.retry_attempts if method.upper() in IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(endpoint, self.breaker.retry_in())
+
+            probe = self.breaker.state == CircuitBreaker.HALF_OPEN
+            response, error = None, None
+            try:
+                await self.bucket.acquire()
+                await self.limiter.acquire()
+                started = time.monotonic()
+                try:
+                    response = await send()
+                except WooCommerceError as e:
+                    error = e
+                finally:
+                    self.limiter.release()
+            except BaseException as e:
+                # בקשת ניסיון שבוטלה או שנכשלה בשגיאה לא צפויה לא יכולה להשאיר את המפסק חצי פתוח לתמיד
+                if probe:
+                    if isinstance(e, Exception):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.abort_probe()
+                raise
+
+            latency = time.monotonic() - started
+            overloaded = error.retryable if error is not None else (
+                response.status_code == 429 or response.status_code >= 500
+            )
+            if not overloaded:
+                self.limiter.on_success(latency)
+                self.breaker.record_success()
+                if error is not None:
+                    raise error
+                return response
+
+            self.limiter.on_overload()
+            self.breaker.record_failure()
+            if attempt == attempts - 1 or self.breaker.state == CircuitBreaker.OPEN:
+                if error is not None:
+                    raise error
+                return response
+
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            delay = self._backoff(attempt, retry_after)
+            self.retries += 1
+            logger.warning(
+                f"WooCommerce request to '{endpoint}' failed "
+                f"({error or response.status_code}), retrying in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על שכבת העמידות
+        """
+        return {
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "rejected": self.breaker.rejected,
+            "concurrency_limit": int(self.limiter.limit),
+            "in_flight": self.limiter.in_flight,
+            "limit_decreases": self.limiter.decreases,
+            "throttled": self.bucket.throttled,
+            "retries": self.retries
+        }
@@ -0,0 +1,58 @@
+"""
+טיפוסי שגיאה ותוצאה לקריאות ל-WooCommerce API
+"""
+
+from dataclasses import dataclass
+from typing import Generic, Optional, TypeVar
+
+# הגדרת טיפוס גנרי לערך התוצאה
+T = TypeVar('T')
+
+
+class WooCommerceError(Exception):
+    """
+    שגיאה בקריאה ל-WooCommerce - תשובת שגיאה מהחנות, תקלת רשת או תוכן לא תקין
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, endpoint: str = ""):
+        """
+        Args:
+            message: תיאור השגיאה
+            status_code: קוד ה-HTTP שהחנות החזירה, או None בתקלת רשת
+            endpoint: נקודת הקצה שנקראה
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.endpoint = endpoint
+
+    @property
+    def retryable(self) -> bool:
+        """
+        האם כדאי לנסות שוב - תקלות רשת, עומס (429) ושגיאות שרת (5xx)
+        """
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+@dataclass
+class Result(Generic[T]):
+    """
+    תוצאה של קריאה שמבדילה בין הצלחה לכישלון, במקום להחזיר רשימה ריקה בשגיאה
+    """
+    value: Optional[T] = None
+    error: Optional[WooCommerceError] = None
+    stale: bool = False  # האם הערך הוגש מהמטמון אחרי שפג תוקפו
+
+    @property
+    def ok(self) -> bool:
+        """
+        האם הקריאה הצליחה
+        """
+        return self.error is None
+
+    def unwrap(self) -> T:
+        """
+        מחזיר את הערך, או זורק את השגיאה אם הקריאה נכשלה
+        """
+        if self.error is not None:
+            raise self.error
+        return self.value
@@ -0,0 +1,278 @@
+"""
+אינדקס חיפוש מוצרים בזיכרון - עברית ואנגלית, עם התאמה חלקית ותיקון שגיאות הקלדה
+"""
+
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Any, Iterable, Set, Tuple
+
+from src.config import SEARCH_INDEX_REFRESH_INTERVAL, SEARCH_FUZZY_THRESHOLD
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# אותיות סופיות מנורמלות לאות הרגילה, כדי ש"שולחן" ו"שולחנות" יחלקו את אותן אותיות
+FINAL_LETTERS = str.maketrans({"ך": "כ", "ם": "מ", "ן": "נ", "ף": "פ", "ץ": "צ"})
+
+# אותיות שימוש בתחילת מילה (ה, ו, ב, כ, ל, מ, ש) - "בחולצה" ימצא "חולצה"
+HEBREW_PREFIXES = "הובכלמש"
+
+# משקל ההתאמה לפי השדה שבו נמצאה המילה
+FIELD_WEIGHTS = {
+    "sku": 5.0,
+    "name": 3.0,
+    "categories": 1.5,
+    "tags": 1.0
+}
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """
+    מנרמל טקסט לחיפוש: אותיות קטנות, הסרת ניקוד וטעמים, החלפת אותיות סופיות והסרת גרשיים
+
+    Args:
+        text: הטקסט המקורי
+
+    Returns:
+        הטקסט המנורמל
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return stripped.translate(FINAL_LETTERS).replace("״", "").replace("׳", "").replace('"', "").replace("'", "")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    מפרק טקסט למילים מנורמלות
+    """
+    return _TOKEN_PATTERN.findall(normalize(text))
+
+
+def trigrams(token: str) -> Set[str]:
+    """
+    מחזיר את שלשות האותיות של מילה, עם ריפוד בקצוות כדי שגם מילים קצרות יקבלו שלשות
+    """
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _is_hebrew(token: str) -> bool:
+    return "א" <= token[0] <= "ת"
+
+
+class SearchIndex:
+    """
+    אינדקס הפוך (מילה -> מוצרים) עם אינדקס שלשות אותיות על אוצר המילים לחיפוש עמום.
+    מתעדכן במקום כשמוצר משתנה, בלי לבנות את כל האינדקס מחדש.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = SEARCH_INDEX_REFRESH_INTERVAL,
+        fuzzy_threshold: float = SEARCH_FUZZY_THRESHOLD
+    ):
+        """
+        Args:
+            refresh_interval: כל כמה שניות האינדקס נבנה מחדש מהקטלוג המלא
+            fuzzy_threshold: דמיון מינימלי (Jaccard על שלשות אותיות) להתאמה עמומה
+        """
+        self.refresh_interval = refresh_interval
+        self.fuzzy_threshold = fuzzy_threshold
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)  # מילה -> מוצר -> משקל
+        self._doc_tokens: Dict[int, Dict[str, float]] = {}  # מוצר -> מילה -> משקל
+        self._documents: Dict[int, Dict[str, Any]] = {}  # מוצר -> הרשומה המצומצמת שמוחזרת בתוצאות
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)  # שלשה -> מילים
+        self._vocabulary: List[str] = []  # אוצר המילים ממוין, לחיפוש לפי תחילית
+        self._lock = threading.RLock()
+        self.built_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def needs_rebuild(self) -> bool:
+        """
+        האם האינדקס עוד לא נבנה או שהגיע הזמן לבנות אותו מחדש
+        """
+        return not self.built_at or time.time() - self.built_at > self.refresh_interval
+
+    @staticmethod
+    def _document_tokens(product: Dict[str, Any]) -> Dict[str, float]:
+        """
+        מחזיר את המילים של מוצר ואת המשקל של כל אחת (המשקל הגבוה מבין השדות שבהם הופיעה)
+        """
+        fields = {
+            "name": [product.get("name") or ""],
+            "sku": [product.get("sku") or ""],
+            "categories": [category.get("name") or "" for category in product.get("categories") or []],
+            "tags": [tag.get("name") or "" for tag in product.get("tags") or []]
+        }
+        weights: Dict[str, float] = {}
+        for field, values in fields.items():
+            for value in values:
+                for token in tokenize(value):
+                    weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+        return weights
+
+    def _add_token(self, token: str) -> None:
+        if token in self._postings and self._postings[token]:
+            return
+        for gram in trigrams(token):
+            self._trigrams[gram].add(token)
+        bisect.insort(self._vocabulary, token)
+
+    def _drop_token(self, token: str) -> None:
+        del self._postings[token]
+        for gram in trigrams(token):
+            tokens = self._trigrams.get(gram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[gram]
+        index = bisect.bisect_left(self._vocabulary, token)
+        if index < len(self._vocabulary) and self._vocabulary[index] == token:
+            del self._vocabulary[index]
+
+    def _remove_locked(self, product_id: int) -> None:
+        for token in self._doc_tokens.pop(product_id, {}):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                self._drop_token(token)
+        self._documents.pop(product_id, None)
+
+    def upsert(self, product: Dict[str, Any]) -> None:
+        """
+        מוסיף מוצר לאינדקס או מעדכן אותו
+        """
+        if "id" not in product:
+            return
+        with self._lock:
+            self._remove_locked(product["id"])
+            if product.get("status") == "trash":
+                return
+            weights = self._document_tokens(product)
+            for token, weight in weights.items():
+                self._add_token(token)
+                self._postings[token][product["id"]] = weight
+            self._doc_tokens[product["id"]] = weights
+            self._documents[product["id"]] = {
+                key: product[key]
+                for key in ("id", "name", "sku", "price", "stock_status", "status", "permalink")
+                if key in product
+            }
+
+    def remove(self, product_id: int) -> None:
+        """
+        מסיר מוצר מהאינדקס
+        """
+        with self._lock:
+            self._remove_locked(product_id)
+
+    def rebuild(self, products: Iterable[Dict[str, Any]]) -> None:
+        """
+        בונה את האינדקס מחדש מהקטלוג המלא
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._postings.clear()
+            self._doc_tokens.clear()
+            self._documents.clear()
+            self._trigrams.clear()
+            self._vocabulary = []
+            for product in products:
+                self.upsert(product)
+            self.built_at = time.time()
+        logger.info(f"Built product search index with {len(self._documents)} products and "
+                    f"{len(self._vocabulary)} terms in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def _candidates(self, token: str) -> List[Tuple[str, float]]:
+        """
+        מחזיר את המילים באינדקס שמתאימות למילה מהשאילתה, עם ציון דמיון בין 0 ל-1:
+        התאמה מדויקת, המילה בלי אות שימוש, תחילית של מילה, ולבסוף התאמה עמומה לפי שלשות אותיות
+        """
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if len(token) > 3 and _is_hebrew(token) and token[0] in HEBREW_PREFIXES and token[1:] in self._postings:
+            matches.setdefault(token[1:], 0.9)
+
+        # תחילית - "חולצ" ימצא "חולצה" ו"חולצות"
+        if len(token) >= 2:
+            index = bisect.bisect_left(self._vocabulary, token)
+            while index < len(self._vocabulary) and self._vocabulary[index].startswith(token):
+                matches.setdefault(self._vocabulary[index], 0.8)
+                index += 1
+        if matches:
+            return list(matches.items())
+
+        # התאמה עמומה - רק כשאין התאמה ישירה, כדי שהחיפוש הרגיל יישאר מהיר
+        query_grams = trigrams(token)
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query_grams:
+            for candidate in self._trigrams.get(gram, ()):
+                shared[candidate] += 1
+        for candidate, count in shared.items():
+            similarity = count / (len(query_grams) + len(trigrams(candidate)) - count)
+            if similarity >= self.fuzzy_threshold:
+                matches[candidate] = similarity * 0.7
+        return list(matches.items())
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        מחפש מוצרים לפי טקסט חופשי
+
+        Args:
+            query: טקסט החיפוש בעברית או באנגלית
+            limit: מספר התוצאות המקסימלי
+
+        Returns:
+            המוצרים המתאימים ביותר, ממוינים לפי ציון
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores: Dict[int, float] = defaultdict(float)
+            matched: Dict[int, int] = defaultdict(int)
+            for token in tokens:
+                best: Dict[int, float] = {}
+                for candidate, similarity in self._candidates(token):
+                    for product_id, weight in self._postings[candidate].items():
+                        score = weight * similarity
+                        if score > best.get(product_id, 0.0):
+                            best[product_id] = score
+                for product_id, score in best.items():
+                    scores[product_id] += score
+                    matched[product_id] += 1
+
+            # מוצרים שמתאימים לכל המילים בשאילתה קודמים למוצרים שמתאימים רק לחלקן
+            ranked = sorted(scores, key=lambda product_id: (matched[product_id], scores[product_id]), reverse=True)
+            return [
+                {**self._documents[product_id], "score": round(scores[product_id], 2)}
+                for product_id in ranked[:limit]
+            ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על האינדקס
+        """
+        return {
+            "products": len(self._documents),
+            "terms": len(self._vocabulary),
+            "trigrams": len(self._trigrams),
+            "age": time.time() - self.built_at if self.built_at else None
+        }
+
+
+# אינדקס החיפוש הגלובלי של המוצרים
+product_index = SearchIndex()
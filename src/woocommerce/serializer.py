@@ -0,0 +1,189 @@
+"""
+פענוח וקידוד JSON דרך מנוע נבחר - orjson כשהוא מותקן, ואחרת הספרייה הסטנדרטית.
+כולל מפענח הדרגתי לרשימות גדולות, שמחזיר פריטים ברגע שהם מגיעים במקום לחכות לכל התשובה.
+"""
+
+import codecs
+import json
+import logging
+from typing import List, Any, AsyncIterable, Union
+
+from src.config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# המנוע הפעיל: orjson רק אם הוא מותקן ולא נבחרה במפורש הספרייה הסטנדרטית
+BACKEND = "orjson" if orjson is not None and JSON_BACKEND in ("auto", "orjson") else "json"
+if JSON_BACKEND == "orjson" and orjson is None:
+    logger.warning("JSON_BACKEND is set to orjson but orjson is not installed, using the standard json module")
+
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    מפענח JSON
+
+    Raises:
+        ValueError: אם התוכן אינו JSON תקין
+    """
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    מקודד ל-JSON בקידוד UTF-8, בלי רווחים ובלי escape לתווים שאינם ASCII
+
+    Raises:
+        TypeError: אם האובייקט אינו ניתן לקידוד
+    """
+    if BACKEND == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """
+    מקודד ל-JSON כמחרוזת
+
+    Raises:
+        TypeError: אם האובייקט אינו ניתן לקידוד
+    """
+    if BACKEND == "orjson":
+        return dumps_bytes(obj, sort_keys).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys)
+
+
+class ArrayStreamParser:
+    """
+    מפענח הדרגתי למערך JSON: מקבל את התשובה בחתיכות ומחזיר כל פריט שהושלם.
+    תשובה שאינה מערך (למשל הודעת שגיאה) נאספת ומפוענחת בשלמותה בסוף.
+    """
+
+    def __init__(self):
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = "start"  # start, first, next, item, done או raw (תשובה שאינה מערך)
+        self._raw: List[str] = []
+
+    def _drain(self, final: bool) -> List[Any]:
+        items = []
+        buffer, position = self._buffer, 0
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position >= len(buffer):
+                break
+
+            if self._state == "start":
+                if buffer[position] != "[":
+                    self._state = "raw"
+                    self._raw.append(buffer[position:])
+                    position = len(buffer)
+                    break
+                self._state = "first"
+                position += 1
+            elif self._state in ("first", "next"):
+                if buffer[position] == "]":
+                    self._state = "done"
+                    position += 1
+                elif self._state == "next":
+                    if buffer[position] != ",":
+                        raise ValueError(f"Expected ',' or ']' in JSON array at position {position}")
+                    self._state = "item"
+                    position += 1
+                else:
+                    self._state = "item"
+            elif self._state == "item":
+                try:
+                    value, end = _DECODER.raw_decode(buffer, position)
+                except ValueError:
+                    if final:
+                        raise
+                    break
+                # ערך שנגמר בסוף החתיכה עשוי להימשך בחתיכה הבאה (למשל מספר)
+                if end >= len(buffer) and not final:
+                    break
+                items.append(value)
+                position = end
+                self._state = "next"
+            else:
+                raise ValueError(f"Unexpected data after the end of the JSON array at position {position}")
+
+        self._buffer = buffer[position:]
+        return items
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        מוסיף חתיכה מהתשובה
+
+        Returns:
+            הפריטים שהושלמו בחתיכה זו
+        """
+        text = self._text.decode(chunk)
+        if self._state == "raw":
+            self._raw.append(text)
+            return []
+        self._buffer += text
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        """
+        מסיים את הפענוח
+
+        Returns:
+            הפריטים האחרונים שהושלמו
+
+        Raises:
+            ValueError: אם התשובה נקטעה או אינה JSON תקין
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        items = self._drain(final=True) if self._state != "raw" else []
+        if self._state == "start":
+            # תשובה ריקה
+            self._state = "raw"
+        if self._state not in ("done", "raw"):
+            raise ValueError("Truncated JSON array")
+        return items
+
+    @property
+    def is_array(self) -> bool:
+        """
+        האם התשובה היא מערך (False לתשובה שנאספה בשלמותה)
+        """
+        return self._state != "raw"
+
+    def raw_value(self) -> Any:
+        """
+        מפענח תשובה שאינה מערך, אחרי close (תשובה ריקה מחזירה None)
+        """
+        text = "".join(self._raw)
+        return loads(text) if text.strip() else None
+
+
+async def read_json(chunks: AsyncIterable[bytes]) -> Any:
+    """
+    מפענח תשובת JSON בהדרגה: מערך נבנה פריט אחרי פריט בזמן שהתשובה מגיעה,
+    וכל תשובה אחרת מפוענחת בשלמותה בסוף
+
+    Raises:
+        ValueError: אם התשובה אינה JSON תקין
+    """
+    parser = ArrayStreamParser()
+    items: List[Any] = []
+    async for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    items.extend(parser.close())
+    if not parser.is_array:
+        return parser.raw_value()
+    return items
@@ -0,0 +1,533 @@
+"""
+מטמון משותף (שכבה שנייה) בין כמה תהליכים של הבוט - מאחורי המטמון שבזיכרון.
+כתיבות נאספות ונשלחות בקבוצות, וכל ביטול או עדכון של רשומה מופץ לשאר התהליכים
+(LISTEN/NOTIFY ב-PostgreSQL, או טבלת ביטולים משותפת בקובץ SQLite).
+"""
+
+import asyncio
+import datetime
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Any, Callable, Hashable, Optional, Tuple
+
+from src.config import (
+    SHARED_CACHE_ENABLED, SHARED_CACHE_BACKEND, SHARED_CACHE_SQLITE_PATH, SHARED_CACHE_CHANNEL,
+    SHARED_CACHE_FLUSH_INTERVAL, SHARED_CACHE_BATCH_SIZE, SHARED_CACHE_POLL_INTERVAL,
+    DB_ENABLED, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+)
+from src.woocommerce.serializer import dumps, loads
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# קידומת לשאילתות של המטמון המשותף, כדי להבדיל אותן מתשובות הסוכן באותה טבלה
+KEY_PREFIX = "woo:"
+
+# רשומה במטמון המשותף: (ערך כ-JSON, זמן השמירה)
+SharedRow = Tuple[str, float]
+
+# מרווח בין ניקויים של רשומות שכבר אי אפשר להגיש, בשניות
+PRUNE_INTERVAL = 60
+
+# ביטול: (פונקציה, מפתח) - פונקציה None מנקה הכל, מפתח None מנקה את כל הפונקציה
+Invalidation = Tuple[Optional[str], Optional[Tuple[Hashable, ...]]]
+
+
+def _to_key(value: Any) -> Any:
+    """
+    משחזר מפתח מטמון מ-JSON - מפתחות מטמון בנויים מטאפלים בלבד, ולכן כל רשימה הופכת לטאפל
+    """
+    if isinstance(value, list):
+        return tuple(_to_key(item) for item in value)
+    return value
+
+
+def key_hash(cache_key: Tuple[Hashable, ...]) -> str:
+    """
+    מחזיר את המזהה של מפתח מטמון במטמון המשותף
+    """
+    return hashlib.sha256(f"{KEY_PREFIX}{dumps(cache_key)}".encode("utf-8")).hexdigest()
+
+
+def key_label(cache_key: Tuple[Hashable, ...]) -> str:
+    """
+    מחזיר את המפתח בצורה קריאה - שם הפונקציה בהתחלה, כדי שאפשר יהיה למחוק את כל הרשומות של פונקציה
+    """
+    return f"{KEY_PREFIX}{cache_key[0]}|{dumps(cache_key)}"
+
+
+def _function_prefix(function_name: Optional[str]) -> str:
+    """
+    מחזיר תבנית LIKE לכל הרשומות של פונקציה (או לכל רשומות המטמון המשותף), עם escape לתווים מיוחדים
+    """
+    prefix = f"{KEY_PREFIX}{function_name}|" if function_name is not None else KEY_PREFIX
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class SQLiteSharedStore:
+    """
+    מטמון משותף בקובץ SQLite - לכמה תהליכים על אותה מכונה.
+    הקובץ ממופה לזיכרון (mmap), וביטולים נרשמים בטבלה שכל תהליך קורא ממנה את מה שחדש.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: נתיב קובץ מסד הנתונים
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_seq = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_cache ("
+                "query_hash TEXT PRIMARY KEY, query TEXT NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_shared_cache_created_at ON shared_cache (created_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_cache_invalidations ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            row = conn.execute("SELECT MAX(seq) FROM shared_cache_invalidations").fetchone()
+            self._last_seq = row[0] or 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    def get_many(self, hashes: List[str]) -> Dict[str, SharedRow]:
+        """
+        שולף רשומות לפי מזהה
+        """
+        placeholders = ",".join("?" for _ in hashes)
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT query_hash, response, created_at FROM shared_cache WHERE query_hash IN ({placeholders})",
+                hashes
+            ).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def apply(
+        self,
+        rows: List[Tuple[str, str, str, float]],
+        deleted_hashes: List[str],
+        deleted_prefixes: List[str],
+        notifications: List[str]
+    ) -> None:
+        """
+        כותב קבוצת שינויים בטרנזקציה אחת ורושם את הביטולים לשאר התהליכים
+        """
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany("DELETE FROM shared_cache WHERE query_hash = ?", [(h,) for h in deleted_hashes])
+            conn.executemany("DELETE FROM shared_cache WHERE query LIKE ? ESCAPE '\\'", [(p,) for p in deleted_prefixes])
+            conn.executemany(
+                "INSERT OR REPLACE INTO shared_cache (query_hash, query, response, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(
+                "INSERT INTO shared_cache_invalidations (payload, created_at) VALUES (?, ?)",
+                [(payload, now) for payload in notifications]
+            )
+            # ביטולים ישנים כבר נקראו על ידי כל התהליכים
+            conn.execute("DELETE FROM shared_cache_invalidations WHERE created_at < ?", (now - 3600,))
+
+    def prune(self, before: float) -> int:
+        """
+        מוחק רשומות שנשמרו לפני זמן מסוים
+
+        Returns:
+            מספר הרשומות שנמחקו
+        """
+        with self._lock, self._connect() as conn:
+            return conn.execute("DELETE FROM shared_cache WHERE created_at < ?", (before,)).rowcount
+
+    def poll(self) -> List[str]:
+        """
+        מחזיר את הביטולים שנרשמו מאז הקריאה הקודמת
+        """
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, payload FROM shared_cache_invalidations WHERE seq > ? ORDER BY seq",
+                (self._last_seq,)
+            ).fetchall()
+        if rows:
+            self._last_seq = rows[-1][0]
+        return [row[1] for row in rows]
+
+
+class PostgresSharedStore:
+    """
+    מטמון משותף בטבלת cached_responses של הבוט, עם הפצת ביטולים ב-LISTEN/NOTIFY
+    """
+
+    def __init__(self, channel: str):
+        """
+        Args:
+            channel: ערוץ ה-NOTIFY שבו מופצים הביטולים
+        """
+        self.channel = channel
+        self._connection: Any = None
+
+    def get_many(self, hashes: List[str]) -> Dict[str, SharedRow]:
+        """
+        שולף רשומות לפי מזהה
+        """
+        from src.database.repository import get_shared_cache_entries
+        return {
+            query_hash: (response, created_at.replace(tzinfo=datetime.timezone.utc).timestamp())
+            for query_hash, (response, created_at) in get_shared_cache_entries(hashes).items()
+        }
+
+    def apply(
+        self,
+        rows: List[Tuple[str, str, str, float]],
+        deleted_hashes: List[str],
+        deleted_prefixes: List[str],
+        notifications: List[str]
+    ) -> None:
+        """
+        כותב קבוצת שינויים בטרנזקציה אחת. ה-NOTIFY נשלח רק כשהטרנזקציה מסתיימת,
+        כך ששאר התהליכים תמיד קוראים את הערך החדש
+        """
+        from src.database.repository import save_shared_cache_entries
+        utc_rows = [
+            (query_hash, query, response, datetime.datetime.utcfromtimestamp(created_at))
+            for query_hash, query, response, created_at in rows
+        ]
+        if not save_shared_cache_entries(utc_rows, deleted_hashes, deleted_prefixes, self.channel, notifications):
+            raise RuntimeError("Failed to write shared cache entries to the database")
+
+    def poll(self) -> List[str]:
+        # ביטולים מגיעים דרך LISTEN, לא בתשאול
+        return []
+
+    async def listen(self, callback: Callable[[str], None]) -> None:
+        """
+        מאזין לביטולים מתהליכים אחרים עד שהמשימה מבוטלת, ומתחבר מחדש אם החיבור נפל
+        """
+        import asyncpg
+
+        while True:
+            try:
+                self._connection = await asyncpg.connect(
+                    host=DB_HOST, port=DB_PORT, database=DB_NAME, user=DB_USER, password=DB_PASSWORD
+                )
+                await self._connection.add_listener(
+                    self.channel, lambda connection, pid, channel, payload: callback(payload)
+                )
+                logger.info(f"Listening for shared cache invalidations on channel {self.channel}")
+                while not self._connection.is_closed():
+                    await asyncio.sleep(5)
+                logger.warning("Shared cache invalidation listener disconnected, reconnecting")
+            except asyncio.CancelledError:
+                if self._connection is not None and not self._connection.is_closed():
+                    await self._connection.close()
+                raise
+            except Exception as e:
+                logger.error(f"Shared cache invalidation listener failed: {e}")
+            await asyncio.sleep(5)
+
+
+class SharedCache:
+    """
+    שכבת המטמון השנייה: קריאה מיידית, כתיבה בקבוצות מ-thread ברקע, והפצת ביטולים.
+    ביטול נשלח רק אחרי שהכתיבות שלפניו נשמרו, כדי שתהליך אחר לא יקרא ערך ישן.
+    """
+
+    def __init__(
+        self,
+        store: Optional[Any] = None,
+        flush_interval: float = SHARED_CACHE_FLUSH_INTERVAL,
+        batch_size: int = SHARED_CACHE_BATCH_SIZE,
+        poll_interval: float = SHARED_CACHE_POLL_INTERVAL
+    ):
+        """
+        Args:
+            store: מנגנון השמירה (SQLiteSharedStore או PostgresSharedStore), או None כשהמטמון המשותף כבוי
+            flush_interval: זמן מקסימלי שכתיבה ממתינה בתור בשניות
+            batch_size: מספר כתיבות שממנו התור נשלח מיד
+            poll_interval: מרווח בין בדיקות ביטולים בשניות (ב-SQLite)
+        """
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.origin = uuid.uuid4().hex
+        self.on_invalidate: Optional[Callable[[Invalidation], None]] = None
+        # הגיל המקסימלי בשניות שבו עוד מגישים רשומה (זמן התפוגה הארוך ביותר וחלון הערך הישן)
+        self.max_age: Optional[Callable[[], float]] = None
+        self._pending: Dict[Tuple[Hashable, ...], Tuple[Any, float, Callable[[Any], Any]]] = {}
+        self._deleted_keys: set = set()
+        self._deleted_functions: set = set()
+        self._notifications: List[str] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listener: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.writes = 0
+        self.flushes = 0
+        self.invalidations_sent = 0
+        self.invalidations_received = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def get(self, cache_key: Tuple[Hashable, ...]) -> Optional[Tuple[Any, float]]:
+        """
+        קורא רשומה מהמטמון המשותף
+
+        Args:
+            cache_key: מפתח המטמון
+
+        Returns:
+            (הערך, זמן השמירה), או None אם אין רשומה
+        """
+        if self.store is None:
+            return None
+        query_hash = key_hash(cache_key)
+        try:
+            row = self.store.get_many([query_hash]).get(query_hash)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error reading from shared cache: {e}")
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return loads(row[0]), row[1]
+
+    async def get_async(self, cache_key: Tuple[Hashable, ...]) -> Optional[Tuple[Any, float]]:
+        """
+        קורא רשומה מהמטמון המשותף בלי לעצור את לולאת האירועים
+        """
+        if self.store is None:
+            return None
+        return await asyncio.to_thread(self.get, cache_key)
+
+    def put(
+        self,
+        cache_key: Tuple[Hashable, ...],
+        data: Any,
+        timestamp: float,
+        dump: Callable[[Any], Any] = lambda value: value,
+        broadcast: bool = False
+    ) -> None:
+        """
+        מוסיף כתיבה לתור. הקידוד ל-JSON נעשה ב-thread של הכתיבה, לא אצל מי שקרא.
+
+        Args:
+            cache_key: מפתח המטמון
+            data: הערך כפי שנשמר במטמון שבזיכרון
+            timestamp: זמן השמירה
+            dump: ממיר את הערך למבנה פשוט לפני הקידוד
+            broadcast: האם להודיע לשאר התהליכים שהערך השתנה (עדכון ולא רק טעינה)
+        """
+        if self.store is None:
+            return
+        with self._lock:
+            self._pending[cache_key] = (data, timestamp, dump)
+            self._deleted_keys.discard(cache_key)
+            if broadcast:
+                self._notifications.append(self._message(cache_key[0], cache_key))
+            full = len(self._pending) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def invalidate(self, function_name: Optional[str] = None, cache_key: Optional[Tuple[Hashable, ...]] = None) -> None:
+        """
+        מוחק רשומה, את כל הרשומות של פונקציה, או את כל המטמון המשותף, ומודיע לשאר התהליכים
+
+        Args:
+            function_name: שם הפונקציה (None מוחק הכל)
+            cache_key: מפתח הרשומה (None מוחק את כל הרשומות של הפונקציה)
+        """
+        if self.store is None:
+            return
+        with self._lock:
+            if cache_key is not None:
+                self._pending.pop(cache_key, None)
+                self._deleted_keys.add(cache_key)
+            else:
+                for key in [key for key in self._pending if function_name is None or key[0] == function_name]:
+                    del self._pending[key]
+                self._deleted_functions.add(function_name)
+            self._notifications.append(self._message(function_name, cache_key))
+        self._ensure_thread()
+
+    def _message(self, function_name: Optional[str], cache_key: Optional[Tuple[Hashable, ...]]) -> str:
+        return dumps({"origin": self.origin, "function": function_name, "key": cache_key})
+
+    def _receive(self, payload: str) -> None:
+        """
+        מטפל בביטול שהגיע מתהליך אחר
+        """
+        try:
+            message = loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed shared cache invalidation")
+            return
+        if message.get("origin") == self.origin or self.on_invalidate is None:
+            return
+        self.invalidations_received += 1
+        cache_key = _to_key(message["key"]) if message.get("key") is not None else None
+        self.on_invalidate((message.get("function"), cache_key))
+
+    def flush(self) -> None:
+        """
+        שולח את כל הכתיבות והביטולים שבתור
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            deleted_keys, self._deleted_keys = self._deleted_keys, set()
+            deleted_functions, self._deleted_functions = self._deleted_functions, set()
+            notifications, self._notifications = self._notifications, []
+        if not (pending or deleted_keys or deleted_functions or notifications):
+            return
+
+        try:
+            rows = [
+                (key_hash(cache_key), key_label(cache_key), dumps(dump(data)), timestamp)
+                for cache_key, (data, timestamp, dump) in pending.items()
+            ]
+            self.store.apply(
+                rows,
+                [key_hash(cache_key) for cache_key in deleted_keys],
+                [_function_prefix(function_name) for function_name in deleted_functions],
+                notifications
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error writing {len(pending)} entries to shared cache: {e}")
+            return
+        self.writes += len(pending)
+        self.flushes += 1
+        self.invalidations_sent += len(notifications)
+        logger.debug(f"Flushed {len(pending)} entries and {len(notifications)} invalidations to shared cache")
+
+    def prune(self) -> None:
+        """
+        מוחק מהמטמון המשותף רשומות שעבר זמן ההגשה שלהן (ב-PostgreSQL הניקוי התקופתי של מסד הנתונים עושה זאת)
+        """
+        if self.max_age is None or not hasattr(self.store, "prune"):
+            return
+        try:
+            removed = self.store.prune(time.time() - self.max_age())
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error pruning expired shared cache entries: {e}")
+            return
+        self.expired += removed
+        if removed:
+            logger.debug(f"Pruned {removed} expired entries from shared cache")
+
+    def _run(self) -> None:
+        next_poll = 0.0
+        next_prune = 0.0
+        while not self._stopped.is_set():
+            self._wakeup.wait(min(self.flush_interval, self.poll_interval))
+            self._wakeup.clear()
+            self.flush()
+            if time.monotonic() >= next_prune:
+                next_prune = time.monotonic() + PRUNE_INTERVAL
+                self.prune()
+            if time.monotonic() >= next_poll:
+                next_poll = time.monotonic() + self.poll_interval
+                try:
+                    for payload in self.store.poll():
+                        self._receive(payload)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error polling shared cache invalidations: {e}")
+        self.flush()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="shared-cache-writer", daemon=True)
+            self._thread.start()
+
+    async def start(self) -> None:
+        """
+        מפעיל את ה-thread של הכתיבה ואת ההאזנה לביטולים
+        """
+        if self.store is None:
+            return
+        self._ensure_thread()
+        if hasattr(self.store, "listen") and self._listener is None:
+            loop = asyncio.get_running_loop()
+
+            def receive(payload: str) -> None:
+                # הטיפול בביטול רץ ב-thread נפרד כדי לא לעצור את לולאת האירועים
+                loop.run_in_executor(None, self._receive, payload)
+
+            self._listener = loop.create_task(self.store.listen(receive))
+        logger.info(f"Shared cache enabled ({type(self.store).__name__})")
+
+    async def stop(self) -> None:
+        """
+        עוצר את ההאזנה ושולח את כל מה שנשאר בתור
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._thread is not None:
+            self._stopped.set()
+            self._wakeup.set()
+            await asyncio.to_thread(self._thread.join, 10)
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        קבלת סטטיסטיקות על המטמון המשותף
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "pending": len(self._pending),
+            "errors": self.errors,
+            "invalidations_sent": self.invalidations_sent,
+            "invalidations_received": self.invalidations_received,
+            "expired": self.expired
+        }
+
+
+def _create_store() -> Optional[Any]:
+    """
+    יוצר את מנגנון השמירה לפי ההגדרות
+    """
+    if not SHARED_CACHE_ENABLED:
+        return None
+    if SHARED_CACHE_BACKEND == "postgres":
+        if not DB_ENABLED:
+            logger.warning("SHARED_CACHE_BACKEND is postgres but the database is disabled, shared cache is off")
+            return None
+        return PostgresSharedStore(SHARED_CACHE_CHANNEL)
+    return SQLiteSharedStore(SHARED_CACHE_SQLITE_PATH)
+
+
+# המטמון המשותף הגלובלי - פעיל רק אם SHARED_CACHE_ENABLED
+shared_cache = SharedCache(store=_create_store())
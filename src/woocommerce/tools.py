@@ -9,46 +9,284 @@ from src.woocommerce.api import (
     get_products,
     get_categories,
     get_orders,
+    get_products_by_ids,
+    get_orders_by_ids,
+    query_orders,
+    query_products,
+    search_products,
     get_store_info,
     create_product,
     update_product,
-    delete_product
+    delete_product,
+    batch_products
 )
+from src.woocommerce.analytics import (
+    ANALYTICS_FIELDS,
+    OrderFrame,
+    order_analytics,
+    sales_by_period,
+    sales_summary,
+    status_breakdown,
+    top_customers,
+    top_products
+)
+from src.woocommerce.projection import api_fields, budget_for, compact_item, compact_list, fields_for
 
 # הגדרת לוגר
 logger = logging.getLogger(__name__)
 
-def get_products_tool() -> List[Dict[str, Any]]:
+async def get_products_tool() -> Any:
     """
-    כלי שמחזיר רשימה של כל המוצרים בחנות
+    כלי שמחזיר רשימה של כל המוצרים בחנות, בצורה מצומצמת
     
     Returns:
-        רשימה של מוצרים
+        רשימה של מוצרים, או מילון עם חלק מהמוצרים וסיכום אם הרשימה חורגת מתקציב הגודל
     """
     logger.info("Running get_products_tool")
-    return get_products()
+    fields = fields_for("get_products_tool")
+    products = await get_products(api_fields(fields) if fields else None)
+    return compact_list(products, fields, budget_for("get_products_tool"))
 
-def get_categories_tool() -> List[Dict[str, Any]]:
+async def get_categories_tool() -> Any:
     """
-    כלי שמחזיר רשימה של כל הקטגוריות בחנות
+    כלי שמחזיר רשימה של כל הקטגוריות בחנות, בצורה מצומצמת
     
     Returns:
-        רשימה של קטגוריות
+        רשימה של קטגוריות, או מילון עם חלק מהקטגוריות וסיכום אם הרשימה חורגת מתקציב הגודל
     """
     logger.info("Running get_categories_tool")
-    return get_categories()
+    categories = await get_categories()
+    return compact_list(categories, fields_for("get_categories_tool"), budget_for("get_categories_tool"))
 
-def get_orders_tool() -> List[Dict[str, Any]]:
+async def get_orders_tool() -> Any:
     """
-    כלי שמחזיר רשימה של כל ההזמנות בחנות
+    כלי שמחזיר רשימה של כל ההזמנות בחנות, בצורה מצומצמת
     
     Returns:
-        רשימה של הזמנות
+        רשימה של הזמנות, או מילון עם חלק מההזמנות וסיכום אם הרשימה חורגת מתקציב הגודל
     """
     logger.info("Running get_orders_tool")
-    return get_orders()
+    fields = fields_for("get_orders_tool")
+    orders = await get_orders(api_fields(fields) if fields else None)
+    return compact_list(orders, fields, budget_for("get_orders_tool"))
+
+async def _get_by_ids_tool(tool_name: str, ids: List[int], loader: Any) -> Dict[str, Any]:
+    """
+    מחזיר פריטים לפי מזהים בצורה מצומצמת, יחד עם רשימת המזהים שלא נמצאו
+    """
+    unique_ids = list(dict.fromkeys(ids))
+    items = await loader(unique_ids)
+    found = [item for item in items if item is not None]
+    not_found = [object_id for object_id, item in zip(unique_ids, items) if item is None]
+    return {
+        "items": compact_list(found, fields_for(tool_name), budget_for(tool_name)),
+        "not_found": not_found
+    }
+
+async def get_products_by_ids_tool(ids: List[int]) -> Dict[str, Any]:
+    """
+    כלי שמחזיר כמה מוצרים לפי מזהים בבקשה אחת
+    
+    Args:
+        ids: מזהי המוצרים
+    
+    Returns:
+        מילון עם המוצרים שנמצאו (items) ומזהים שלא נמצאו (not_found)
+    """
+    logger.info(f"Running get_products_by_ids_tool for {len(ids)} products")
+    return await _get_by_ids_tool("get_products_by_ids_tool", ids, get_products_by_ids)
+
+async def get_orders_by_ids_tool(ids: List[int]) -> Dict[str, Any]:
+    """
+    כלי שמחזיר כמה הזמנות לפי מזהים בבקשה אחת
+    
+    Args:
+        ids: מזהי ההזמנות
+    
+    Returns:
+        מילון עם ההזמנות שנמצאו (items) ומזהים שלא נמצאו (not_found)
+    """
+    logger.info(f"Running get_orders_by_ids_tool for {len(ids)} orders")
+    return await _get_by_ids_tool("get_orders_by_ids_tool", ids, get_orders_by_ids)
 
-def get_store_info_tool() -> Dict[str, Any]:
+def _compact_page(result: Dict[str, Any], tool_name: str) -> Dict[str, Any]:
+    """
+    מצמצם דף של תוצאות שאילתה לפלט של כלי
+    """
+    return {
+        "total": result["total"],
+        "page": result["page"],
+        "total_pages": result["total_pages"],
+        "items": compact_list(result["items"], fields_for(tool_name), budget_for(tool_name))
+    }
+
+async def query_orders_tool(
+    status: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    customer: Optional[int] = None,
+    search: Optional[str] = None,
+    orderby: Optional[str] = None,
+    order: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20
+) -> Dict[str, Any]:
+    """
+    כלי שמחזיר הזמנות לפי מסננים - הסינון מתבצע בחנות ורק ההזמנות המתאימות מוחזרות
+    
+    Args:
+        status: סטטוס ההזמנה, או כמה סטטוסים מופרדים בפסיקים
+        after: רק הזמנות שנוצרו אחרי התאריך (YYYY-MM-DD)
+        before: רק הזמנות שנוצרו לפני התאריך (YYYY-MM-DD)
+        customer: מזהה הלקוח
+        search: טקסט לחיפוש
+        orderby: שדה למיון
+        order: כיוון המיון (asc או desc)
+        page: מספר הדף
+        per_page: מספר הזמנות בדף
+    
+    Returns:
+        מילון עם מספר ההזמנות המתאימות, פרטי הדף וההזמנות בצורה מצומצמת
+    """
+    logger.info("Running query_orders_tool")
+    fields = fields_for("query_orders_tool")
+    result = await query_orders(
+        status=status, after=after, before=before, customer=customer, search=search,
+        orderby=orderby, order=order, page=page, per_page=per_page,
+        fields=api_fields(fields) if fields else None
+    )
+    return _compact_page(result, "query_orders_tool")
+
+async def query_products_tool(
+    search: Optional[str] = None,
+    category: Optional[int] = None,
+    stock_status: Optional[str] = None,
+    status: Optional[str] = None,
+    sku: Optional[str] = None,
+    on_sale: Optional[bool] = None,
+    min_price: Optional[str] = None,
+    max_price: Optional[str] = None,
+    orderby: Optional[str] = None,
+    order: Optional[str] = None,
+    page: int = 1,
+    per_page: int = 20
+) -> Dict[str, Any]:
+    """
+    כלי שמחזיר מוצרים לפי מסננים - הסינון מתבצע בחנות ורק המוצרים המתאימים מוחזרים
+    
+    Args:
+        search: טקסט לחיפוש
+        category: מזהה הקטגוריה
+        stock_status: מצב המלאי
+        status: סטטוס המוצר
+        sku: מק"ט
+        on_sale: רק מוצרים במבצע
+        min_price: מחיר מינימלי
+        max_price: מחיר מקסימלי
+        orderby: שדה למיון
+        order: כיוון המיון (asc או desc)
+        page: מספר הדף
+        per_page: מספר מוצרים בדף
+    
+    Returns:
+        מילון עם מספר המוצרים המתאימים, פרטי הדף והמוצרים בצורה מצומצמת
+    """
+    logger.info("Running query_products_tool")
+    fields = fields_for("query_products_tool")
+    result = await query_products(
+        search=search, category=category, stock_status=stock_status, status=status, sku=sku,
+        on_sale=on_sale, min_price=min_price, max_price=max_price, orderby=orderby, order=order,
+        page=page, per_page=per_page, fields=api_fields(fields) if fields else None
+    )
+    return _compact_page(result, "query_products_tool")
+
+async def search_products_tool(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    כלי שמחפש מוצרים לפי שם, מק"ט או קטגוריה, בעברית או באנגלית, גם עם שגיאות הקלדה
+    
+    Args:
+        query: טקסט החיפוש
+        limit: מספר התוצאות המקסימלי
+    
+    Returns:
+        המוצרים המתאימים ביותר
+    """
+    logger.info(f"Running search_products_tool with query: {query}")
+    return await search_products(query, limit)
+
+async def _order_frame() -> OrderFrame:
+    """
+    מחזיר את ההזמנות בייצוג עמודתי - נבנה מחדש רק כשרשימת ההזמנות במטמון השתנתה
+    """
+    return order_analytics.frame_for(await get_orders(ANALYTICS_FIELDS))
+
+async def sales_report_tool(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    period: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    כלי שמחזיר דוח מכירות: הכנסות, מספר הזמנות, ממוצע להזמנה, פילוח לפי סטטוס ואופציונלית לפי תקופה
+    
+    Args:
+        start: תאריך התחלה כולל (YYYY-MM-DD)
+        end: תאריך סיום לא כולל (YYYY-MM-DD)
+        period: קיבוץ לפי תקופה - day, week, month או year (אופציונלי)
+    
+    Returns:
+        מילון עם summary, by_status ואופציונלית by_period
+    """
+    logger.info(f"Running sales_report_tool from {start} to {end}")
+    frame = await _order_frame()
+    report = {
+        "summary": sales_summary(frame, start, end),
+        "by_status": status_breakdown(frame, start, end)
+    }
+    if period:
+        report["by_period"] = sales_by_period(frame, period, start, end)
+    return report
+
+async def top_products_tool(
+    limit: int = 5,
+    metric: str = "quantity",
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    כלי שמחזיר את המוצרים הנמכרים ביותר
+    
+    Args:
+        limit: מספר המוצרים
+        metric: quantity (כמות) או revenue (הכנסות)
+        start: תאריך התחלה כולל (YYYY-MM-DD)
+        end: תאריך סיום לא כולל (YYYY-MM-DD)
+    
+    Returns:
+        טבלה של המוצרים המובילים
+    """
+    logger.info(f"Running top_products_tool (limit={limit}, metric={metric})")
+    return top_products(await _order_frame(), limit, metric, start, end)
+
+async def top_customers_tool(
+    limit: int = 5,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    כלי שמחזיר את הלקוחות המובילים לפי סכום ההזמנות
+    
+    Args:
+        limit: מספר הלקוחות
+        start: תאריך התחלה כולל (YYYY-MM-DD)
+        end: תאריך סיום לא כולל (YYYY-MM-DD)
+    
+    Returns:
+        טבלה של הלקוחות המובילים
+    """
+    logger.info(f"Running top_customers_tool (limit={limit})")
+    return top_customers(await _order_frame(), limit, start, end)
+
+async def get_store_info_tool() -> Dict[str, Any]:
     """
     כלי שמחזיר מידע כללי על החנות
     
@@ -56,9 +294,9 @@ def get_store_info_tool() -> Dict[str, Any]:
         מידע על החנות
     """
     logger.info("Running get_store_info_tool")
-    return get_store_info()
+    return await get_store_info()
 
-def create_product_tool(
+async def create_product_tool(
     name: str,
     regular_price: str,
     description: Optional[str] = None,
@@ -93,9 +331,9 @@ def create_product_tool(
         product_data["categories"] = categories
     
     # צור את המוצר
-    return create_product(product_data)
+    return compact_item(await create_product(product_data), fields_for("create_product_tool"))
 
-def update_product_tool(
+async def update_product_tool(
     id: int,
     name: Optional[str] = None,
     regular_price: Optional[str] = None,
@@ -134,9 +372,9 @@ def update_product_tool(
         product_data["categories"] = categories
     
     # עדכן את המוצר
-    return update_product(id, product_data)
+    return compact_item(await update_product(id, product_data), fields_for("update_product_tool"))
 
-def delete_product_tool(id: int) -> Dict[str, Any]:
+async def delete_product_tool(id: int) -> Dict[str, Any]:
     """
     כלי שמוחק מוצר מהחנות
     
@@ -147,15 +385,92 @@ def delete_product_tool(id: int) -> Dict[str, Any]:
         תוצאת המחיקה
     """
     logger.info(f"Running delete_product_tool for product ID: {id}")
-    return delete_product(id)
+    return await delete_product(id)
+
+def _product_data(product: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ממיר פריט מכלי batch לנתוני מוצר של WooCommerce - משמיט שדות ריקים וממיר מזהי קטגוריות
+    """
+    product_data = {key: value for key, value in product.items() if value is not None and key != "category_ids"}
+    if product.get("category_ids"):
+        product_data["categories"] = [{"id": category_id} for category_id in product["category_ids"]]
+    return product_data
+
+def _compact_batch_results(results: List[Dict[str, Any]], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """
+    מצמצם את תוצאות ה-batch לפלט של כלי, עם ספירה של הצלחות וכישלונות
+    """
+    compact = []
+    for result in results:
+        if not result.get("ok"):
+            compact.append({key: value for key, value in result.items() if value is not None})
+        elif fields:
+            compact.append({"ok": True, **compact_item(result["item"], fields)})
+        else:
+            compact.append({"ok": True, "id": result["id"]})
+    succeeded = sum(1 for result in compact if result["ok"])
+    return {"succeeded": succeeded, "failed": len(compact) - succeeded, "results": compact}
+
+async def batch_create_products_tool(products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    כלי שיוצר מוצרים רבים בבת אחת
+    
+    Args:
+        products: נתוני המוצרים (name, regular_price, ואופציונלית description, sale_price, sku, category_ids)
+    
+    Returns:
+        תוצאה לכל מוצר לפי סדר הקלט
+    """
+    logger.info(f"Running batch_create_products_tool for {len(products)} products")
+    results = await batch_products(create=[_product_data(product) for product in products])
+    return _compact_batch_results(results["create"], fields_for("batch_create_products_tool"))
+
+async def batch_update_products_tool(products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    כלי שמעדכן מוצרים רבים בבת אחת
+    
+    Args:
+        products: נתוני העדכון של כל מוצר (id, ואופציונלית name, regular_price, sale_price, description, stock_quantity, category_ids)
+    
+    Returns:
+        תוצאה לכל מוצר לפי סדר הקלט
+    """
+    logger.info(f"Running batch_update_products_tool for {len(products)} products")
+    results = await batch_products(update=[_product_data(product) for product in products])
+    return _compact_batch_results(results["update"], fields_for("batch_update_products_tool"))
+
+async def batch_delete_products_tool(ids: List[int]) -> Dict[str, Any]:
+    """
+    כלי שמוחק מוצרים רבים בבת אחת
+    
+    Args:
+        ids: מזהי המוצרים למחיקה
+    
+    Returns:
+        תוצאה לכל מוצר לפי סדר הקלט
+    """
+    logger.info(f"Running batch_delete_products_tool for {len(ids)} products")
+    results = await batch_products(delete=ids)
+    return _compact_batch_results(results["delete"], None)
 
 # מילון של כלים ופונקציות שמטפלות בהם
 TOOL_HANDLERS = {
     "get_products_tool": get_products_tool,
     "get_categories_tool": get_categories_tool,
     "get_orders_tool": get_orders_tool,
+    "get_products_by_ids_tool": get_products_by_ids_tool,
+    "get_orders_by_ids_tool": get_orders_by_ids_tool,
+    "query_orders_tool": query_orders_tool,
+    "query_products_tool": query_products_tool,
+    "search_products_tool": search_products_tool,
+    "sales_report_tool": sales_report_tool,
+    "top_products_tool": top_products_tool,
+    "top_customers_tool": top_customers_tool,
     "get_store_info_tool": get_store_info_tool,
     "create_product_tool": create_product_tool,
     "update_product_tool": update_product_tool,
-    "delete_product_tool": delete_product_tool
+    "delete_product_tool": delete_product_tool,
+    "batch_create_products_tool": batch_create_products_tool,
+    "batch_update_products_tool": batch_update_products_tool,
+    "batch_delete_products_tool": batch_delete_products_tool
 } 
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+גרסאות הנתונים של החנות - מונה לכל סוג אובייקט שמתקדם בכל שינוי שהבוט רואה
+(webhook, פעולת כתיבה או סנכרון של המראה המקומית), כדי שתשובות שנשענו על גרסה קודמת יזוהו כלא עדכניות
+"""
+
+from typing import Dict
+
+# סוגי האובייקטים שיש להם גרסה
+DATA_KINDS = ("products", "orders")
+
+_data_versions: Dict[str, int] = {kind: 0 for kind in DATA_KINDS}
+
+
+def get_data_versions() -> Dict[str, int]:
+    """
+    מחזיר את גרסת הנתונים הנוכחית של כל סוג אובייקט
+    """
+    return dict(_data_versions)
+
+
+def restore_data_versions(versions: Dict[str, int]) -> None:
+    """
+    משחזר גרסאות נתונים שנשמרו (למשל מתמונת מצב), בלי לחזור לגרסה ישנה יותר מהנוכחית
+    """
+    for kind, version in versions.items():
+        if kind in _data_versions:
+            _data_versions[kind] = max(_data_versions[kind], int(version))
+
+
+def bump_data_version(kind: str) -> None:
+    """
+    מקדם את גרסת הנתונים של סוג אובייקט אחרי שינוי
+    """
+    _data_versions[kind] += 1
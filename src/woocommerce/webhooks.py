@@ -0,0 +1,160 @@
+"""
+שרת webhooks של WooCommerce - עדכון המטמון ברגע שמוצר או הזמנה משתנים בחנות
+"""
+
+import base64
+import hashlib
+import hmac
+import logging
+from typing import Dict, Any, Optional
+
+from aiohttp import web
+
+from src.config import WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET
+from src.woocommerce.invalidation import apply_change, apply_removal
+from src.woocommerce.serializer import loads
+
+# הגדרת לוגר
+logger = logging.getLogger(__name__)
+
+# המרה ממשאב של webhook לסוג האובייקט במטמון
+RESOURCE_KINDS = {
+    "product": "products",
+    "order": "orders"
+}
+
+
+def sign_payload(body: bytes, secret: str) -> str:
+    """
+    מחשב את חתימת ה-webhook כפי ש-WooCommerce מחשב אותה (HMAC-SHA256 בקידוד base64)
+
+    Args:
+        body: גוף הבקשה הגולמי
+        secret: הסוד שהוגדר ב-webhook
+
+    Returns:
+        החתימה
+    """
+    digest = hmac.new(secret.encode(), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode()
+
+
+def verify_signature(body: bytes, signature: Optional[str], secret: str) -> bool:
+    """
+    בודק שחתימת ה-webhook תקינה
+
+    Args:
+        body: גוף הבקשה הגולמי
+        signature: החתימה מהכותרת X-WC-Webhook-Signature
+        secret: הסוד שהוגדר ב-webhook
+
+    Returns:
+        True אם החתימה תקינה
+    """
+    if not signature or not secret:
+        return False
+    return hmac.compare_digest(sign_payload(body, secret), signature)
+
+
+def apply_webhook(topic: str, payload: Dict[str, Any]) -> bool:
+    """
+    מעדכן את המטמון לפי webhook שהתקבל
+
+    Args:
+        topic: נושא ה-webhook, למשל "product.updated"
+        payload: גוף ה-webhook
+
+    Returns:
+        True אם ה-webhook טופל
+    """
+    resource, _, event = topic.partition(".")
+    kind = RESOURCE_KINDS.get(resource)
+    if kind is None or "id" not in payload:
+        logger.debug(f"Ignoring webhook with topic {topic}")
+        return False
+
+    if event == "deleted":
+        apply_removal(kind, payload["id"])
+    else:
+        apply_change(kind, payload)
+
+    logger.info(f"Applied webhook {topic} for {resource} {payload['id']}")
+    return True
+
+
+class WebhookServer:
+    """
+    שרת HTTP מוטמע שמקבל webhooks מ-WooCommerce
+    """
+
+    def __init__(
+        self,
+        host: str = WEBHOOK_HOST,
+        port: int = WEBHOOK_PORT,
+        path: str = WEBHOOK_PATH,
+        secret: str = WEBHOOK_SECRET
+    ):
+        """
+        Args:
+            host: כתובת להאזנה
+            port: פורט להאזנה
+            path: הנתיב שאליו WooCommerce שולח את ה-webhooks
+            secret: הסוד שהוגדר ב-webhooks בחנות
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.secret = secret
+        self._runner: Optional[web.AppRunner] = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        מטפל בבקשת webhook
+        """
+        body = await request.read()
+        topic = request.headers.get("X-WC-Webhook-Topic")
+
+        # בקשת ping שנשלחת בעת יצירת webhook חדש - אין לה נושא ואין לה חתימה
+        if topic is None:
+            return web.Response(text="ok")
+
+        if not verify_signature(body, request.headers.get("X-WC-Webhook-Signature"), self.secret):
+            logger.warning(f"Rejected webhook {topic} with invalid signature")
+            return web.Response(status=401, text="invalid signature")
+
+        try:
+            payload = loads(body)
+        except ValueError:
+            return web.Response(status=400, text="invalid payload")
+
+        try:
+            apply_webhook(topic, payload)
+        except Exception as e:
+            logger.error(f"Error applying webhook {topic}: {e}")
+        return web.Response(text="ok")
+
+    async def start(self) -> None:
+        """
+        מפעיל את השרת
+        """
+        if not self.secret:
+            logger.warning("WEBHOOK_SECRET is not set, all webhooks will be rejected")
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        """
+        עוצר את השרת
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.info("Webhook server stopped")
+
+
+# מופע גלובלי של שרת ה-webhooks - מופעל רק אם WEBHOOK_ENABLED
+webhook_server = WebhookServer()